@@ -1,27 +1,109 @@
 # FastAPI app skeleton for AI Workplace Learning
-from fastapi import FastAPI, Request, Body, HTTPException, Depends, status, UploadFile, Form, File
+from fastapi import FastAPI, Request, Body, HTTPException, Depends, status, UploadFile, Form, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from pydantic import BaseModel
+from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from pathlib import Path
 import json
 import os
+import asyncio
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime
 import uuid
 from typing import List, Optional, Dict, Any
-from backend.prompts import CONCEPT_PROMPT, MICROLESSON_PROMPT, SIMULATION_PROMPT, RECOMMENDATION_PROMPT, PROMPTS, CERTIFICATION_RECOMMENDATION_PROMPT, CERTIFICATION_STUDY_PLAN_PROMPT, CERTIFICATION_SIMULATION_PROMPT, CERTIFICATION_CAREER_COACH_PROMPT, video_quiz_prompt, video_summary_prompt
-from backend.llm import ask_openai, web_search_query, classify_intent, generate_scaffold
-from backend.db import lessons_collection, career_coach_sessions, skills_forecasts, teams_collection, team_members_collection, team_analytics_collection, certifications_collection, study_plans_collection, certification_simulations_collection, unknown_intents_collection, scaffold_history_collection
+from backend.prompts import CONCEPT_PROMPT, MICROLESSON_PROMPT, MICRO_LESSON_TOPIC_PROMPT, SIMULATION_PROMPT, RECOMMENDATION_PROMPT, PROMPTS, CERTIFICATION_RECOMMENDATION_PROMPT, CERTIFICATION_EXPLAIN_PROMPT, CERTIFICATION_STUDY_PLAN_PROMPT, CERTIFICATION_SIMULATION_PROMPT, CERTIFICATION_CAREER_COACH_PROMPT, TEAM_ANALYTICS_NARRATIVE_PROMPT, video_quiz_prompt
+from backend.llm import ask_openai, ask_openai_async, ask_openai_stream, ask_openai_stream_async, web_search_query, classify_intent, generate_scaffold, JSON_OBJECT_FORMAT
+from backend.json_stream import JSONStreamParser, parse_json, JSONParseError
+from backend.summarize import summarize_transcript
+from backend.rollups import record_activity, get_dashboard, ensure_rollup_indexes, LESSONS, COACH_TURNS, FORECASTS, CERTIFICATIONS
+from backend.metrics import MetricsMiddleware, render_metrics, monitor_event_loop_lag, record_cache
+from backend.tracing import TracingMiddleware, install_log_filter, span
+from backend.responses import ORJSONResponse, CompressionMiddleware
+from backend.versioning import version_key, get_version, bump_version
+from backend.search import search_user_artifacts, ensure_search_indexes, PageOutOfRange
+from backend.cert_catalog import recommend_certifications as catalog_candidates, format_candidates, get_catalog, EXPLAIN_CANDIDATES
+from backend.profiles import get_profile, save_profile, ensure_profile_indexes
+from backend.pools import run_pool_refiller, ensure_pool_indexes, POOL_REFILLER_ENABLED
+from backend.cert_questions import question_pool, sample_questions, format_simulation
+from backend.scenarios import scenario_pool, take_scenario, validate_step, SCENARIO_KEY
+from backend.speculation import build_step_prompt, speculate, take_speculation, SPECULATION_ENABLED
+from backend.queries import gather_queries, find_many, find_one, aggregate, QueryTimeout, NEWEST_FIRST
+from backend.team_analytics import compute_team_metrics, summarize_for_prompt
+from backend.team_members import add_members, update_members, remove_members, import_members, BulkTooLarge, CSV_FORMAT, NDJSON_FORMAT
+from backend.team_fingerprint import members_hash, analytics_fingerprint, apply_member_changes, store_members_hash, ensure_team_indexes
+from backend.batch import create_batch_job, run_batch_job, get_batch_job, watch_batch_job, ensure_batch_indexes, BatchTooLarge, MICRO_LESSONS, RECOMMENDATIONS
+from backend.videos import get_or_create_quiz, register_video, prepare_video, get_video, DEFAULT_NUM_QUESTIONS, MAX_NUM_QUESTIONS
+from backend.db import client as mongo_client, lessons_collection, recommendations_collection, career_coach_sessions, skills_forecasts, teams_collection, team_members_collection, team_analytics_collection, certifications_collection, study_plans_collection, certification_simulations_collection, unknown_intents_collection, scaffold_history_collection
 from bson import ObjectId
+from bson.int64 import Int64
+from pymongo import ReturnDocument
+
+# The voice stack pulls in torch and Coqui TTS, so it is only imported when enabled
+VOICE_CLONING_ENABLED = os.getenv("VOICE_CLONING_ENABLED", "1") == "1"
+
+_firebase_auth = None
+_firebase_lock = threading.Lock()
+
+def get_firebase_auth():
+    """Initialise Firebase Admin on first use instead of at import time"""
+    global _firebase_auth
+    if _firebase_auth is not None:
+        return _firebase_auth
+    with _firebase_lock:
+        if _firebase_auth is not None:
+            return _firebase_auth
+        import firebase_admin
+        from firebase_admin import credentials
+        from firebase_admin import auth as firebase_auth
+
+        if not firebase_admin._apps:
+            cred = credentials.Certificate("serviceAccountKey.json")  # Path from root
+            firebase_admin.initialize_app(cred)
+        _firebase_auth = firebase_auth
+    return _firebase_auth
+
+async def _warm_up_firebase():
+    try:
+        await asyncio.to_thread(get_firebase_auth)
+    except Exception as e:
+        print(f"Firebase initialisation failed: {e}")
 
-import firebase_admin
-from firebase_admin import credentials
-from firebase_admin import auth as firebase_auth
-
-cred = credentials.Certificate("serviceAccountKey.json")  # Path from root
-firebase_admin.initialize_app(cred)
-
-app = FastAPI()
+async def _ensure_indexes():
+    for ensure in (ensure_rollup_indexes, ensure_search_indexes, ensure_batch_indexes, ensure_team_indexes, ensure_profile_indexes, ensure_pool_indexes):
+        try:
+            await ensure()
+        except Exception as e:
+            print(f"Failed to create indexes ({ensure.__name__}): {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background_tasks = []
+    if VOICE_CLONING_ENABLED:
+        # Voice training jobs run in this process unless dedicated workers are deployed
+        # (python -m backend.voice_jobs)
+        if os.getenv("VOICE_TRAINING_INPROCESS_WORKER", "1") == "1":
+            from backend.voice_jobs import run_worker
+            background_tasks.append(asyncio.create_task(run_worker()))
+        # Load the TTS model after startup so workers accept traffic immediately
+        from backend.voice_cloning import voice_cloning_manager
+        voice_cloning_manager.start_model_loading()
+    # Initialise Firebase in the background so startup doesn't wait on it
+    background_tasks.append(asyncio.create_task(_warm_up_firebase()))
+    get_catalog()  # build the certification skill index before the first request
+    background_tasks.append(asyncio.create_task(_ensure_indexes()))
+    if POOL_REFILLER_ENABLED:
+        background_tasks.append(asyncio.create_task(run_pool_refiller(
+            [question_pool, scenario_pool], static_keys={scenario_pool.name: [SCENARIO_KEY]}
+        )))
+    background_tasks.append(asyncio.create_task(monitor_event_loop_lag()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    mongo_client.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,17 +112,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Outermost, so the request id and root span cover every other middleware
+app.add_middleware(TracingMiddleware)
+install_log_filter()
 
-import os
-from fastapi.staticfiles import StaticFiles
+@app.exception_handler(QueryTimeout)
+async def query_timeout_handler(request: Request, exc: QueryTimeout):
+    print(f"Query timeout on {request.url.path}: {exc}")
+    return ORJSONResponse(status_code=504, content={"detail": "The database took too long to respond"})
 
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
-from fastapi.responses import FileResponse
-from fastapi.responses import StreamingResponse
-from backend.llm import ask_openai_stream
-
 @app.get("/favicon.ico")
 async def favicon():
     favicon_path = os.path.join("static", "favicon.ico")
@@ -52,7 +137,8 @@ async def verify_token(request: Request):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid auth header")
     id_token = auth_header.split(" ")[1]
     try:
-        decoded_token = firebase_auth.verify_id_token(id_token)
+        with span("auth.verify_token"):
+            decoded_token = get_firebase_auth().verify_id_token(id_token)
         return decoded_token
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
@@ -63,6 +149,8 @@ class MicroLessonRequest(BaseModel):
 class SimulationRequest(BaseModel):
     history: list  # List of dicts: [{"speaker": "Customer", "text": "...", "user_choice": "..."}]
     user_input: str  # The user's latest choice/response
+    session_id: Optional[str] = None  # Enables speculative generation of the next step (backend/speculation.py)
+    choice_id: Optional[int] = None  # id of the chosen choice, as returned in a session's previous step
 
 class RecommendationRequest(BaseModel):
     skill_gap: str
@@ -98,6 +186,18 @@ class TeamMemberUpdateRequest(BaseModel):
     skills: Optional[List[str]] = None
     performance_score: Optional[float] = None
 
+class TeamMembersBulkAddRequest(BaseModel):
+    members: List[TeamMember]
+
+class TeamMemberBulkUpdate(TeamMemberUpdateRequest):
+    member_id: str
+
+class TeamMembersBulkUpdateRequest(BaseModel):
+    updates: List[TeamMemberBulkUpdate]
+
+class TeamMembersBulkRemoveRequest(BaseModel):
+    member_ids: List[str]
+
 class TeamAnalyticsRequest(BaseModel):
     team_id: str
     metrics: List[str]  # e.g., ["collaboration", "productivity", "communication"]
@@ -129,6 +229,11 @@ class LLMStreamRequest(BaseModel):
 def root():
     return {"message": "AI Workplace Learning API is running."}
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics in text exposition format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 
 @app.get("/concepts")
 async def generate_concepts(user=Depends(verify_token)):
@@ -137,8 +242,8 @@ async def generate_concepts(user=Depends(verify_token)):
     return {"concepts": result}
 
 def generate_micro_lesson(topic: str) -> str:
-    prompt = f"Write a concise, practical micro-lesson for the following workplace topic: {topic}"
-    return ask_openai(prompt)
+    prompt = MICRO_LESSON_TOPIC_PROMPT.format(topic=topic)
+    return ask_openai(prompt, template="micro_lesson")
 
 @app.post("/micro-lesson")
 async def micro_lesson(request: Request, user=Depends(verify_token)):
@@ -155,12 +260,19 @@ async def micro_lesson(request: Request, user=Depends(verify_token)):
         "user_email": user.get("email", ""),
         "created_at": datetime.utcnow()
     })
+    await record_activity(user["uid"], LESSONS, topic=topic)
+    await bump_version(version_key(user["uid"], "lessons"))
     return {"lesson": lesson_text}
 
 @app.get("/simulation")
 async def generate_simulation(user=Depends(verify_token)):
     """Generate a customer conversation simulation."""
-    result = ask_openai(SIMULATION_PROMPT)
+    scenario = await take_scenario(user["uid"])
+    if scenario:
+        simulation = {"customerText": scenario["customerText"], "choices": scenario["choices"]}
+        return {"simulation": json.dumps(simulation), "scenario_id": scenario["id"]}
+    # Pool empty or exhausted for this user
+    result = await ask_openai_async(SIMULATION_PROMPT)
     return {"simulation": result}
 
 @app.post("/recommendation")
@@ -169,34 +281,115 @@ async def generate_recommendation(request: RecommendationRequest, user=Depends(v
     result = ask_openai(prompt)
     return {"recommendation": result}
 
+class BatchMicroLessonsRequest(BaseModel):
+    topics: List[str]
+
+class BatchRecommendationsRequest(BaseModel):
+    skill_gaps: List[str]
+
+async def _start_batch(kind: str, items: List[str], background_tasks: BackgroundTasks, user):
+    try:
+        created = await create_batch_job(kind, items, user)
+    except BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    job = created["job"]
+    if created["items"]:
+        background_tasks.add_task(run_batch_job, job["batch_id"], kind, created["items"], user)
+    return job
+
+@app.post("/batch/micro-lessons", status_code=202)
+async def batch_micro_lessons(request: BatchMicroLessonsRequest, background_tasks: BackgroundTasks, user=Depends(verify_token)):
+    """Generate and save micro-lessons for many topics in the background."""
+    return {"job": await _start_batch(MICRO_LESSONS, request.topics, background_tasks, user)}
+
+@app.post("/batch/recommendations", status_code=202)
+async def batch_recommendations(request: BatchRecommendationsRequest, background_tasks: BackgroundTasks, user=Depends(verify_token)):
+    """Generate and save recommendations for many skill gaps in the background."""
+    return {"job": await _start_batch(RECOMMENDATIONS, request.skill_gaps, background_tasks, user)}
+
+@app.get("/recommendations")
+async def get_recommendations(request: Request, user=Depends(verify_token)):
+    """Get user's saved recommendations, newest first."""
+    version = await get_version(version_key(user["uid"], "recommendations"))
+    if version.matches(request):
+        return version.not_modified()
+    recommendations = await recommendations_collection.find({"user_id": user["uid"]}).sort("created_at", -1).to_list(length=None)
+    return version.attach(ORJSONResponse({"recommendations": recommendations}))
+
+@app.get("/batch/jobs/{batch_id}")
+async def get_batch_status(batch_id: str, user=Depends(verify_token)):
+    job = await get_batch_job(batch_id, user["uid"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return {"job": job}
+
+@app.get("/batch/jobs/{batch_id}/events")
+async def stream_batch_status(batch_id: str, user=Depends(verify_token)):
+    """Server-sent events with batch progress until it finishes"""
+    async def event_stream():
+        async for job in watch_batch_job(batch_id, user["uid"]):
+            yield f"data: {json.dumps(job)}\n\n"
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+UNPARSED_STEP = {"customerText": "Sorry, could not parse AI response.", "choices": []}
+
+def _parse_simulation_step(result: str) -> Optional[Dict[str, Any]]:
+    """The step in the reply, shaped like an opening scenario (or a final step without choices), or None"""
+    try:
+        parsed = parse_json(result, template="simulation_step", expect="{")
+    except JSONParseError:
+        return None
+    return validate_step(parsed) if isinstance(parsed, dict) else None
+
 @app.post("/simulation-step")
 async def simulation_step(request: SimulationRequest, user=Depends(verify_token)):
-    # Build conversation history as text
-    history_text = ""
-    for turn in request.history:
-        if not isinstance(turn, dict) or 'speaker' not in turn or 'text' not in turn:
-            print("Malformed turn in history:", turn)
-            continue  # or raise an error, or handle as needed
-        history_text += f"{turn['speaker']}: {turn['text']}\n"
-        if 'user_choice' in turn:
-            history_text += f"Employee: {turn['user_choice']}\n"
-    prompt = (
-        f"{SIMULATION_PROMPT}\n"
-        f"Conversation so far:\n{history_text}\n"
-        f"Employee's next response: {request.user_input}\n"
-        "Continue the scenario."
-    )
-    result = ask_openai(prompt)
+    speculative = request.session_id is not None and SPECULATION_ENABLED
+    result = None
+    if speculative:
+        result = await take_speculation(user["uid"], request.session_id, request.user_input, request.choice_id)
+    if result is None:
+        prompt = build_step_prompt(request.history, request.user_input)
+        result = await ask_openai_async(prompt, template="simulation_step", response_format=JSON_OBJECT_FORMAT)
     print("LLM raw response:", result)
-    # Try to parse the LLM's response as JSON
-    import json
-    try:
-        parsed = json.loads(result)
-    except Exception:
-        # If parsing fails, return the raw result for debugging
-        parsed = {"customerText": "Sorry, could not parse AI response.", "choices": []}
+    parsed = _parse_simulation_step(result) or UNPARSED_STEP
+    if speculative and parsed["choices"]:
+        parsed = speculate(user["uid"], request.session_id, request.history, request.user_input, parsed)
     return parsed 
 
+@app.post("/simulation-step/stream")
+async def simulation_step_stream(request: SimulationRequest, user=Depends(verify_token)):
+    """Server-sent events: each field of the step (customerText first) as soon as it is
+    generated, then the whole step, parsed as /simulation-step would return it.
+
+    Fields are sent before the step is validated. When it turns out invalid, an
+    `invalid` event tells the client to discard the fields it has received,
+    and the step event carries the placeholder step instead. In a session, only
+    the step event has the choice ids."""
+    speculative = request.session_id is not None and SPECULATION_ENABLED
+
+    async def speculated_chunks(result):
+        yield result
+
+    async def event_stream():
+        result = await take_speculation(user["uid"], request.session_id, request.user_input, request.choice_id) if speculative else None
+        if result is not None:
+            chunks = speculated_chunks(result)
+        else:
+            prompt = build_step_prompt(request.history, request.user_input)
+            chunks = ask_openai_stream_async(prompt, template="simulation_step", response_format=JSON_OBJECT_FORMAT)
+        parser = JSONStreamParser()
+        async for chunk in chunks:
+            for name, value in parser.feed(chunk):
+                yield f"event: field\ndata: {json.dumps({'name': name, 'value': value})}\n\n"
+        step = _parse_simulation_step(parser.text)
+        if step is None:
+            yield "event: invalid\ndata: {}\n\n"
+            step = UNPARSED_STEP
+        if speculative and step["choices"]:
+            step = speculate(user["uid"], request.session_id, request.history, request.user_input, step)
+        yield f"event: step\ndata: {json.dumps(step)}\n\n"
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.post("/web-search")
 async def web_search(request: Request):
     data = await request.json()
@@ -207,37 +400,49 @@ async def web_search(request: Request):
     return {"result": result} 
 
 @app.get("/lessons")
-async def get_lessons(user=Depends(verify_token)):
-    lessons = []
-    async for lesson in lessons_collection.find({"user_id": user["uid"]}):
-        lesson["_id"] = str(lesson["_id"])
-        lessons.append(lesson)
-    return {"lessons": lessons} 
+async def get_lessons(request: Request, user=Depends(verify_token)):
+    version = await get_version(version_key(user["uid"], "lessons"))
+    if version.matches(request):
+        return version.not_modified()
+    lessons = await lessons_collection.find({"user_id": user["uid"]}).to_list(length=None)
+    return version.attach(ORJSONResponse({"lessons": lessons}))
 
 @app.delete("/lessons/{lesson_id}")
 async def delete_lesson(lesson_id: str, user=Depends(verify_token)):
     # Only delete lessons owned by the authenticated user
-    result = await lessons_collection.delete_one({
-        "_id": ObjectId(lesson_id),
-        "user_id": user["uid"]  # Ensure user owns this lesson
-    })
-    if result.deleted_count == 0:
+    lesson = await lessons_collection.find_one_and_delete(
+        {
+            "_id": ObjectId(lesson_id),
+            "user_id": user["uid"]  # Ensure user owns this lesson
+        },
+        projection={"topic": 1, "created_at": 1}
+    )
+    if lesson is None:
         raise HTTPException(status_code=404, detail="Lesson not found")
+    await record_activity(user["uid"], LESSONS, topic=lesson.get("topic"), amount=-1, when=lesson.get("created_at"))
+    await bump_version(version_key(user["uid"], "lessons"))
     return {"success": True}
 
 @app.put("/lessons/{lesson_id}")
 async def update_lesson(lesson_id: str, data: dict = Body(...), user=Depends(verify_token)):
     # Only update lessons owned by the authenticated user
-    result = await lessons_collection.update_one(
+    previous = await lessons_collection.find_one_and_update(
         {
             "_id": ObjectId(lesson_id),
             "user_id": user["uid"]  # Ensure user owns this lesson
         },
-        {"$set": {"topic": data.get("topic"), "lesson": data.get("lesson")}}
+        {"$set": {"topic": data.get("topic"), "lesson": data.get("lesson")}},
+        projection={"topic": 1, "created_at": 1},
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    return {"success": True} 
+    if previous.get("topic") != data.get("topic"):
+        # Move the lesson between topics on the day it was created
+        await record_activity(user["uid"], LESSONS, topic=previous.get("topic"), amount=-1, when=previous.get("created_at"))
+        await record_activity(user["uid"], LESSONS, topic=data.get("topic"), amount=1, when=previous.get("created_at"))
+    await bump_version(version_key(user["uid"], "lessons"))
+    return {"success": True}
 
 @app.post("/career-coach")
 async def career_coach(request: Request, user=Depends(verify_token)):
@@ -259,6 +464,8 @@ async def career_coach(request: Request, user=Depends(verify_token)):
             "response": result,
             "created_at": datetime.utcnow()
         })
+        await record_activity(user["uid"], COACH_TURNS)
+        await bump_version(version_key(user["uid"], "career_sessions"))
     except Exception as e:
         print(f"Failed to save career coach session: {e}")
     
@@ -283,34 +490,52 @@ async def skills_forecast(request: Request, user=Depends(verify_token)):
             "forecast": result,
             "created_at": datetime.utcnow()
         })
+        await record_activity(user["uid"], FORECASTS)
     except Exception as e:
         print(f"Failed to save skills forecast: {e}")
     
     return {"forecast": result}
 
 @app.get("/user/career-sessions")
-async def get_career_sessions(user=Depends(verify_token)):
+async def get_career_sessions(request: Request, user=Depends(verify_token)):
     """Get user's career coach sessions."""
-    sessions = []
-    async for session in career_coach_sessions.find({"user_id": user["uid"]}).sort("created_at", -1):
-        session["_id"] = str(session["_id"])
-        sessions.append(session)
-    return {"sessions": sessions}
+    version = await get_version(version_key(user["uid"], "career_sessions"))
+    if version.matches(request):
+        return version.not_modified()
+    sessions = await career_coach_sessions.find({"user_id": user["uid"]}).sort("created_at", -1).to_list(length=None)
+    return version.attach(ORJSONResponse({"sessions": sessions}))
 
 @app.get("/user/skills-forecasts")
 async def get_skills_forecasts(user=Depends(verify_token)):
     """Get user's skills forecasts."""
-    forecasts = []
-    async for forecast in skills_forecasts.find({"user_id": user["uid"]}).sort("created_at", -1):
-        forecast["_id"] = str(forecast["_id"])
-        forecasts.append(forecast)
-    return {"forecasts": forecasts}
+    forecasts = await skills_forecasts.find({"user_id": user["uid"]}).sort("created_at", -1).to_list(length=None)
+    return ORJSONResponse({"forecasts": forecasts})
+
+@app.get("/user/dashboard")
+async def get_user_dashboard(user=Depends(verify_token)):
+    """Get dashboard totals, weekly trends, topic breakdown and streak."""
+    return await get_dashboard(user["uid"])
+
+@app.get("/search")
+async def search(q: str, page: int = 1, page_size: int = 10, types: Optional[str] = None, user=Depends(verify_token)):
+    """Search the user's lessons, study plans, coach sessions, forecasts and certifications."""
+    if not q.strip():
+        return {"query": q, "page": page, "page_size": page_size, "total": 0, "results": []}
+    kinds = [kind.strip() for kind in types.split(",")] if types else None
+    try:
+        return await search_user_artifacts(user["uid"], q, page=page, page_size=page_size, kinds=kinds)
+    except PageOutOfRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # Team Management Endpoints
+# members_hash is internal bookkeeping for the analytics cache
+TEAM_PROJECTION = {"members_hash": 0}
+
 @app.post("/teams")
 async def create_team(request: TeamCreateRequest, user=Depends(verify_token)):
     """Create a new team."""
     team_data = {
+        "_id": ObjectId(),
         "name": request.name,
         "description": request.description,
         "created_by": user["uid"],
@@ -318,15 +543,13 @@ async def create_team(request: TeamCreateRequest, user=Depends(verify_token)):
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
+    team_id = str(team_data["_id"])
     
-    # Insert team
-    team_result = await teams_collection.insert_one(team_data)
-    team_id = str(team_result.inserted_id)
-    
-    # Insert team members
+    # Member ids are assigned up front so the team is inserted with its members_hash
     member_docs = []
     for member in request.members:
         member_doc = {
+            "_id": ObjectId(),
             "team_id": team_id,
             "name": member.name,
             "role": member.role,
@@ -336,46 +559,56 @@ async def create_team(request: TeamCreateRequest, user=Depends(verify_token)):
             "created_at": datetime.utcnow()
         }
         member_docs.append(member_doc)
+    team_data["members_hash"] = Int64(members_hash(member_docs))
+    
+    # Insert team
+    await teams_collection.insert_one(team_data)
     
     if member_docs:
         await team_members_collection.insert_many(member_docs)
     
+    await bump_version(version_key(user["uid"], "teams"))
     return {"team_id": team_id, "message": "Team created successfully"}
 
 @app.get("/teams")
-async def get_teams(user=Depends(verify_token)):
+async def get_teams(request: Request, user=Depends(verify_token)):
     """Get all teams created by the user."""
-    teams = []
-    async for team in teams_collection.find({"created_by": user["uid"]}):
-        team["_id"] = str(team["_id"])
-        # Get member count for each team
-        member_count = await team_members_collection.count_documents({"team_id": team["_id"]})
-        team["member_count"] = member_count
-        teams.append(team)
-    return {"teams": teams}
+    version = await get_version(version_key(user["uid"], "teams"))
+    if version.matches(request):
+        return version.not_modified()
+    teams = await find_many(teams_collection, {"created_by": user["uid"]}, TEAM_PROJECTION)
+    # Member counts for every team in one aggregation
+    counts = await aggregate(team_members_collection, [
+        {"$match": {"team_id": {"$in": [str(team["_id"]) for team in teams]}}},
+        {"$group": {"_id": "$team_id", "count": {"$sum": 1}}}
+    ])
+    member_counts = {row["_id"]: row["count"] for row in counts}
+    for team in teams:
+        team["member_count"] = member_counts.get(str(team["_id"]), 0)
+    return version.attach(ORJSONResponse({"teams": teams}))
 
 @app.get("/teams/{team_id}")
-async def get_team(team_id: str, user=Depends(verify_token)):
+async def get_team(team_id: str, request: Request, user=Depends(verify_token)):
     """Get specific team details with members."""
-    # Verify team ownership
-    team = await teams_collection.find_one({
-        "_id": ObjectId(team_id),
-        "created_by": user["uid"]
-    })
+    # The stamp is only created after an ownership check, so finding one proves ownership
+    key = version_key(user["uid"], f"team:{team_id}")
+    version = await get_version(key, create=False)
+    if version and version.matches(request):
+        return version.not_modified()
+    
+    # Members are read alongside the ownership check and discarded if it fails
+    results = await gather_queries(
+        team=find_one(teams_collection, {"_id": ObjectId(team_id), "created_by": user["uid"]}, TEAM_PROJECTION),
+        members=find_many(team_members_collection, {"team_id": team_id})
+    )
+    team = results["team"]
     
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    team["_id"] = str(team["_id"])
-    
-    # Get team members
-    members = []
-    async for member in team_members_collection.find({"team_id": team_id}):
-        member["_id"] = str(member["_id"])
-        members.append(member)
-    
-    team["members"] = members
-    return {"team": team}
+    version = version or await get_version(key)
+    team["members"] = results["members"]
+    return version.attach(ORJSONResponse({"team": team}))
 
 @app.put("/teams/{team_id}")
 async def update_team(team_id: str, request: TeamUpdateRequest, user=Depends(verify_token)):
@@ -401,6 +634,7 @@ async def update_team(team_id: str, request: TeamUpdateRequest, user=Depends(ver
         {"$set": update_data}
     )
     
+    await bump_version(version_key(user["uid"], "teams"), version_key(user["uid"], f"team:{team_id}"))
     return {"message": "Team updated successfully"}
 
 @app.delete("/teams/{team_id}")
@@ -421,6 +655,7 @@ async def delete_team(team_id: str, user=Depends(verify_token)):
     # Delete team
     await teams_collection.delete_one({"_id": ObjectId(team_id)})
     
+    await bump_version(version_key(user["uid"], "teams"), version_key(user["uid"], f"team:{team_id}"))
     return {"message": "Team deleted successfully"}
 
 @app.post("/teams/{team_id}/members")
@@ -445,10 +680,12 @@ async def add_team_member(team_id: str, member: TeamMember, user=Depends(verify_
         "created_at": datetime.utcnow()
     }
     
-    result = await team_members_collection.insert_one(member_doc)
-    member_doc["_id"] = str(result.inserted_id)
+    # insert_one adds the new _id to member_doc
+    await team_members_collection.insert_one(member_doc)
+    await apply_member_changes(team, added=[member_doc])
     
-    return {"member": member_doc, "message": "Member added successfully"}
+    await bump_version(version_key(user["uid"], "teams"), version_key(user["uid"], f"team:{team_id}"))
+    return ORJSONResponse({"member": member_doc, "message": "Member added successfully"})
 
 @app.put("/teams/{team_id}/members/{member_id}")
 async def update_team_member(
@@ -481,14 +718,17 @@ async def update_team_member(
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    result = await team_members_collection.update_one(
+    previous = await team_members_collection.find_one_and_update(
         {"_id": ObjectId(member_id), "team_id": team_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
     )
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Member not found")
+    await apply_member_changes(team, added=[{**previous, **update_data}], removed=[previous])
     
+    await bump_version(version_key(user["uid"], f"team:{team_id}"))
     return {"message": "Member updated successfully"}
 
 @app.delete("/teams/{team_id}/members/{member_id}")
@@ -503,61 +743,139 @@ async def remove_team_member(team_id: str, member_id: str, user=Depends(verify_t
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    result = await team_members_collection.delete_one({
+    removed = await team_members_collection.find_one_and_delete({
         "_id": ObjectId(member_id),
         "team_id": team_id
     })
     
-    if result.deleted_count == 0:
+    if removed is None:
         raise HTTPException(status_code=404, detail="Member not found")
+    await apply_member_changes(team, removed=[removed])
     
+    await bump_version(version_key(user["uid"], "teams"), version_key(user["uid"], f"team:{team_id}"))
     return {"message": "Member removed successfully"}
 
-@app.post("/teams/{team_id}/analytics")
-async def generate_team_analytics(team_id: str, request: TeamAnalyticsRequest, user=Depends(verify_token)):
-    """Generate AI-powered team analytics."""
-    # Verify team ownership
+async def _owned_team(team_id: str, user):
     team = await teams_collection.find_one({
         "_id": ObjectId(team_id),
         "created_by": user["uid"]
     })
-    
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
+    return team
+
+@app.post("/teams/{team_id}/members/bulk")
+async def add_team_members_bulk(team_id: str, request: TeamMembersBulkAddRequest, user=Depends(verify_token)):
+    """Add many members to a team in one write."""
+    team = await _owned_team(team_id, user)
+    try:
+        members = await add_members(team, [member.dict() for member in request.members])
+    except BulkTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    await bump_version(version_key(user["uid"], "teams"), version_key(user["uid"], f"team:{team_id}"))
+    return ORJSONResponse({"members": members, "added": len(members)})
+
+@app.patch("/teams/{team_id}/members/bulk")
+async def update_team_members_bulk(team_id: str, request: TeamMembersBulkUpdateRequest, user=Depends(verify_token)):
+    """Update many members of a team in one write."""
+    team = await _owned_team(team_id, user)
+    updates = {}
+    for update in request.updates:
+        fields = update.dict(exclude_none=True)
+        fields.pop("member_id")
+        if fields:
+            updates[update.member_id] = fields
+    if not updates:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    try:
+        result = await update_members(team, updates)
+    except BulkTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    await bump_version(version_key(user["uid"], f"team:{team_id}"))
+    return result
+
+@app.post("/teams/{team_id}/members/bulk-delete")
+async def remove_team_members_bulk(team_id: str, request: TeamMembersBulkRemoveRequest, user=Depends(verify_token)):
+    """Remove many members from a team in one write."""
+    team = await _owned_team(team_id, user)
+    try:
+        result = await remove_members(team, request.member_ids)
+    except BulkTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    await bump_version(version_key(user["uid"], "teams"), version_key(user["uid"], f"team:{team_id}"))
+    return result
+
+@app.post("/teams/{team_id}/members/import")
+async def import_team_members(team_id: str, request: Request, format: Optional[str] = None, user=Depends(verify_token)):
+    """Import members from a CSV (name, role, email, skills, performance_score) or NDJSON body.
+
+    Rows are validated and written as the body streams in; invalid rows are
+    reported by row number and skipped.
+    """
+    team = await _owned_team(team_id, user)
+    content_type = request.headers.get("content-type", "")
+    fmt = format or (NDJSON_FORMAT if "ndjson" in content_type or "jsonl" in content_type else CSV_FORMAT)
+    if fmt not in (CSV_FORMAT, NDJSON_FORMAT):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    result = await import_members(team, request.stream(), fmt, TeamMember)
+    if result["imported"]:
+        await bump_version(version_key(user["uid"], "teams"), version_key(user["uid"], f"team:{team_id}"))
+    return result
+
+@app.post("/teams/{team_id}/analytics")
+async def generate_team_analytics(team_id: str, request: TeamAnalyticsRequest, force: bool = False, user=Depends(verify_token)):
+    """Generate AI-powered team analytics, reusing the last result while the team and metrics are unchanged."""
+    # Verify team ownership
+    with span("team.ownership_check", team_id=team_id):
+        team = await teams_collection.find_one({
+            "_id": ObjectId(team_id),
+            "created_by": user["uid"]
+        })
     
-    # Get team members
-    members = []
-    async for member in team_members_collection.find({"team_id": team_id}):
-        members.append(member)
-    
-    # Prepare data for AI analysis
-    team_data = {
-        "team_name": team["name"],
-        "team_description": team["description"],
-        "members": members,
-        "metrics": request.metrics
-    }
+    if not team:
+        raise HTTPException(status_code=404, detail="Team not found")
     
-    # Generate AI analysis
-    analysis_prompt = f"""
-    Analyze the following team data and provide insights on the requested metrics:
+    async def fetch_members():
+        with span("team.fetch_members", team_id=team_id) as members_span:
+            members = await team_members_collection.find(
+                {"team_id": team_id},
+                {"name": 1, "role": 1, "email": 1, "skills": 1, "performance_score": 1}
+            ).to_list(length=None)
+            if members_span:
+                members_span.set_attribute("team.member_count", len(members))
+        return members
     
-    Team: {team_data['team_name']}
-    Description: {team_data['team_description']}
+    members = None
+    team_members_hash = team.get("members_hash")
+    if team_members_hash is None:
+        # Team predates fingerprints (or lost its hash): compute it from the members
+        members = await fetch_members()
+        team_members_hash = await store_members_hash(team, members)
+    fingerprint = analytics_fingerprint(team, team_members_hash, request.metrics)
     
-    Team Members:
-    {chr(10).join([f"- {m['name']} ({m['role']}): Skills: {', '.join(m['skills'])}" for m in members])}
+    if not force:
+        cached = await team_analytics_collection.find_one(
+            {"team_id": team_id, "fingerprint": fingerprint},
+            sort=[("created_at", -1)]
+        )
+        record_cache("team_analytics", hit=cached is not None)
+        if cached:
+            return {"analysis": cached["analysis"], "stats": cached.get("stats"), "cached": True}
     
-    Requested Metrics: {', '.join(request.metrics)}
+    if members is None:
+        members = await fetch_members()
     
-    Please provide:
-    1. Overall team assessment
-    2. Individual member analysis
-    3. Recommendations for improvement
-    4. Collaboration insights
-    """
+    # Numbers are computed locally; the LLM only writes the narrative around them
+    with span("team.compute_metrics", team_id=team_id):
+        stats = compute_team_metrics(members)
     
-    analysis_result = ask_openai(analysis_prompt)
+    analysis_prompt = TEAM_ANALYTICS_NARRATIVE_PROMPT.format(
+        team_name=team["name"],
+        team_description=team["description"],
+        metrics=", ".join(request.metrics),
+        summary=summarize_for_prompt(stats)
+    )
+    analysis_result = await ask_openai_async(analysis_prompt, template="team_analytics")
     
     # Save analytics
     analytics_doc = {
@@ -565,31 +883,29 @@ async def generate_team_analytics(team_id: str, request: TeamAnalyticsRequest, u
         "user_id": user["uid"],
         "metrics": request.metrics,
         "analysis": analysis_result,
+        "stats": stats,
+        "fingerprint": fingerprint,
         "created_at": datetime.utcnow()
     }
     
-    await team_analytics_collection.insert_one(analytics_doc)
+    with span("team.save_analytics", team_id=team_id):
+        await team_analytics_collection.insert_one(analytics_doc)
     
-    return {"analysis": analysis_result}
+    return {"analysis": analysis_result, "stats": stats, "cached": False}
 
 @app.get("/teams/{team_id}/analytics")
 async def get_team_analytics(team_id: str, user=Depends(verify_token)):
     """Get historical analytics for a team."""
-    # Verify team ownership
-    team = await teams_collection.find_one({
-        "_id": ObjectId(team_id),
-        "created_by": user["uid"]
-    })
+    # Analytics are read alongside the ownership check and discarded if it fails
+    results = await gather_queries(
+        team=find_one(teams_collection, {"_id": ObjectId(team_id), "created_by": user["uid"]}, {"_id": 1}),
+        analytics=find_many(team_analytics_collection, {"team_id": team_id}, sort=NEWEST_FIRST)
+    )
     
-    if not team:
+    if not results["team"]:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    analytics = []
-    async for analysis in team_analytics_collection.find({"team_id": team_id}).sort("created_at", -1):
-        analysis["_id"] = str(analysis["_id"])
-        analytics.append(analysis)
-    
-    return {"analytics": analytics}
+    return ORJSONResponse({"analytics": results["analytics"]})
 
 # Certification Endpoints
 @app.post("/certifications/save-profile")
@@ -598,22 +914,7 @@ async def save_user_profile(request: CertificationProfile, user=Depends(verify_t
     try:
         print(f"Saving profile for user {user['uid']}: {request.dict()}")
         
-        # Save or update user profile
-        result = await certifications_collection.update_one(
-            {"user_id": user["uid"], "type": "profile"},
-            {
-                "$set": {
-                    "user_id": user["uid"],
-                    "user_email": user.get("email", ""),
-                    "type": "profile",
-                    "profile": request.dict(),
-                    "updated_at": datetime.utcnow()
-                }
-            },
-            upsert=True
-        )
-        
-        print(f"Profile save result: {result.modified_count} modified, {result.upserted_id} upserted")
+        await save_profile(user["uid"], user.get("email", ""), request.dict())
         return {"message": "Profile saved successfully"}
     except Exception as e:
         print(f"Failed to save user profile: {e}")
@@ -623,47 +924,51 @@ async def save_user_profile(request: CertificationProfile, user=Depends(verify_t
 async def get_user_profile(user=Depends(verify_token)):
     """Get user's latest profile for auto-fill."""
     try:
-        print(f"Getting profile for user {user['uid']}")
-        
-        profile_doc = await certifications_collection.find_one({
-            "user_id": user["uid"],
-            "type": "profile"
-        })
-        
-        print(f"Found profile doc: {profile_doc}")
-        
-        if profile_doc and profile_doc.get("profile"):
-            return {"profile": profile_doc["profile"]}
-        return {"profile": None}
+        return {"profile": await get_profile(user["uid"])}
     except Exception as e:
         print(f"Failed to get user profile: {e}")
         return {"profile": None}
 
 @app.post("/certifications/recommend")
-async def recommend_certifications(request: CertificationProfile, user=Depends(verify_token)):
-    """Generate AI-powered certification recommendations based on user profile."""
-    prompt = CERTIFICATION_RECOMMENDATION_PROMPT.format(
+async def recommend_certifications(request: CertificationProfile, explain: bool = False, user=Depends(verify_token)):
+    """Recommend certifications from the catalog; explain=true asks the AI to order and explain the top few."""
+    profile_fields = dict(
         role=request.role,
         skills=", ".join(request.skills),
         goals=request.goals,
         experience_level=request.experience_level
     )
+    candidates = catalog_candidates(request.dict())
     
-    result = ask_openai(prompt)
+    if not candidates:
+        # Nothing in the catalog relates to this profile: let the AI suggest from scratch
+        result = await ask_openai_async(CERTIFICATION_RECOMMENDATION_PROMPT.format(**profile_fields))
+    elif explain:
+        prompt = CERTIFICATION_EXPLAIN_PROMPT.format(
+            candidates=format_candidates(candidates[:EXPLAIN_CANDIDATES]),
+            **profile_fields
+        )
+        result = await ask_openai_async(prompt, template="certification_explain")
+    else:
+        result = format_candidates(candidates)
     
     # Save recommendation for user
     try:
-        await certifications_collection.insert_one({
-            "user_id": user["uid"],
-            "user_email": user.get("email", ""),
-            "profile": request.dict(),
-            "recommendation": result,
-            "created_at": datetime.utcnow()
-        })
+        with span("certifications.save_recommendation"):
+            await certifications_collection.insert_one({
+                "user_id": user["uid"],
+                "user_email": user.get("email", ""),
+                "profile": request.dict(),
+                "recommendation": result,
+                "candidates": candidates,
+                "catalog_version": get_catalog().version,
+                "created_at": datetime.utcnow()
+            })
+            await record_activity(user["uid"], CERTIFICATIONS)
     except Exception as e:
         print(f"Failed to save certification recommendation: {e}")
     
-    return {"recommendation": result}
+    return {"recommendation": result, "candidates": candidates, "catalog_version": get_catalog().version}
 
 @app.post("/certifications/study-plan")
 async def generate_study_plan(request: CertificationStudyPlan, user=Depends(verify_token)):
@@ -686,6 +991,7 @@ async def generate_study_plan(request: CertificationStudyPlan, user=Depends(veri
             "study_plan": result,
             "created_at": datetime.utcnow()
         })
+        await record_activity(user["uid"], CERTIFICATIONS, topic=request.certification_name)
     except Exception as e:
         print(f"Failed to save study plan: {e}")
     
@@ -694,11 +1000,15 @@ async def generate_study_plan(request: CertificationStudyPlan, user=Depends(veri
 @app.post("/certifications/simulate")
 async def certification_simulation(request: CertificationSimulation, user=Depends(verify_token)):
     """Generate certification interview simulation."""
-    prompt = CERTIFICATION_SIMULATION_PROMPT.format(
-        certification_name=request.certification_name
-    )
-    
-    result = ask_openai(prompt)
+    # Popular certifications are served from the pre-generated question pool
+    questions = await sample_questions(request.certification_name, user["uid"])
+    if questions:
+        result = format_simulation(request.certification_name, questions)
+    else:
+        prompt = CERTIFICATION_SIMULATION_PROMPT.format(
+            certification_name=request.certification_name
+        )
+        result = await ask_openai_async(prompt)
     
     # Save simulation for user
     try:
@@ -707,36 +1017,25 @@ async def certification_simulation(request: CertificationSimulation, user=Depend
             "user_email": user.get("email", ""),
             "certification_name": request.certification_name,
             "simulation": result,
+            "question_ids": [question["id"] for question in questions or []],
             "created_at": datetime.utcnow()
         })
+        await record_activity(user["uid"], CERTIFICATIONS, topic=request.certification_name)
     except Exception as e:
         print(f"Failed to save certification simulation: {e}")
     
-    return {"simulation": result}
+    return {"simulation": result, "questions": questions or []}
 
 @app.get("/certifications/user-recommendations")
 async def get_user_certifications(user=Depends(verify_token)):
     """Get user's certification recommendations and study plans."""
-    recommendations = []
-    async for rec in certifications_collection.find({"user_id": user["uid"]}).sort("created_at", -1):
-        rec["_id"] = str(rec["_id"])
-        recommendations.append(rec)
-    
-    study_plans = []
-    async for plan in study_plans_collection.find({"user_id": user["uid"]}).sort("created_at", -1):
-        plan["_id"] = str(plan["_id"])
-        study_plans.append(plan)
-    
-    simulations = []
-    async for sim in certification_simulations_collection.find({"user_id": user["uid"]}).sort("created_at", -1):
-        sim["_id"] = str(sim["_id"])
-        simulations.append(sim)
-    
-    return {
-        "recommendations": recommendations,
-        "study_plans": study_plans,
-        "simulations": simulations
-    } 
+    results = await gather_queries(
+        # Profiles not yet moved by `python -m backend.profiles --migrate` are skipped
+        recommendations=find_many(certifications_collection, {"user_id": user["uid"], "type": {"$ne": "profile"}}, sort=NEWEST_FIRST),
+        study_plans=find_many(study_plans_collection, {"user_id": user["uid"]}, sort=NEWEST_FIRST),
+        simulations=find_many(certification_simulations_collection, {"user_id": user["uid"]}, sort=NEWEST_FIRST)
+    )
+    return ORJSONResponse(results)
 
 from backend.llm import call_llm_router
 
@@ -764,23 +1063,22 @@ async def llm_stream(request: LLMStreamRequest):
 
 @app.post("/video-quiz")
 async def video_quiz(request: Request):
+    data = await request.json()
+    try:
+        num_questions = int(data.get("num_questions", DEFAULT_NUM_QUESTIONS))
+    except (TypeError, ValueError):
+        num_questions = 0
+    # The count goes into the prompt and the quiz cache key
+    if not 1 <= num_questions <= MAX_NUM_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"num_questions must be an integer from 1 to {MAX_NUM_QUESTIONS}")
     try:
-        data = await request.json()
         summary = data.get("summary", "")
         if not summary:
             return {"error": "Summary is required"}
         
-        prompt = video_quiz_prompt.format(summary=summary)
-        result = ask_openai(prompt)
-        
-        try:
-            questions = json.loads(result)
-            if not isinstance(questions, list):
-                questions = [{"question": "Failed to parse quiz", "options": [], "answer": "", "explanation": ""}]
-        except json.JSONDecodeError:
-            questions = [{"question": "Failed to parse quiz", "options": [], "answer": "", "explanation": ""}]
-        
-        return {"quiz": questions}
+        # Quizzes are stored per summary, so repeat viewers don't trigger a new call
+        result = await get_or_create_quiz(summary, num_questions)
+        return {"quiz": result["quiz"], "quiz_id": result["quiz_id"]}
     except Exception as e:
         print(f"Video quiz error: {e}")
         return {"error": "Failed to generate quiz", "quiz": []} 
@@ -789,13 +1087,35 @@ async def video_quiz(request: Request):
 async def video_summary(request: Request):
     data = await request.json()
     transcript = data.get("transcript", "")
-    prompt = video_summary_prompt.format(transcript=transcript)
-    summary = ask_openai(prompt)
-    return {"summary": summary} 
+    result = await summarize_transcript(transcript)
+    return {"summary": result["summary"], "chunks": result["chunks"]} 
+
+class VideoCreateRequest(BaseModel):
+    video_url: str
+    transcript: str
+    num_questions: int = Field(DEFAULT_NUM_QUESTIONS, ge=1, le=MAX_NUM_QUESTIONS)
+
+@app.post("/videos")
+async def add_video(request: VideoCreateRequest, background_tasks: BackgroundTasks, user=Depends(verify_token)):
+    """Add a video and pre-generate its summary and quiz in the background."""
+    video = await register_video(request.video_url, request.transcript, user["uid"])
+    if video["needs_build"]:
+        background_tasks.add_task(prepare_video, video["video_id"], request.transcript, request.num_questions)
+    return {"video_id": video["video_id"], "status": video["status"]}
+
+@app.get("/videos/{video_id}")
+async def get_video_content(video_id: str, user=Depends(verify_token)):
+    """Get a video's pre-generated summary and quiz."""
+    video = await get_video(video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return {"video": video}
 
 class IntentInput(BaseModel):
     query: str
 
+UNKNOWN_INTENTS_VERSION = version_key("global", "unknown_intents")
+
 @app.post("/classify-intent")
 async def handle_intent(input_data: IntentInput):
     result = classify_intent(input_data.query)
@@ -805,15 +1125,16 @@ async def handle_intent(input_data: IntentInput):
         "classification": result,
         "created_at": datetime.utcnow()
     })
-    return result 
+    await bump_version(UNKNOWN_INTENTS_VERSION)
+    return result
 
 @app.get("/admin/unknown-intents")
-async def get_unknown_intents():
-    ideas = []
-    async for idea in unknown_intents_collection.find().sort("created_at", -1):
-        idea["_id"] = str(idea["_id"])
-        ideas.append(idea)
-    return {"ideas": ideas} 
+async def get_unknown_intents(request: Request):
+    version = await get_version(UNKNOWN_INTENTS_VERSION)
+    if version.matches(request):
+        return version.not_modified()
+    ideas = await unknown_intents_collection.find().sort("created_at", -1).to_list(length=None)
+    return version.attach(ORJSONResponse({"ideas": ideas}))
 
 @app.post("/admin/unknown-intents/{idea_id}/upvote")
 async def upvote_idea(idea_id: str):
@@ -821,6 +1142,7 @@ async def upvote_idea(idea_id: str):
         {"_id": ObjectId(idea_id)},
         {"$inc": {"upvotes": 1}}
     )
+    await bump_version(UNKNOWN_INTENTS_VERSION)
     return {"success": result.modified_count == 1}
 
 @app.post("/admin/unknown-intents/{idea_id}/subscribe")
@@ -832,6 +1154,7 @@ async def subscribe_idea(idea_id: str, data: dict = Body(...)):
         {"_id": ObjectId(idea_id)},
         {"$addToSet": {"subscribers": email}}
     )
+    await bump_version(UNKNOWN_INTENTS_VERSION)
     return {"success": result.modified_count == 1}
 
 @app.post("/admin/unknown-intents/{idea_id}/status")
@@ -843,11 +1166,13 @@ async def update_idea_status(idea_id: str, data: dict = Body(...)):
         {"_id": ObjectId(idea_id)},
         {"$set": {"status": status_val}}
     )
+    await bump_version(UNKNOWN_INTENTS_VERSION)
     return {"success": result.modified_count == 1} 
 
 @app.delete("/admin/unknown-intents/{idea_id}")
 async def delete_unknown_intent(idea_id: str):
     result = await unknown_intents_collection.delete_one({"_id": ObjectId(idea_id)})
+    await bump_version(UNKNOWN_INTENTS_VERSION)
     return {"success": result.deleted_count == 1}
 
 class ScaffoldRequest(BaseModel):
@@ -871,11 +1196,8 @@ async def generate_scaffold_endpoint(req: ScaffoldRequest, user: Optional[str] =
 
 @app.get("/scaffold-history/{idea}")
 async def get_scaffold_history(idea: str):
-    history = []
-    async for entry in scaffold_history_collection.find({"idea": idea}).sort("created_at", -1):
-        entry["_id"] = str(entry["_id"])
-        history.append(entry)
-    return {"history": history} 
+    history = await scaffold_history_collection.find({"idea": idea}).sort("created_at", -1).to_list(length=None)
+    return ORJSONResponse({"history": history})
 
 @app.patch("/scaffold-history/{scaffold_id}/approve")
 async def approve_scaffold(scaffold_id: str, data: dict = Body(...)):
@@ -890,149 +1212,8 @@ async def approve_scaffold(scaffold_id: str, data: dict = Body(...)):
             "approved_by": approved_by
         }}
     )
-    return {"success": result.modified_count == 1} 
-
-# Import voice cloning
-from voice_cloning import voice_cloning_manager
-
-# Voice Cloning Endpoints
-@app.post("/voice-cloning/upload-sample")
-async def upload_voice_sample(
-    file: UploadFile = File(...),
-    user_id: str = Form(...)
-):
-    """Upload voice sample for training"""
-    try:
-        # Read audio file
-        audio_data = await file.read()
-        
-        # Save voice sample
-        result = await voice_cloning_manager.save_voice_sample(
-            user_id=user_id,
-            audio_data=audio_data,
-            filename=file.filename
-        )
-        
-        if result["success"]:
-            return {
-                "success": True,
-                "message": "Voice sample uploaded successfully",
-                "audio_path": result["audio_path"]
-            }
-        else:
-            return JSONResponse(
-                status_code=400,
-                content={"success": False, "error": result["error"]}
-            )
-            
-    except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)}
-        )
-
-@app.post("/voice-cloning/train")
-async def train_voice_model(
-    user_id: str = Form(...),
-    audio_path: str = Form(...)
-):
-    """Train voice model for user"""
-    try:
-        result = await voice_cloning_manager.train_voice_model(
-            user_id=user_id,
-            audio_path=audio_path
-        )
-        
-        if result["success"]:
-            return {
-                "success": True,
-                "message": "Voice training started",
-                "training_id": result["training_id"]
-            }
-        else:
-            return JSONResponse(
-                status_code=400,
-                content={"success": False, "error": result["error"]}
-            )
-            
-    except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)}
-        )
-
-@app.get("/voice-cloning/training-status/{training_id}")
-async def get_training_status(training_id: str):
-    """Get voice training status"""
-    try:
-        status = await voice_cloning_manager.get_training_status(training_id)
-        return {"success": True, "status": status}
-    except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)}
-        )
-
-@app.post("/voice-cloning/synthesize")
-async def synthesize_speech(
-    user_id: str = Form(...),
-    text: str = Form(...),
-    language: str = Form(default="en")
-):
-    """Synthesize speech using trained voice"""
-    try:
-        result = await voice_cloning_manager.synthesize_speech(
-            user_id=user_id,
-            text=text,
-            language=language
-        )
-        
-        if result["success"]:
-            # Return audio file
-            audio_path = Path(result["audio_path"])
-            if audio_path.exists():
-                return FileResponse(
-                    path=str(audio_path),
-                    media_type="audio/wav",
-                    filename=result["filename"]
-                )
-            else:
-                return JSONResponse(
-                    status_code=404,
-                    content={"success": False, "error": "Generated audio not found"}
-                )
-        else:
-            return JSONResponse(
-                status_code=400,
-                content={"success": False, "error": result["error"]}
-            )
-            
-    except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)}
-        )
-
-@app.get("/voice-cloning/user-models/{user_id}")
-async def get_user_voice_models(user_id: str):
-    """Get all voice models for a user"""
-    try:
-        result = await voice_cloning_manager.get_user_voice_models(user_id)
-        return {"success": True, "voice_models": result.get("voice_models", [])}
-    except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)}
-        )
+    return {"success": result.modified_count == 1}
 
-@app.delete("/voice-cloning/user-models/{user_id}")
-async def delete_voice_model(user_id: str):
-    """Delete user's voice model"""
-    try:
-        result = await voice_cloning_manager.delete_voice_model(user_id)
-        return {"success": True, "message": result.get("message", "Voice model deleted")}
-    except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)}
-        ) 
\ No newline at end of file
+if VOICE_CLONING_ENABLED:
+    from backend.voice_routes import router as voice_router
+    app.include_router(voice_router)
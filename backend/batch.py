@@ -0,0 +1,201 @@
+"""
+Batch generation of micro-lessons and recommendations
+
+A batch takes many topics (or skill gaps) in one request, drops duplicates,
+and generates them in the background: completions fan out under their own
+semaphore (nested inside the global LLM limiter, so a large batch never
+takes every slot from interactive traffic) and results are written with
+insert_many in groups. Progress lives in the batch_jobs collection and can
+be polled or followed as server-sent events. Lessons show up in GET /lessons
+and recommendations in GET /recommendations as each group is written.
+"""
+
+import os
+import re
+import uuid
+import asyncio
+from datetime import datetime
+from typing import List, Dict, Any, AsyncIterator
+
+from backend.db import batch_jobs_collection, lessons_collection, recommendations_collection
+from backend.llm import ask_openai_async
+from backend.prompts import MICRO_LESSON_TOPIC_PROMPT, RECOMMENDATION_PROMPT
+from backend.rollups import record_activity, LESSONS
+from backend.versioning import version_key, bump_version
+
+MICRO_LESSONS = "micro_lessons"
+RECOMMENDATIONS = "recommendations"
+
+MAX_BATCH_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+# Batch completions in flight at once, out of the LLM_MAX_CONCURRENCY total
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+# Results are written (and progress reported) in groups of this size
+BATCH_WRITE_SIZE = int(os.getenv("BATCH_WRITE_SIZE", "50"))
+BATCH_EVENTS_INTERVAL = float(os.getenv("BATCH_EVENTS_INTERVAL", "0.5"))
+MAX_REPORTED_ERRORS = 20
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+batch_limiter = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def dedupe_items(items: List[str]) -> List[str]:
+    """Drop blanks and case/whitespace duplicates, keeping the first spelling"""
+    seen = set()
+    unique = []
+    for item in items:
+        text = re.sub(r"\s+", " ", item or "").strip()
+        key = text.casefold()
+        if not text or key in seen:
+            continue
+        seen.add(key)
+        unique.append(text)
+    return unique
+
+
+def _prompt(kind: str, item: str) -> str:
+    if kind == MICRO_LESSONS:
+        return MICRO_LESSON_TOPIC_PROMPT.format(topic=item)
+    return RECOMMENDATION_PROMPT.replace("{skill_gap}", item)
+
+
+def _document(kind: str, item: str, text: str, user: Dict[str, Any], batch_id: str, now: datetime) -> Dict[str, Any]:
+    """Shaped like the documents POST /micro-lesson writes, plus the batch id"""
+    if kind == MICRO_LESSONS:
+        fields = {"topic": item, "lesson": text}
+    else:
+        fields = {"skill_gap": item, "recommendation": text}
+    return {
+        **fields,
+        "user_id": user["uid"],
+        "user_email": user.get("email", ""),
+        "batch_id": batch_id,
+        "created_at": now
+    }
+
+
+def _public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "batch_id": job["_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "total": job["total"],
+        "completed": job.get("completed", 0),
+        "failed": job.get("failed", 0),
+        "duplicates": job.get("duplicates", 0),
+        "errors": job.get("errors", []),
+        "created_at": job["created_at"].isoformat() if job.get("created_at") else None,
+        "updated_at": job["updated_at"].isoformat() if job.get("updated_at") else None,
+    }
+
+
+async def ensure_batch_indexes():
+    await batch_jobs_collection.create_index([("user_id", 1), ("created_at", -1)])
+    await recommendations_collection.create_index([("user_id", 1), ("created_at", -1)])
+
+
+async def create_batch_job(kind: str, items: List[str], user: Dict[str, Any]) -> Dict[str, Any]:
+    """Record a queued batch; the caller schedules run_batch_job with the returned items"""
+    unique = dedupe_items(items)
+    if len(unique) > MAX_BATCH_ITEMS:
+        raise BatchTooLarge(f"A batch may contain at most {MAX_BATCH_ITEMS} distinct items")
+    now = datetime.utcnow()
+    job = {
+        "_id": str(uuid.uuid4()),
+        "kind": kind,
+        "user_id": user["uid"],
+        "status": "queued" if unique else "completed",
+        "total": len(unique),
+        "completed": 0,
+        "failed": 0,
+        "duplicates": len(items) - len(unique),
+        "errors": [],
+        "created_at": now,
+        "updated_at": now
+    }
+    await batch_jobs_collection.insert_one(job)
+    return {"job": _public_job(job), "items": unique}
+
+
+async def _generate(kind: str, item: str):
+    async with batch_limiter:
+        text = await ask_openai_async(_prompt(kind, item), template="micro_lesson" if kind == MICRO_LESSONS else "recommendation")
+    if text.startswith("[MOCKED RESPONSE - Error"):
+        return item, None
+    return item, text
+
+
+async def _flush(kind: str, batch_id: str, documents: List[Dict[str, Any]], errors: List[str], user: Dict[str, Any]):
+    collection = lessons_collection if kind == MICRO_LESSONS else recommendations_collection
+    if documents:
+        await collection.insert_many(documents, ordered=False)
+        # Bump after every group so clients see results while the batch is still running
+        if kind == MICRO_LESSONS:
+            for document in documents:
+                await record_activity(user["uid"], LESSONS, topic=document["topic"], when=document["created_at"])
+            await bump_version(version_key(user["uid"], "lessons"))
+        else:
+            await bump_version(version_key(user["uid"], "recommendations"))
+    update = {
+        "$inc": {"completed": len(documents), "failed": len(errors)},
+        "$set": {"updated_at": datetime.utcnow()}
+    }
+    if errors:
+        update["$push"] = {"errors": {"$each": errors, "$slice": MAX_REPORTED_ERRORS}}
+    await batch_jobs_collection.update_one({"_id": batch_id}, update)
+
+
+async def run_batch_job(batch_id: str, kind: str, items: List[str], user: Dict[str, Any]):
+    """Generate every item and store the results; run as a background task"""
+    await batch_jobs_collection.update_one(
+        {"_id": batch_id},
+        {"$set": {"status": "running", "updated_at": datetime.utcnow()}}
+    )
+    documents, errors = [], []
+    try:
+        for next_result in asyncio.as_completed([_generate(kind, item) for item in items]):
+            item, text = await next_result
+            if text is None:
+                errors.append(f"Generation failed for: {item}")
+            else:
+                documents.append(_document(kind, item, text, user, batch_id, datetime.utcnow()))
+            if len(documents) + len(errors) >= BATCH_WRITE_SIZE:
+                await _flush(kind, batch_id, documents, errors, user)
+                documents, errors = [], []
+        await _flush(kind, batch_id, documents, errors, user)
+        status, error = "completed", None
+    except Exception as e:
+        print(f"Batch {batch_id} failed: {e}")
+        status, error = "failed", str(e)
+
+    update = {"status": status, "updated_at": datetime.utcnow()}
+    if error:
+        update["error"] = error
+    await batch_jobs_collection.update_one({"_id": batch_id}, {"$set": update})
+
+
+async def get_batch_job(batch_id: str, user_id: str):
+    """The job as the API reports it, or None if it is missing or someone else's"""
+    job = await batch_jobs_collection.find_one({"_id": batch_id, "user_id": user_id})
+    return _public_job(job) if job else None
+
+
+async def watch_batch_job(batch_id: str, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the job each time its progress changes until it finishes"""
+    last_seen = None
+    while True:
+        job = await get_batch_job(batch_id, user_id)
+        if job is None:
+            yield {"batch_id": batch_id, "status": "not_found"}
+            return
+        state = (job["status"], job["completed"], job["failed"])
+        if state != last_seen:
+            last_seen = state
+            yield job
+        if job["status"] in TERMINAL_STATUSES:
+            return
+        await asyncio.sleep(BATCH_EVENTS_INTERVAL)
@@ -0,0 +1,11 @@
+"""
+Benchmarks for the FastAPI backend
+
+Everything runs in one process without external services: backend.app and
+backend.fake_llm_server are served by uvicorn on local ports from background
+threads, and MongoDB is replaced by mongomock-motor (MONGO_DETAILS=mongomock://).
+
+    python -m backend.benchmarks.load            # mixed traffic, checked against baselines.json
+    python -m backend.benchmarks.serialization   # JSON encoding and compression CPU per MB
+    python -m backend.benchmarks.fanout          # multi-collection reads with simulated round trips
+"""
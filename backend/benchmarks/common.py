@@ -0,0 +1,165 @@
+"""
+Shared setup for the benchmarks: local servers for backend.app and the fake
+LLM, summary statistics and baseline checks
+"""
+
+import os
+import json
+import math
+import time
+import logging
+import asyncio
+import threading
+from pathlib import Path
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+
+def configure_environment():
+    """Must run before backend.app is imported"""
+    os.environ.setdefault("MONGO_DETAILS", "mongomock://bench")
+    os.environ.setdefault("VOICE_CLONING_ENABLED", "0")
+    os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+    # Pool refills would add LLM traffic the scenarios don't account for
+    os.environ.setdefault("POOL_REFILLER_ENABLED", "0")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of unsorted samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class ServerThread:
+    """Serve an ASGI app with uvicorn on a free local port from a background thread.
+
+    The server gets its own event loop, so the load generator's loop never
+    shares time with the app and a blocked app loop shows up as latency.
+    """
+
+    def __init__(self, app, lifespan: str = "on"):
+        import socket
+        import uvicorn
+
+        # An explicit IPPROTO_TCP lets asyncio enable TCP_NODELAY on accepted connections;
+        # without it every response waits ~40ms for a delayed ACK
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        self.socket.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.socket.getsockname()[1]}"
+        self.server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan=lifespan, access_log=False))
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="bench-server", daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.serve(sockets=[self.socket]))
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("Benchmark server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def start_fake_llm(ttft_ms: float, token_delay_ms: float, completion_tokens: int, seed: int, llm_url: Optional[str] = None):
+    """Point backend.llm at a fake LLM server, started locally unless llm_url is given.
+
+    Returns the started server (or None) so the caller can stop it.
+    """
+    from backend.llm import set_llm_backend, get_openai_client
+    if llm_url:
+        set_llm_backend("fake", base_url=llm_url)
+        return None
+    from backend.fake_llm_server import create_app, FakeLLMSettings
+    settings = FakeLLMSettings(
+        seed=seed, ttft_ms=ttft_ms, token_delay_ms=token_delay_ms,
+        rate_limit_rate=0, completion_tokens=completion_tokens
+    )
+    server = ServerThread(create_app(settings), lifespan="off").start()
+    set_llm_backend("fake", base_url=server.url + "/v1")
+    # Import openai now rather than inside the first measured request
+    get_openai_client()
+    return server
+
+
+@asynccontextmanager
+async def bench_app(users: Dict[str, Dict[str, str]]):
+    """backend.app served on a local port, with auth resolved from X-Bench-User.
+
+    Yields (client, server); server.loop is the app's event loop.
+    """
+    import httpx
+    from fastapi import Request
+    from backend.app import app, verify_token
+
+    async def bench_user(request: Request):
+        uid = request.headers.get("X-Bench-User", "bench-user")
+        return users.get(uid, {"uid": uid, "email": f"{uid}@example.com"})
+
+    app.dependency_overrides[verify_token] = bench_user
+    server = ServerThread(app).start()
+    try:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=server.url, timeout=120, limits=limits) as client:
+            yield client, server
+    finally:
+        server.stop()
+        app.dependency_overrides.pop(verify_token, None)
+
+
+def load_baselines() -> Dict[str, Any]:
+    if not BASELINES_PATH.exists():
+        return {}
+    return json.loads(BASELINES_PATH.read_text())
+
+
+def save_baselines(name: str, results: Dict[str, Any]):
+    baselines = load_baselines()
+    baselines[name] = {
+        route: {key: round(value, 2) for key, value in stats.items()}
+        for route, stats in results.items()
+    }
+    BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+
+
+def check_regressions(
+    name: str,
+    results: Dict[str, Dict[str, float]],
+    threshold: float,
+    lower_is_better=("p50_ms", "p95_ms", "p99_ms"),
+    higher_is_better=("rps",)
+) -> List[str]:
+    """Compare per-route results to the stored baseline; returns regression messages"""
+    baseline = load_baselines().get(name, {})
+    problems = []
+    for route, stats in results.items():
+        base = baseline.get(route)
+        if not base:
+            continue
+        for key in lower_is_better:
+            if key in base and base[key] > 0 and stats.get(key, 0) > base[key] * (1 + threshold):
+                problems.append(f"{route}: {key} {stats[key]:.1f} > baseline {base[key]:.1f} (+{threshold:.0%})")
+        for key in higher_is_better:
+            if key in base and base[key] > 0 and stats.get(key, 0) < base[key] * (1 - threshold):
+                problems.append(f"{route}: {key} {stats[key]:.1f} < baseline {base[key]:.1f} (-{threshold:.0%})")
+    return problems
+
+
+def print_table(results: Dict[str, Dict[str, float]], columns: List[str]):
+    width = max([len("route")] + [len(route) for route in results])
+    widths = [max(12, len(column) + 2) for column in columns]
+    print("route".ljust(width) + "".join(column.rjust(w) for column, w in zip(columns, widths)))
+    for route, stats in results.items():
+        print(route.ljust(width) + "".join(f"{stats.get(column, 0):{w}.1f}" for column, w in zip(columns, widths)))
@@ -0,0 +1,170 @@
+"""
+Latency of multi-collection read routes
+
+mongomock answers instantly, so each collection a route reads is wrapped to
+add a fixed round-trip delay, different per collection. A route that reads
+concurrently should take about as long as its slowest query; one that reads
+sequentially takes their sum. Both figures are printed next to the measured
+latency.
+
+    python -m backend.benchmarks.fanout
+    python -m backend.benchmarks.fanout --update-baselines
+"""
+
+import time
+import asyncio
+import argparse
+from typing import Dict, List
+
+from backend.benchmarks.common import (
+    configure_environment, percentile, bench_app, save_baselines, check_regressions, print_table
+)
+
+BASELINE_NAME = "fanout"
+
+# Simulated round trip per collection, in ms
+DELAYS_MS = {
+    "teams_collection": 20,
+    "team_members_collection": 45,
+    "team_analytics_collection": 35,
+    "certifications_collection": 25,
+    "study_plans_collection": 40,
+    "certification_simulations_collection": 50,
+}
+
+# Collections each route reads, and whether they depend on each other
+ROUTES = {
+    "GET /certifications/user-recommendations": {
+        "path": "/certifications/user-recommendations",
+        "reads": ["certifications_collection", "study_plans_collection", "certification_simulations_collection"],
+        "dependent": False,
+    },
+    "GET /teams/{team_id}": {
+        "path": "/teams/{team_id}",
+        "reads": ["teams_collection", "team_members_collection"],
+        "dependent": False,
+    },
+    "GET /teams/{team_id}/analytics": {
+        "path": "/teams/{team_id}/analytics",
+        "reads": ["teams_collection", "team_analytics_collection"],
+        "dependent": False,
+    },
+    # Team ids are needed for the member counts, so these two stay sequential
+    "GET /teams": {
+        "path": "/teams",
+        "reads": ["teams_collection", "team_members_collection"],
+        "dependent": True,
+    },
+}
+
+
+class DelayedCursor:
+    def __init__(self, cursor, delay: float):
+        self._cursor = cursor
+        self._delay = delay
+
+    def __getattr__(self, name):
+        method = getattr(self._cursor, name)
+
+        def chain(*args, **kwargs):
+            self._cursor = method(*args, **kwargs)
+            return self
+        return chain
+
+    async def to_list(self, *args, **kwargs):
+        await asyncio.sleep(self._delay)
+        return await self._cursor.to_list(*args, **kwargs)
+
+
+class DelayedCollection:
+    """A collection whose reads each take an extra fixed delay"""
+
+    def __init__(self, collection, delay: float):
+        self._collection = collection
+        self._delay = delay
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def find(self, *args, **kwargs):
+        return DelayedCursor(self._collection.find(*args, **kwargs), self._delay)
+
+    def aggregate(self, *args, **kwargs):
+        return DelayedCursor(self._collection.aggregate(*args, **kwargs), self._delay)
+
+    async def find_one(self, *args, **kwargs):
+        await asyncio.sleep(self._delay)
+        return await self._collection.find_one(*args, **kwargs)
+
+    async def count_documents(self, *args, **kwargs):
+        await asyncio.sleep(self._delay)
+        return await self._collection.count_documents(*args, **kwargs)
+
+
+def install_delays(delays_ms: Dict[str, float]):
+    import backend.app as app_module
+    for name, delay in delays_ms.items():
+        setattr(app_module, name, DelayedCollection(getattr(app_module, name), delay / 1000))
+
+
+async def run_fanout(requests: int, members: int) -> Dict[str, Dict[str, float]]:
+    async with bench_app({}) as (client, _server):
+        response = await client.post("/teams", json={
+            "name": "Fan-out team",
+            "description": "Benchmark team",
+            "members": [
+                {"name": f"Member {i}", "role": "Engineer", "email": f"m{i}@example.com", "skills": ["python"]}
+                for i in range(members)
+            ]
+        })
+        response.raise_for_status()
+        team_id = response.json()["team_id"]
+        install_delays(DELAYS_MS)
+
+        results = {}
+        for route, spec in ROUTES.items():
+            path = spec["path"].format(team_id=team_id)
+            await client.get(path)  # warm up
+            samples: List[float] = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = await client.get(path)
+                samples.append((time.perf_counter() - start) * 1000)
+                response.raise_for_status()
+            delays = [DELAYS_MS[name] for name in spec["reads"]]
+            results[route] = {
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "sum_of_queries_ms": sum(delays),
+                "slowest_query_ms": max(delays),
+                "expected_ms": sum(delays) if spec["dependent"] else max(delays),
+            }
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="sequential requests per route")
+    parser.add_argument("--members", type=int, default=50, help="members in the benchmark team")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed regression, as a fraction")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    configure_environment()
+    results = asyncio.run(run_fanout(args.requests, args.members))
+    print_table(results, ["p50_ms", "p95_ms", "sum_of_queries_ms", "slowest_query_ms", "expected_ms"])
+
+    if args.update_baselines:
+        save_baselines(BASELINE_NAME, results)
+        print("Baselines updated")
+        return
+    problems = check_regressions(BASELINE_NAME, results, args.threshold, lower_is_better=("p50_ms", "p95_ms"), higher_is_better=())
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Mixed-traffic load test
+
+Concurrent virtual users replay a weighted mix of lesson CRUD, coach chats,
+simulation steps, team analytics, dashboard reads and LLM streams for a fixed
+duration. Reports per route: requests per second, p50/p95/p99 latency and
+the worst event loop lag sampled while that route had requests in flight.
+
+    python -m backend.benchmarks.load                    # compare with baselines.json
+    python -m backend.benchmarks.load --update-baselines # record new baselines
+
+Baselines are machine specific; record them on the machine that checks them.
+"""
+
+import time
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Any
+
+from backend.benchmarks.common import (
+    configure_environment, percentile, start_fake_llm, bench_app,
+    save_baselines, check_regressions, print_table
+)
+
+BASELINE_NAME = "load"
+
+TOPICS = ["Giving feedback", "Running standups", "Conflict resolution", "Time management", "Negotiation"]
+SKILLS = ["python", "sql", "communication", "design", "testing", "leadership", "cloud"]
+
+
+class VirtualUser:
+    """One simulated learner with the ids of what it has created so far"""
+
+    def __init__(self, uid: str, rng: random.Random):
+        self.uid = uid
+        self.rng = rng
+        self.lesson_ids: List[str] = []
+        self.team_ids: List[str] = []
+
+    @property
+    def headers(self):
+        return {"X-Bench-User": self.uid}
+
+
+async def list_lessons(client, user):
+    response = await client.get("/lessons", headers=user.headers)
+    user.lesson_ids = [lesson["_id"] for lesson in response.json().get("lessons", [])]
+    return response
+
+
+async def save_lesson(client, user):
+    topic = user.rng.choice(TOPICS)
+    return await client.post("/micro-lesson", headers=user.headers, json={
+        "topic": topic, "lesson": f"Saved notes about {topic.lower()}. " * 20
+    })
+
+
+async def generate_lesson(client, user):
+    return await client.post("/micro-lesson", headers=user.headers, json={"topic": user.rng.choice(TOPICS)})
+
+
+async def update_lesson(client, user):
+    if not user.lesson_ids:
+        return await list_lessons(client, user)
+    lesson_id = user.rng.choice(user.lesson_ids)
+    return await client.put(f"/lessons/{lesson_id}", headers=user.headers, json={
+        "topic": user.rng.choice(TOPICS), "lesson": "Edited lesson text."
+    })
+
+
+async def delete_lesson(client, user):
+    if not user.lesson_ids:
+        return await list_lessons(client, user)
+    lesson_id = user.lesson_ids.pop(user.rng.randrange(len(user.lesson_ids)))
+    return await client.delete(f"/lessons/{lesson_id}", headers=user.headers)
+
+
+async def career_coach(client, user):
+    history = [
+        {"role": "system", "content": "You are a career coach."},
+        {"role": "user", "content": f"How do I grow my {user.rng.choice(SKILLS)} skills?"}
+    ]
+    return await client.post("/career-coach", headers=user.headers, json={"history": history})
+
+
+async def simulation_step(client, user):
+    return await client.post("/simulation-step", headers=user.headers, json={
+        "history": [{"speaker": "Customer", "text": "My order is late again.", "user_choice": "I'm sorry to hear that."}],
+        "user_input": "Let me check the delivery status for you."
+    })
+
+
+async def team_analytics(client, user):
+    team_id = user.rng.choice(user.team_ids)
+    return await client.post(f"/teams/{team_id}/analytics", headers=user.headers, json={
+        "team_id": team_id, "metrics": ["collaboration", "skills"]
+    })
+
+
+async def list_teams(client, user):
+    return await client.get("/teams", headers=user.headers)
+
+
+async def dashboard(client, user):
+    return await client.get("/user/dashboard", headers=user.headers)
+
+
+async def llm_stream(client, user):
+    return await client.post("/llm-stream", headers=user.headers, json={
+        "prompt": f"Explain {user.rng.choice(TOPICS).lower()} in three sentences."
+    })
+
+
+# (route label, operation, weight)
+SCENARIO = [
+    ("GET /lessons", list_lessons, 20),
+    ("POST /micro-lesson (save)", save_lesson, 10),
+    ("POST /micro-lesson (generate)", generate_lesson, 6),
+    ("PUT /lessons/{lesson_id}", update_lesson, 5),
+    ("DELETE /lessons/{lesson_id}", delete_lesson, 4),
+    ("POST /career-coach", career_coach, 10),
+    ("POST /simulation-step", simulation_step, 10),
+    ("POST /teams/{team_id}/analytics", team_analytics, 5),
+    ("GET /teams", list_teams, 8),
+    ("GET /user/dashboard", dashboard, 12),
+    ("POST /llm-stream", llm_stream, 5),
+]
+
+
+async def seed_user(client, user: VirtualUser, lessons: int = 10, members: int = 6):
+    for _ in range(lessons):
+        await save_lesson(client, user)
+    await list_lessons(client, user)
+    response = await client.post("/teams", headers=user.headers, json={
+        "name": f"{user.uid} team",
+        "description": "Benchmark team",
+        "members": [
+            {
+                "name": f"Member {i}",
+                "role": user.rng.choice(["Engineer", "Designer", "Analyst"]),
+                "email": f"member{i}.{user.uid}@example.com",
+                "skills": user.rng.sample(SKILLS, 3),
+                "performance_score": round(user.rng.uniform(2, 5), 1)
+            }
+            for i in range(members)
+        ]
+    })
+    user.team_ids.append(response.json()["team_id"])
+
+
+async def run_load(duration: float, concurrency: int, seed: int, warmup: float) -> Dict[str, Any]:
+    users = [VirtualUser(f"bench-{i}", random.Random(seed + i)) for i in range(concurrency)]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    lag_by_route: Dict[str, List[float]] = defaultdict(list)
+    in_flight: Dict[str, int] = defaultdict(int)
+    labels = [label for label, _, _ in SCENARIO]
+    weights = [weight for _, _, weight in SCENARIO]
+    operations = {label: operation for label, operation, _ in SCENARIO}
+
+    async with bench_app({user.uid: {"uid": user.uid} for user in users}) as (client, server):
+        await asyncio.gather(*[seed_user(client, user) for user in users])
+
+        recording = False
+        stop_at = time.perf_counter() + warmup + duration
+
+        async def sample_loop_lag(interval=0.005):
+            """Runs on the app's event loop"""
+            loop = asyncio.get_running_loop()
+            while time.perf_counter() < stop_at:
+                measuring = recording
+                start = loop.time()
+                await asyncio.sleep(interval)
+                lag = max(0.0, loop.time() - start - interval)
+                if measuring:
+                    lag_by_route["overall"].append(lag)
+                    for label, count in list(in_flight.items()):
+                        if count:
+                            lag_by_route[label].append(lag)
+
+        async def virtual_user(user: VirtualUser):
+            while time.perf_counter() < stop_at:
+                label = user.rng.choices(labels, weights)[0]
+                in_flight[label] += 1
+                start = time.perf_counter()
+                try:
+                    response = await operations[label](client, user)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                finally:
+                    in_flight[label] -= 1
+                if recording:
+                    latencies[label].append(time.perf_counter() - start)
+                    if failed:
+                        errors[label] += 1
+
+        async def start_recording():
+            nonlocal recording
+            await asyncio.sleep(warmup)
+            recording = True
+
+        lag_sampler = asyncio.run_coroutine_threadsafe(sample_loop_lag(), server.loop)
+        await asyncio.gather(start_recording(), *[virtual_user(user) for user in users])
+        await asyncio.wrap_future(lag_sampler)
+
+    results = {}
+    for label in labels:
+        samples = latencies.get(label, [])
+        if not samples:
+            continue
+        results[label] = {
+            "requests": len(samples),
+            "errors": errors.get(label, 0),
+            "rps": len(samples) / duration,
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p95_ms": percentile(samples, 95) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+            "max_loop_lag_ms": max(lag_by_route.get(label, [0])) * 1000,
+        }
+    total = sum(len(samples) for samples in latencies.values())
+    overall_lag = lag_by_route.get("overall", [0])
+    results["overall"] = {
+        "requests": total,
+        "errors": sum(errors.values()),
+        "rps": total / duration,
+        "p50_ms": percentile([s for samples in latencies.values() for s in samples], 50) * 1000,
+        "p95_ms": percentile([s for samples in latencies.values() for s in samples], 95) * 1000,
+        "p99_ms": percentile([s for samples in latencies.values() for s in samples], 99) * 1000,
+        "max_loop_lag_ms": max(overall_lag) * 1000,
+        "p99_loop_lag_ms": percentile(overall_lag, 99) * 1000,
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=15, help="seconds of measured traffic")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds of unmeasured traffic first")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-url", help="use a running fake LLM server instead of the in-process one")
+    parser.add_argument("--llm-ttft-ms", type=float, default=60)
+    parser.add_argument("--llm-token-delay-ms", type=float, default=0.5)
+    parser.add_argument("--llm-completion-tokens", type=int, default=80)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed regression, as a fraction")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    configure_environment()
+    llm_server = start_fake_llm(
+        args.llm_ttft_ms, args.llm_token_delay_ms, args.llm_completion_tokens, args.seed, args.llm_url
+    )
+    try:
+        results = asyncio.run(run_load(args.duration, args.concurrency, args.seed, args.warmup))
+    finally:
+        if llm_server:
+            llm_server.stop()
+
+    print_table(results, ["requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_loop_lag_ms"])
+    if args.update_baselines:
+        save_baselines(BASELINE_NAME, results)
+        print("Baselines updated")
+        return
+    problems = check_regressions(BASELINE_NAME, results, args.threshold)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
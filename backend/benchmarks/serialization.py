@@ -0,0 +1,115 @@
+"""
+Serialisation CPU per MB of response
+
+Compares how list routes used to build their JSON (stringify every _id,
+jsonable_encoder, stdlib json via JSONResponse) with ORJSONResponse on the
+raw Mongo documents, and the cost and ratio of compressing the result.
+
+    python -m backend.benchmarks.serialization
+    python -m backend.benchmarks.serialization --update-baselines
+"""
+
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Callable
+
+from bson import ObjectId
+
+from backend.benchmarks.common import save_baselines, check_regressions, print_table
+from backend.responses import ORJSONResponse, compress, brotli
+
+BASELINE_NAME = "serialization"
+
+WORDS = "feedback team customer learning practice goal skill review plan coaching listen improve".split()
+
+
+def make_lessons(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Documents shaped like lessons_collection entries, with multi-KB LLM text"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "topic": " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+            "lesson": " ".join(rng.choice(WORDS) for _ in range(rng.randint(300, 700))),
+            "user_id": "bench-user",
+            "user_email": "bench@example.com",
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def render_before(docs: List[Dict[str, Any]]) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    lessons = []
+    for doc in docs:
+        doc = dict(doc)
+        doc["_id"] = str(doc["_id"])
+        lessons.append(doc)
+    return JSONResponse(jsonable_encoder({"lessons": lessons})).body
+
+
+def render_after(docs: List[Dict[str, Any]]) -> bytes:
+    return ORJSONResponse({"lessons": docs}).body
+
+
+def measure(fn: Callable[[], bytes], megabytes: float, repeat: int) -> Dict[str, float]:
+    fn()  # warm up
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.process_time() - start
+    return {"cpu_ms_per_mb": elapsed * 1000 / (repeat * megabytes)}
+
+
+def run(count: int, repeat: int, seed: int) -> Dict[str, Dict[str, float]]:
+    docs = make_lessons(count, seed)
+    body = render_after(docs)
+    megabytes = len(body) / (1024 * 1024)
+    results = {
+        "jsonable_encoder+json": measure(lambda: render_before(docs), megabytes, repeat),
+        "orjson": measure(lambda: render_after(docs), megabytes, repeat),
+    }
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    for encoding in encodings:
+        stats = measure(lambda: compress(body, encoding), megabytes, repeat)
+        stats["ratio"] = len(body) / len(compress(body, encoding))
+        results[f"compress {encoding}"] = stats
+    for stats in results.values():
+        stats["payload_mb"] = megabytes
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed regression, as a fraction")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.documents, args.repeat, args.seed)
+    print_table(results, ["payload_mb", "cpu_ms_per_mb", "ratio"])
+    before = results["jsonable_encoder+json"]["cpu_ms_per_mb"]
+    after = results["orjson"]["cpu_ms_per_mb"]
+    print(f"orjson speed-up: {before / after:.1f}x")
+
+    if args.update_baselines:
+        save_baselines(BASELINE_NAME, results)
+        print("Baselines updated")
+        return
+    problems = check_regressions(BASELINE_NAME, results, args.threshold, lower_is_better=("cpu_ms_per_mb",), higher_is_better=())
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Certification catalog and candidate scoring
+
+The catalog (backend/data/certification_catalog.json) is versioned with the
+code and loaded once into an inverted index from skill to certifications.
+Recommending is then a handful of set operations over the certifications
+that share a skill with the profile, or are named by its role and goals,
+instead of a GPT-4 call; the LLM is only asked, optionally, to explain the
+top few candidates.
+"""
+
+import re
+import json
+from pathlib import Path
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+CATALOG_PATH = Path(__file__).with_name("data") / "certification_catalog.json"
+
+DEFAULT_CANDIDATES = 5
+# How many of the top candidates the LLM is asked to explain
+EXPLAIN_CANDIDATES = 3
+
+# Score weights: skills the profile already shares with the certification,
+# how well its level fits the profile, and whether role/goals mention it
+SKILL_WEIGHT = 0.6
+LEVEL_WEIGHT = 0.3
+GOAL_WEIGHT = 0.1
+# Level fit by (certification level - profile level); one step up is the natural next goal
+LEVEL_FIT = {0: 1.0, 1: 0.8, -1: 0.4, 2: 0.3, -2: 0.1}
+# Deducted when the certification expects others first and is above the profile's level
+PREREQUISITE_PENALTY = 0.1
+
+
+def _normalise(text: str) -> str:
+    return " ".join(str(text).casefold().replace("-", " ").replace("_", " ").split())
+
+
+class Catalog:
+    def __init__(self, data: Dict[str, Any]):
+        self.version = data["version"]
+        self.levels = data["levels"]
+        self.aliases = {_normalise(alias): _normalise(skill) for alias, skill in data.get("aliases", {}).items()}
+        self.certifications = data["certifications"]
+        self.by_id = {cert["id"]: cert for cert in self.certifications}
+        self.skills: List[Set[str]] = []
+        self.index: Dict[str, List[int]] = {}
+        for position, cert in enumerate(self.certifications):
+            skills = {self.skill_key(skill) for skill in cert["skills"]}
+            self.skills.append(skills)
+            for skill in skills:
+                self.index.setdefault(skill, []).append(position)
+        # Finds catalog skills, aliases and vendors mentioned in free text (role, goals)
+        terms = set(self.index) | set(self.aliases) | {_normalise(cert["vendor"]) for cert in self.certifications}
+        self._mentions = re.compile(
+            r"(?<![\w+#/])(" + "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)) + r")(?![\w+#/])"
+        )
+
+    def skill_key(self, skill: str) -> str:
+        key = _normalise(skill)
+        return self.aliases.get(key, key)
+
+    def level_index(self, level: Optional[str]) -> int:
+        level = _normalise(level or "")
+        return self.levels.index(level) if level in self.levels else 1
+
+    def mentioned(self, text: str) -> Set[str]:
+        return {self.aliases.get(term, term) for term in self._mentions.findall(_normalise(text))}
+
+    def candidates(
+        self,
+        skills: Iterable[str],
+        experience_level: Optional[str] = None,
+        text: str = "",
+        limit: int = DEFAULT_CANDIDATES
+    ) -> List[Dict[str, Any]]:
+        """Ranked certifications for a profile's skills, level and free text"""
+        profile_skills = {self.skill_key(skill) for skill in skills if str(skill).strip()}
+        mentioned = self.mentioned(text) if text else set()
+        level = self.level_index(experience_level)
+
+        positions: Set[int] = set()
+        for skill in profile_skills | mentioned:
+            positions.update(self.index.get(skill, ()))
+        if mentioned:
+            vendors = {position for position, cert in enumerate(self.certifications) if _normalise(cert["vendor"]) in mentioned}
+            positions |= vendors
+
+        scored = []
+        for position in positions:
+            cert = self.certifications[position]
+            cert_skills = self.skills[position]
+            matched = cert_skills & profile_skills
+            step = self.levels.index(cert["level"]) - level
+            goal_hit = bool(cert_skills & mentioned) or _normalise(cert["vendor"]) in mentioned
+            score = (
+                SKILL_WEIGHT * len(matched) / len(cert_skills)
+                + LEVEL_WEIGHT * LEVEL_FIT.get(step, 0.0)
+                + GOAL_WEIGHT * goal_hit
+            )
+            if cert["prerequisites"] and step > 0:
+                score -= PREREQUISITE_PENALTY
+            scored.append((score, cert["name"], position, matched))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self._candidate(position, score, matched) for score, _, position, matched in scored[:limit]]
+
+    def _candidate(self, position: int, score: float, matched: Set[str]) -> Dict[str, Any]:
+        cert = self.certifications[position]
+        return {
+            "id": cert["id"],
+            "name": cert["name"],
+            "vendor": cert["vendor"],
+            "level": cert["level"],
+            "score": round(score, 3),
+            "matched_skills": sorted(matched),
+            "missing_skills": sorted(self.skills[position] - matched),
+            "prerequisites": [self.by_id[prerequisite]["name"] for prerequisite in cert["prerequisites"]],
+        }
+
+
+@lru_cache(maxsize=1)
+def get_catalog() -> Catalog:
+    return Catalog(json.loads(CATALOG_PATH.read_text()))
+
+
+def recommend_certifications(profile: Dict[str, Any], limit: int = DEFAULT_CANDIDATES) -> List[Dict[str, Any]]:
+    """Candidates for a CertificationProfile (role, skills, goals, experience_level)"""
+    text = f"{profile.get('role', '')}. {profile.get('goals', '')}"
+    return get_catalog().candidates(profile.get("skills", []), profile.get("experience_level"), text, limit)
+
+
+def format_candidates(candidates: List[Dict[str, Any]]) -> str:
+    """Plain-text recommendation built from the candidates, used when no LLM explanation is asked for"""
+    lines = []
+    for rank, candidate in enumerate(candidates, start=1):
+        lines.append(f"{rank}. {candidate['name']} ({candidate['vendor']}, {candidate['level']})")
+        if candidate["matched_skills"]:
+            lines.append(f"   Builds on: {', '.join(candidate['matched_skills'])}")
+        if candidate["missing_skills"]:
+            lines.append(f"   Skills to develop: {', '.join(candidate['missing_skills'])}")
+        if candidate["prerequisites"]:
+            lines.append(f"   Recommended first: {', '.join(candidate['prerequisites'])}")
+    return "\n".join(lines)
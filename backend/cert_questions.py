@@ -0,0 +1,92 @@
+"""
+Question pool for certification interview simulations
+
+/certifications/simulate used to wait on a GPT-4 call for every simulation.
+Questions are now generated in the background, per certification, into a
+pool (backend/pools.py) and a simulation samples QUESTIONS_PER_SIMULATION
+of them the user has not been asked before. Only certifications requested
+at least POOL_MIN_DEMAND times get a pool; rarer ones, and users who have
+exhausted a pool that is still growing, fall back to live generation.
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+from backend.llm import ask_openai_async
+from backend.metrics import record_cache
+from backend.json_stream import parse_json, JSONParseError
+from backend.pools import Pool
+from backend.prompts import CERTIFICATION_QUESTION_POOL_PROMPT
+
+QUESTIONS_PER_SIMULATION = 4
+# Questions asked for per generation call
+GENERATION_BATCH_SIZE = 10
+POOL_MIN_DEMAND = int(os.getenv("QUESTION_POOL_MIN_DEMAND", "3"))
+
+QUESTION_FIELDS = ("question", "answer", "follow_up", "tip")
+MAX_FIELD_LENGTH = 2000
+
+
+def parse_questions(text: str) -> List[Dict[str, Any]]:
+    """The JSON array of a generation reply"""
+    try:
+        # Questions are kept in the pool, so a reply cut off by max_tokens is not closed and stored
+        parsed = parse_json(text, template="certification_question_pool", allow_truncated=False)
+    except JSONParseError:
+        return []
+    if isinstance(parsed, dict):
+        parsed = parsed.get("questions", [])
+    return [item for item in parsed if isinstance(item, dict)] if isinstance(parsed, list) else []
+
+
+def validate_question(item: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """The question with its fields trimmed, or None if any is missing, empty or oversized"""
+    question = {}
+    for field in QUESTION_FIELDS:
+        value = item.get(field)
+        if not isinstance(value, str) or not value.strip() or len(value) > MAX_FIELD_LENGTH:
+            return None
+        question[field] = value.strip()
+    return question
+
+
+async def generate_questions(certification: str) -> List[Dict[str, Any]]:
+    prompt = CERTIFICATION_QUESTION_POOL_PROMPT.format(certification_name=certification, count=GENERATION_BATCH_SIZE)
+    result = await ask_openai_async(prompt, max_tokens=2048)
+    if result.startswith("[MOCKED RESPONSE"):
+        return []
+    return parse_questions(result)
+
+
+question_pool = Pool(
+    "certification_questions",
+    generate=generate_questions,
+    validate=validate_question,
+    identity=lambda question: question["question"],
+    low_water=20,
+    high_water=60,
+    max_size=400,
+    refill_concurrency=2,
+    min_demand=POOL_MIN_DEMAND
+)
+
+
+async def sample_questions(certification: str, user_id: str) -> Optional[List[Dict[str, Any]]]:
+    """Questions for one simulation the user has not seen, or None to generate live"""
+    questions = await question_pool.take(certification, user_id, QUESTIONS_PER_SIMULATION)
+    record_cache("certification_questions", hit=questions is not None)
+    return questions
+
+
+def format_simulation(certification: str, questions: List[Dict[str, Any]]) -> str:
+    """Simulation text in the shape the live prompt produces"""
+    lines = [f"Certification interview simulation: {certification}", ""]
+    for number, question in enumerate(questions, start=1):
+        lines += [
+            f"Question {number}: {question['question']}",
+            f"Expected answer: {question['answer']}",
+            f"Follow-up: {question['follow_up']}",
+            f"Tip: {question['tip']}",
+            ""
+        ]
+    return "\n".join(lines).rstrip()
@@ -1,14 +1,33 @@
+import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from backend.metrics import MongoCommandMetrics
+from backend.tracing import MongoCommandSpans
 
-MONGO_DETAILS = "mongodb://localhost:27017"  # Default local URI
+MONGO_DETAILS = os.getenv("MONGO_DETAILS", "mongodb://localhost:27017")  # Default local URI
 
-client = AsyncIOMotorClient(MONGO_DETAILS)
+if MONGO_DETAILS.startswith("mongomock://"):
+    # In-memory stand-in used by the benchmarks (pip install mongomock-motor)
+    from mongomock_motor import AsyncMongoMockClient
+    client = AsyncMongoMockClient()
+else:
+    # Command listeners record per-collection latency for /metrics and a span per command for tracing
+    client = AsyncIOMotorClient(MONGO_DETAILS, event_listeners=[MongoCommandMetrics(), MongoCommandSpans()])
 database = client["ai_learning"]  # Your database name
 users_collection = database.get_collection("users")  # Example collection
 lessons_collection = database.get_collection("lessons")
 career_coach_sessions = database.get_collection("career_coach_sessions")
 skills_forecasts = database.get_collection("skills_forecasts")
 
+# Dashboard rollups (one document per user per day)
+user_daily_rollups_collection = database.get_collection("user_daily_rollups")
+
+# Recommendations from batch runs and batch job progress
+recommendations_collection = database.get_collection("recommendations")
+batch_jobs_collection = database.get_collection("batch_jobs")
+
+# Version stamps for conditional GETs (see backend/versioning.py)
+collection_versions_collection = database.get_collection("collection_versions")
+
 # Team Management Collections
 teams_collection = database.get_collection("teams")
 team_members_collection = database.get_collection("team_members")
@@ -16,8 +35,22 @@ team_analytics_collection = database.get_collection("team_analytics")
 
 # Certification Collections
 certifications_collection = database.get_collection("certifications")
+certification_profiles_collection = database.get_collection("certification_profiles")
 study_plans_collection = database.get_collection("study_plans")
 certification_simulations_collection = database.get_collection("certification_simulations")
 
+# Pre-generated content pools (see backend/pools.py)
+pool_items_collection = database.get_collection("pool_items")
+pool_seen_collection = database.get_collection("pool_seen")
+pool_keys_collection = database.get_collection("pool_keys")
+
 unknown_intents_collection = database.get_collection("unknown_intents")
 scaffold_history_collection = database.get_collection("scaffold_history")
+
+# Video Collections
+transcript_chunk_summaries_collection = database.get_collection("transcript_chunk_summaries")
+videos_collection = database.get_collection("videos")
+video_quizzes_collection = database.get_collection("video_quizzes")
+
+# Voice Cloning Collections
+voice_training_jobs_collection = database.get_collection("voice_training_jobs")
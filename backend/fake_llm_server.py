@@ -0,0 +1,252 @@
+"""
+Deterministic OpenAI-compatible stand-in for benchmarks and offline tests
+
+Serves POST /v1/chat/completions (plain and streaming) with realistic
+timing: a log-normal time to first token, a per-token delay and an optional
+rate of 429 responses. Replies are valid payloads for the prompts the app
+parses (SIMULATION_PROMPT, CLASSIFY_UNKNOWN_INTENT and video_quiz_prompt) and
+filler text otherwise.
+
+Every random draw comes from a generator seeded with FAKE_LLM_SEED, the
+request body and how many times that body has been seen, so a run is
+reproducible regardless of how concurrent requests interleave.
+
+Run it and point the app at it with:
+    python -m backend.fake_llm_server            # listens on FAKE_LLM_PORT (8001)
+    LLM_BACKEND=fake uvicorn backend.app:app
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "team customer feedback learning skill goal plan review practice coaching process clear "
+    "support quality project deadline priority communication listen improve data insight "
+    "strategy growth mentor example outcome trust adapt focus progress"
+).split()
+
+MODULES = [
+    "AI Concepts", "Micro-lessons", "Video Lessons", "Recommendations", "Simulations",
+    "Career Coach", "Skills Forecast", "Certifications", "Web Search"
+]
+
+
+class FakeLLMSettings:
+    """Timing and failure knobs; defaults come from FAKE_LLM_* environment variables"""
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        ttft_ms: Optional[float] = None,
+        ttft_sigma: Optional[float] = None,
+        token_delay_ms: Optional[float] = None,
+        rate_limit_rate: Optional[float] = None,
+        completion_tokens: Optional[int] = None
+    ):
+        env = os.getenv
+        self.seed = seed if seed is not None else int(env("FAKE_LLM_SEED", "1234"))
+        # Median time to first token; latency is log-normal around it
+        self.ttft_ms = ttft_ms if ttft_ms is not None else float(env("FAKE_LLM_TTFT_MS", "400"))
+        self.ttft_sigma = ttft_sigma if ttft_sigma is not None else float(env("FAKE_LLM_TTFT_SIGMA", "0.5"))
+        self.token_delay_ms = token_delay_ms if token_delay_ms is not None else float(env("FAKE_LLM_TOKEN_DELAY_MS", "20"))
+        self.rate_limit_rate = rate_limit_rate if rate_limit_rate is not None else float(env("FAKE_LLM_429_RATE", "0"))
+        # Typical length of free-text replies, capped by the request's max_tokens
+        self.completion_tokens = completion_tokens if completion_tokens is not None else int(env("FAKE_LLM_COMPLETION_TOKENS", "120"))
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _sentence(rng: random.Random, words: int = 10) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _simulation_payload(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "customerText": _sentence(rng, 16),
+        "choices": [
+            {"text": _sentence(rng, 10), "feedback": _sentence(rng, 12)}
+            for _ in range(3)
+        ]
+    }
+
+
+def _classify_payload(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    matched = rng.random() < 0.7
+    return {
+        "intent": _sentence(rng, 8),
+        "module_match": rng.choice(MODULES) if matched else None,
+        "new_feature": None if matched else " ".join(rng.choice(WORDS).title() for _ in range(2)),
+        "confidence": rng.choice(["High", "Medium", "Low"]),
+        "follow_up_question": _sentence(rng, 9)[:-1] + "?"
+    }
+
+
+def _quiz_payload(rng: random.Random, prompt: str) -> List[Dict[str, Any]]:
+    count = 3
+    marker = "Create "
+    if marker in prompt:
+        head = prompt.split(marker, 1)[1].split(" ", 1)[0]
+        if head.isdigit():
+            count = int(head)
+    questions = []
+    for _ in range(count):
+        answer = rng.choice("ABCD")
+        questions.append({
+            "question": _sentence(rng, 9)[:-1] + "?",
+            "options": [f"{letter}. {_sentence(rng, 4)}" for letter in "ABCD"],
+            "answer": answer,
+            "explanation": _sentence(rng, 12)
+        })
+    return questions
+
+
+def _interview_questions_payload(rng: random.Random, prompt: str) -> List[Dict[str, Any]]:
+    count = 5
+    marker = "Write "
+    if marker in prompt:
+        head = prompt.split(marker, 1)[1].split(" ", 1)[0]
+        if head.isdigit():
+            count = int(head)
+    return [
+        {
+            "question": _sentence(rng, 12)[:-1] + "?",
+            "answer": _sentence(rng, 16),
+            "follow_up": _sentence(rng, 9)[:-1] + "?",
+            "tip": _sentence(rng, 10)
+        }
+        for _ in range(count)
+    ]
+
+
+def generate_reply(prompt: str, rng: random.Random, max_tokens: int, settings: FakeLLMSettings) -> str:
+    """A reply in the format the prompt asks for"""
+    if '"customerText"' in prompt:
+        return json.dumps(_simulation_payload(rng), indent=2)
+    if "module_match" in prompt and "follow_up_question" in prompt:
+        return json.dumps(_classify_payload(rng, prompt), indent=2)
+    if "multiple-choice questions" in prompt:
+        return json.dumps(_quiz_payload(rng, prompt), indent=2)
+    if '"follow_up"' in prompt and '"tip"' in prompt:
+        return json.dumps(_interview_questions_payload(rng, prompt), indent=2)
+    target = max(1, min(max_tokens, int(rng.gauss(settings.completion_tokens, settings.completion_tokens / 4))))
+    sentences = []
+    while estimate_tokens(" ".join(sentences)) < target:
+        sentences.append(_sentence(rng, rng.randint(8, 16)))
+    return " ".join(sentences)
+
+
+def _split_tokens(text: str) -> List[str]:
+    """Stream in roughly token-sized pieces (about 4 characters)"""
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+def create_app(settings: Optional[FakeLLMSettings] = None) -> FastAPI:
+    settings = settings or FakeLLMSettings()
+    app = FastAPI(title="Fake LLM")
+    seen: Dict[str, int] = {}
+    seen_lock = threading.Lock()
+
+    def request_rng(body: Dict[str, Any]) -> random.Random:
+        digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+        with seen_lock:
+            attempt = seen.get(digest, 0)
+            seen[digest] = attempt + 1
+        return random.Random(f"{settings.seed}:{digest}:{attempt}")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        rng = request_rng(body)
+        model = body.get("model", "gpt-4")
+        messages = body.get("messages") or []
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+
+        if settings.rate_limit_rate and rng.random() < settings.rate_limit_rate:
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": "1"},
+                content={"error": {
+                    "message": "Rate limit reached (simulated)",
+                    "type": "requests",
+                    "code": "rate_limit_exceeded"
+                }}
+            )
+
+        reply = generate_reply(prompt, rng, int(body.get("max_tokens") or 512), settings)
+        tokens = _split_tokens(reply)
+        ttft = settings.ttft_ms * rng.lognormvariate(0, settings.ttft_sigma) / 1000 if settings.ttft_ms else 0
+        token_delays = [
+            max(0.0, rng.gauss(settings.token_delay_ms, settings.token_delay_ms / 4)) / 1000
+            for _ in tokens
+        ] if settings.token_delay_ms else [0.0] * len(tokens)
+        completion_id = f"chatcmpl-fake-{rng.getrandbits(64):016x}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": len(tokens),
+            "total_tokens": estimate_tokens(prompt) + len(tokens)
+        }
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + sum(token_delays))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+
+        def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }) + "\n\n"
+
+        async def stream():
+            yield chunk({"role": "assistant", "content": ""})
+            await asyncio.sleep(ttft)
+            for token, delay in zip(tokens, token_delays):
+                yield chunk({"content": token})
+                if delay:
+                    await asyncio.sleep(delay)
+            yield chunk({}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [
+            {"id": name, "object": "model", "owned_by": "fake"} for name in ("gpt-4", "gpt-4o-mini")
+        ]}
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("FAKE_LLM_PORT", "8001")), log_level="warning")
@@ -0,0 +1,252 @@
+"""
+Parsing of structured (JSON) LLM replies
+
+parse_json reads a complete reply. When it isn't valid JSON as-is, a local
+repair pass is tried before giving up: surrounding prose and markdown code
+fences are dropped, trailing commas removed, and a reply cut off by
+max_tokens is closed. That recovers most near-misses without asking the
+model again. A closed reply is missing whatever was cut off, so callers
+that store the result can refuse it. Every parse is counted in
+llm_json_parse_total by template and result (ok, repaired, truncated or
+failed).
+
+JSONStreamParser reads a reply while it streams and returns each member of
+the top-level object (or element of the top-level array) as soon as its
+value is complete, so e.g. a simulation step's customerText can be shown
+before the choices have been generated.
+
+    parser = JSONStreamParser()
+    for chunk in stream:
+        for name, value in parser.feed(chunk):
+            ...
+    step = parser.close("simulation_step")
+"""
+
+import json
+from typing import Any, List, Optional, Tuple, Union
+
+from backend.metrics import llm_json_parse
+
+
+# Bracketed positions tried before a reply is given up on
+MAX_REPAIR_STARTS = 20
+
+
+class JSONParseError(ValueError):
+    pass
+
+
+def _strip_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text
+
+
+def _drop_trailing_comma(out: List[str]):
+    end = len(out)
+    while end and out[end - 1].isspace():
+        end -= 1
+    if end and out[end - 1] == ",":
+        del out[end - 1]
+
+
+def _close(text: str, start: int) -> Tuple[str, bool]:
+    """The value starting at text[start], and whether it had to be closed because it was cut off"""
+    out: List[str] = []
+    closers: List[str] = []
+    in_string = escape = False
+    for c in text[start:]:
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c in "}]":
+            if c != closers[-1]:
+                break  # mismatched bracket: keep what was balanced and close it below
+            _drop_trailing_comma(out)
+            out.append(closers.pop())
+            if not closers:
+                return "".join(out), False
+            continue
+        if c == '"':
+            in_string = True
+        elif c == "{":
+            closers.append("}")
+        elif c == "[":
+            closers.append("]")
+        out.append(c)
+
+    # Truncated: finish the open string and containers
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    _drop_trailing_comma(out)
+    if "".join(out).rstrip().endswith(":"):
+        out.append("null")
+    for closer in reversed(closers):
+        _drop_trailing_comma(out)
+        out.append(closer)
+    return "".join(out), True
+
+
+def _repair(text: str, expect: Optional[str] = None) -> Tuple[Any, bool]:
+    """The repaired value and whether it was truncated; raises JSONParseError"""
+    text = _strip_fence(text)
+    starts = [position for position, c in enumerate(text) if c in "{["]
+    if not starts:
+        raise JSONParseError("No JSON object or array in reply")
+    if expect:
+        # Stable: the expected kind of value first, each kind in reply order
+        starts.sort(key=lambda position: text[position] != expect)
+    error: Optional[ValueError] = None
+    for start in starts[:MAX_REPAIR_STARTS]:
+        candidate, truncated = _close(text, start)
+        try:
+            return json.loads(candidate, strict=False), truncated
+        except ValueError as e:
+            # Prose in brackets ("[see below]") before the real value
+            error = error or e
+    raise JSONParseError(f"Reply is not JSON: {error}")
+
+
+def repair_json(text: str, expect: Optional[str] = None) -> str:
+    """The JSON value in text, cut out of any surrounding prose and closed if truncated.
+
+    expect ("{" or "[") is the kind of value the caller wants; it is preferred
+    when the reply holds both. Raises JSONParseError.
+    """
+    value, _ = _repair(text, expect)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def parse_json(text: str, template: str = "adhoc", expect: Optional[str] = None, allow_truncated: bool = True) -> Any:
+    """The value of a JSON reply, repairing it if needed; raises JSONParseError.
+
+    Callers that store the value should pass allow_truncated=False: a reply
+    cut off by max_tokens still parses once closed, but is missing content.
+    """
+    try:
+        value = json.loads(text, strict=False)
+        llm_json_parse.inc(template=template, result="ok")
+        return value
+    except ValueError:
+        pass
+    try:
+        value, truncated = _repair(text, expect)
+    except JSONParseError:
+        llm_json_parse.inc(template=template, result="failed")
+        raise
+    if truncated and not allow_truncated:
+        llm_json_parse.inc(template=template, result="truncated")
+        raise JSONParseError("Reply was cut off")
+    llm_json_parse.inc(template=template, result="repaired")
+    return value
+
+
+class JSONStreamParser:
+    """Incremental reader of a streamed JSON reply.
+
+    feed returns (name, value) for members of the top-level object, or
+    (index, value) for elements of a top-level array, completed by the
+    chunk. Anything before the first { or [ (a code fence, prose) is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._position = 0
+        self._root: Optional[str] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._member_done = False
+        self._index = 0
+
+    def _can_start_value(self) -> bool:
+        return self._value_start is None and not self._member_done and (self._root == "[" or self._key is not None)
+
+    def _emit(self, end: int, members: List[Tuple[Union[str, int], Any]]):
+        try:
+            value = json.loads(self.text[self._value_start:end].strip(), strict=False)
+        except ValueError:
+            value = None
+        if value is not None or self.text[self._value_start:end].strip() == "null":
+            members.append((self._index if self._root == "[" else self._key, value))
+        self._index += 1
+        self._key = None
+        self._value_start = None
+        self._member_done = True
+
+    def feed(self, chunk: str) -> List[Tuple[Union[str, int], Any]]:
+        self.text += chunk
+        members: List[Tuple[Union[str, int], Any]] = []
+        text = self.text
+        while self._position < len(text) and not self.done:
+            i = self._position
+            c = text[i]
+            self._position += 1
+            if self._root is None:
+                if c in "{[":
+                    self._root = c
+                    self._depth = 1
+                    self._expect_key = c == "{"
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._key_start is not None:
+                            self._key = json.loads(text[self._key_start:i + 1], strict=False)
+                            self._key_start = None
+                        elif self._value_start is not None:
+                            self._emit(i + 1, members)
+                continue
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._root == "{" and self._expect_key:
+                        self._key_start = i
+                        self._expect_key = False
+                    elif self._can_start_value():
+                        self._value_start = i
+            elif c in "{[":
+                if self._depth == 1 and self._can_start_value():
+                    self._value_start = i
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._emit(i + 1, members)
+                elif self._depth == 0:
+                    if self._value_start is not None:
+                        self._emit(i, members)
+                    self.done = True
+            elif self._depth == 1:
+                if c == ",":
+                    if self._value_start is not None:
+                        self._emit(i, members)
+                    self._member_done = False
+                    self._expect_key = self._root == "{"
+                elif c != ":" and not c.isspace() and self._can_start_value():
+                    self._value_start = i
+        return members
+
+    def close(self, template: str = "adhoc") -> Any:
+        """The whole reply, parsed with parse_json; raises JSONParseError"""
+        return parse_json(self.text, template)
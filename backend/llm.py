@@ -1,16 +1,105 @@
 # This file will handle OpenAI GPT-4 (or Claude) configuration and integration 
 
 import os
+import time
+import asyncio
 from dotenv import load_dotenv
-import openai
 from backend.prompts import CLASSIFY_UNKNOWN_INTENT, GENERATE_SCAFFOLD_PROMPT
+from backend.metrics import llm_request_duration, llm_time_to_first_token, llm_tokens
+from backend.tracing import span, current_span, Span, SPAN_KIND_CLIENT
+from backend.json_stream import parse_json, JSONParseError
 
 load_dotenv()  # Loads .env file if present
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-def ask_openai(prompt=None, model="gpt-4", max_tokens=512, messages=None):
-    if not OPENAI_API_KEY or OPENAI_API_KEY.strip() == "":
+# Where completions come from:
+#   openai - the OpenAI API (or any compatible server at LLM_BASE_URL); mocked without a key
+#   fake   - the local stand-in, python -m backend.fake_llm_server
+#   mock   - an instant fixed [MOCKED RESPONSE]
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+FAKE_LLM_URL = os.getenv("FAKE_LLM_URL", "http://127.0.0.1:8001/v1")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or (FAKE_LLM_URL if LLM_BACKEND == "fake" else None)
+_llm_http_client = None
+
+# Send response_format for structured prompts; only for models that support JSON mode
+# (gpt-4-turbo, gpt-4o and later - the plain gpt-4 rejects it)
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "0") == "1"
+JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+# Global cap on concurrent LLM calls made through ask_openai_async
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+llm_limiter = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+_openai_client = None
+
+def get_openai_client():
+    """Create the OpenAI client on first use; importing openai is slow"""
+    global _openai_client
+    if _openai_client is None:
+        import openai
+        _openai_client = openai.OpenAI(
+            api_key=OPENAI_API_KEY or "not-needed",
+            base_url=LLM_BASE_URL,
+            http_client=_llm_http_client
+        )
+    return _openai_client
+
+def set_llm_backend(backend, base_url=None, http_client=None):
+    """Switch backends at runtime (benchmarks and tests).
+
+    http_client lets the OpenAI client talk to an in-process app, e.g. a
+    TestClient wrapping backend.fake_llm_server.app.
+    """
+    global LLM_BACKEND, LLM_BASE_URL, _llm_http_client, _openai_client
+    LLM_BACKEND = backend
+    LLM_BASE_URL = base_url or (FAKE_LLM_URL if backend == "fake" else None)
+    _llm_http_client = http_client
+    _openai_client = None
+
+def _mocked():
+    if LLM_BACKEND == "mock":
+        return True
+    return LLM_BACKEND == "openai" and not LLM_BASE_URL and (not OPENAI_API_KEY or OPENAI_API_KEY.strip() == "")
+
+def _template_prefixes():
+    """Opening text of each prompt template, used to label metrics by template"""
+    import backend.prompts as prompts
+    prefixes = {}
+    for name, value in vars(prompts).items():
+        if isinstance(value, str) and not name.startswith("_"):
+            prefix = value.strip().split("{")[0][:60].strip()
+            if len(prefix) >= 12:
+                prefixes[prefix] = name
+    return prefixes
+
+_TEMPLATE_PREFIXES = _template_prefixes()
+
+def template_name(prompt=None, messages=None):
+    text = prompt or (messages[0].get("content", "") if messages else "")
+    text = text.strip()
+    for prefix, name in _TEMPLATE_PREFIXES.items():
+        if text.startswith(prefix):
+            return name
+    return "adhoc"
+
+def _record_usage(model, template, response, trace_span=None):
+    usage = getattr(response, "usage", None)
+    if usage:
+        llm_tokens.inc(usage.prompt_tokens or 0, model=model, template=template, kind="prompt")
+        llm_tokens.inc(usage.completion_tokens or 0, model=model, template=template, kind="completion")
+        if trace_span:
+            trace_span.set_attribute("llm.prompt_tokens", usage.prompt_tokens or 0)
+            trace_span.set_attribute("llm.completion_tokens", usage.completion_tokens or 0)
+
+def _completion_options(response_format):
+    return {"response_format": response_format} if response_format and LLM_JSON_MODE else {}
+
+def ask_openai(prompt=None, model="gpt-4", max_tokens=512, messages=None, template=None, response_format=None):
+    template = template or template_name(prompt, messages)
+    start = time.perf_counter()
+    if _mocked():
+        llm_request_duration.observe(time.perf_counter() - start, model=model, template=template, outcome="mock")
         # No key found, return mock response
         if prompt:
             return f"[MOCKED RESPONSE] This would be the AI's answer to: {prompt[:60]}..."
@@ -18,33 +107,75 @@ def ask_openai(prompt=None, model="gpt-4", max_tokens=512, messages=None):
             return f"[MOCKED RESPONSE] This would be the AI's answer to: {messages[-1]['content'][:60]}..."
         else:
             return "[MOCKED RESPONSE] No prompt or messages provided."
-    try:
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        if messages:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=0.7,
-            )
-        else:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=max_tokens,
-                temperature=0.7,
-            )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"[MOCKED RESPONSE - Error: {str(e)}] This would be the AI's answer to: {prompt[:60]}..." 
+    with span("llm.chat_completion", SPAN_KIND_CLIENT, **{"llm.model": model, "llm.template": template}) as trace_span:
+        try:
+            client = get_openai_client()
+            if messages:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.7,
+                    **_completion_options(response_format),
+                )
+            else:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=0.7,
+                    **_completion_options(response_format),
+                )
+            llm_request_duration.observe(time.perf_counter() - start, model=model, template=template, outcome="ok")
+            _record_usage(model, template, response, trace_span)
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            llm_request_duration.observe(time.perf_counter() - start, model=model, template=template, outcome="error")
+            if trace_span:
+                trace_span.record_error(e)
+            return f"[MOCKED RESPONSE - Error: {str(e)}] This would be the AI's answer to: {prompt[:60]}..." 
+
+async def ask_openai_async(prompt=None, model="gpt-4", max_tokens=512, messages=None, template=None, response_format=None):
+    """Run ask_openai off the event loop under the global LLM concurrency limit"""
+    async with llm_limiter:
+        return await asyncio.to_thread(
+            ask_openai, prompt=prompt, model=model, max_tokens=max_tokens, messages=messages, template=template,
+            response_format=response_format
+        )
+
+async def ask_openai_stream_async(prompt=None, model="gpt-4", max_tokens=512, messages=None, template=None, response_format=None):
+    """ask_openai_stream read from a worker thread under the global LLM concurrency limit"""
+    async with llm_limiter:
+        stream = ask_openai_stream(prompt=prompt, model=model, max_tokens=max_tokens, messages=messages,
+                                   template=template, response_format=response_format)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, stream, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            try:
+                await asyncio.to_thread(stream.close)
+            except ValueError:
+                pass  # cancelled mid-chunk; the thread finishes it and the stream is dropped
 
-def ask_openai_stream(prompt=None, model="gpt-4", max_tokens=512, messages=None):
-    if not OPENAI_API_KEY or OPENAI_API_KEY.strip() == "":
+def ask_openai_stream(prompt=None, model="gpt-4", max_tokens=512, messages=None, template=None, response_format=None):
+    template = template or template_name(prompt, messages)
+    start = time.perf_counter()
+    if _mocked():
         # No key found, yield a mock response
         yield "[MOCKED STREAMING RESPONSE]"
         return
+    outcome = "ok"
+    # A generator can resume in another context, so the span is ended by hand
+    # rather than held open across yields
+    stream_span = current_span()
+    if stream_span is not None:
+        stream_span = Span(stream_span.trace, "llm.chat_completion.stream", stream_span, SPAN_KIND_CLIENT,
+                           {"llm.model": model, "llm.template": template})
     try:
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        client = get_openai_client()
         if messages:
             response = client.chat.completions.create(
                 model=model,
@@ -52,6 +183,7 @@ def ask_openai_stream(prompt=None, model="gpt-4", max_tokens=512, messages=None)
                 max_tokens=max_tokens,
                 temperature=0.7,
                 stream=True,
+                **_completion_options(response_format),
             )
         else:
             response = client.chat.completions.create(
@@ -60,19 +192,35 @@ def ask_openai_stream(prompt=None, model="gpt-4", max_tokens=512, messages=None)
                 max_tokens=max_tokens,
                 temperature=0.7,
                 stream=True,
+                **_completion_options(response_format),
             )
+        first_token = True
         for chunk in response:
             if hasattr(chunk, 'choices') and chunk.choices:
                 delta = chunk.choices[0].delta
                 content = getattr(delta, 'content', None)
                 if content:
+                    if first_token:
+                        llm_time_to_first_token.observe(time.perf_counter() - start, model=model, template=template)
+                        if stream_span:
+                            stream_span.set_attribute("llm.time_to_first_token_ms", round((time.perf_counter() - start) * 1000, 1))
+                        first_token = False
+                    # Each streamed delta is roughly one token
+                    llm_tokens.inc(1, model=model, template=template, kind="completion")
                     print(f"[STREAM CHUNK] {content}", flush=True)
                     yield content
     except Exception as e:
+        outcome = "error"
+        if stream_span:
+            stream_span.record_error(e)
         yield f"[MOCKED STREAMING ERROR: {str(e)}]"
+    finally:
+        llm_request_duration.observe(time.perf_counter() - start, model=model, template=template, outcome=outcome)
+        if stream_span:
+            stream_span.end()
 
 def web_search_query(query):
-    response = openai.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4-1106-preview",  # or "gpt-4.1" if available
         messages=[{"role": "user", "content": query}],
         tools=[{"type": "web_search"}],  # or "web_search_preview" if that's the correct type
@@ -118,9 +266,11 @@ def classify_intent(user_input: str) -> dict:
     """Classify a user's unknown request and return structured insight."""
     prompt = CLASSIFY_UNKNOWN_INTENT.format(user_input=user_input)
     try:
-        response = ask_openai(prompt=prompt, model="gpt-4", max_tokens=512)
-        import json
-        return json.loads(response)
+        response = ask_openai(prompt=prompt, model="gpt-4", max_tokens=512, response_format=JSON_OBJECT_FORMAT)
+        intent = parse_json(response, template="classify_intent")
+        if not isinstance(intent, dict):
+            raise JSONParseError("Classification is not a JSON object")
+        return intent
     except Exception as e:
         print("Classification error:", e)
         return {
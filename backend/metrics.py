@@ -0,0 +1,283 @@
+"""
+Prometheus-style metrics
+
+A small dependency-free registry (counters, gauges, histograms) rendered in
+the Prometheus text exposition format at /metrics. Recording a sample is a
+dict lookup and a bisect under a lock, so it is cheap enough to wrap every
+request, LLM call and MongoDB command.
+"""
+
+import time
+import asyncio
+import threading
+from bisect import bisect_left
+from typing import Dict, Tuple, Callable, Optional, List
+
+from pymongo import monitoring
+
+# Seconds; covers fast Mongo reads up to slow GPT-4 completions
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        lines = super().render()
+        for key, value in list(self._values.items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._callbacks: Dict[Tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, callback: Callable[[], float], **labels):
+        """Read the value from callback at scrape time"""
+        self._callbacks[self._key(labels)] = callback
+
+    def render(self):
+        lines = super().render()
+        values = dict(self._values)
+        for key, callback in list(self._callbacks.items()):
+            try:
+                values[key] = callback()
+            except Exception:
+                continue
+        for key, value in values.items():
+            lines.append(f"{self.name}{_label_text(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = super().render()
+        for key, series in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+http_requests_in_progress = Gauge("http_requests_in_progress", "Requests currently being handled")
+
+# LLM
+llm_request_duration = Histogram(
+    "llm_request_duration_seconds", "LLM call latency", ("model", "template", "outcome")
+)
+llm_time_to_first_token = Histogram(
+    "llm_time_to_first_token_seconds", "Time until the first streamed token", ("model", "template")
+)
+llm_tokens = Counter("llm_tokens_total", "Tokens used by LLM calls", ("model", "template", "kind"))
+llm_json_parse = Counter(
+    "llm_json_parse_total", "Structured LLM replies by parse result (ok, repaired, truncated, failed)", ("template", "result")
+)
+
+# Speculative simulation steps (backend/speculation.py)
+speculation_requests = Counter(
+    "speculation_requests_total", "Speculative-session steps by whether the chosen branch was ready, pending or missing", ("result",)
+)
+speculation_branches = Counter("speculation_branches_total", "Speculative branches by how they ended", ("outcome",))
+speculation_wasted_tokens = Counter("speculation_wasted_tokens_total", "Completion tokens generated for branches that were not chosen")
+
+# MongoDB
+mongo_operation_duration = Histogram(
+    "mongo_operation_duration_seconds", "MongoDB command latency", ("collection", "command", "outcome")
+)
+
+# Voice
+tts_queue_depth = Gauge("tts_queue_depth", "Jobs waiting for the TTS worker pool")
+tts_synthesis_duration = Histogram("tts_synthesis_duration_seconds", "Speech synthesis time", ())
+
+# Caches
+cache_requests = Counter("cache_requests_total", "Cache lookups by outcome", ("cache", "result"))
+
+# Event loop
+event_loop_lag = Histogram(
+    "event_loop_lag_seconds", "Delay of a scheduled wake-up on the event loop",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+event_loop_lag_last = Gauge("event_loop_lag_last_seconds", "Most recent event loop lag sample")
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    if count:
+        cache_requests.inc(count, cache=cache, result="hit" if hit else "miss")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each request under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_progress.dec()
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code
+            )
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener recording latency per collection and command"""
+
+    def __init__(self):
+        self._collections: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if isinstance(target, str):
+            self._collections[(event.connection_id, event.request_id)] = target
+
+    def _finish(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        mongo_operation_duration.observe(
+            event.duration_micros / 1_000_000,
+            collection=collection,
+            command=event.command_name,
+            outcome=outcome
+        )
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Sleep for `interval` repeatedly and record how late each wake-up was"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        event_loop_lag.observe(lag)
+        event_loop_lag_last.set(lag)
@@ -0,0 +1,234 @@
+"""
+Pools of pre-generated LLM content
+
+A pool keeps validated items (interview questions, opening scenarios, ...)
+per key in MongoDB so routes can serve them in milliseconds instead of
+waiting for a completion. Items are not consumed; each user is tracked so
+they are not served the same item twice, and a pool grows (up to max_size)
+when its users run out of unseen items.
+
+Refills run in the background. A refill is triggered when a key drops below
+low_water items, or when a user is close to exhausting it, and generates
+until the key holds high_water items. Refills are capped per process by a
+semaphore and across workers by a lease on the key's document, and keys
+only get a pool once they have been requested min_demand times, so rarely
+requested keys keep using live generation.
+"""
+
+import os
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from backend.db import pool_items_collection, pool_seen_collection, pool_keys_collection
+
+# The periodic refiller; keys are still refilled on demand when it is off
+POOL_REFILLER_ENABLED = os.getenv("POOL_REFILLER_ENABLED", "1") == "1"
+POOL_REFILL_INTERVAL = float(os.getenv("POOL_REFILL_INTERVAL", "60"))
+REFILL_LEASE_SECONDS = 300
+# Generations in a row that may yield nothing usable before a refill gives up
+MAX_FAILED_GENERATIONS = 3
+# Item ids remembered per user and key
+MAX_SEEN_PER_USER = 1000
+
+
+def normalise_key(key: str) -> str:
+    return " ".join(str(key).casefold().split())
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha1(normalise_key(text).encode("utf-8")).hexdigest()
+
+
+class Pool:
+    def __init__(
+        self,
+        name: str,
+        generate: Callable[[str], Awaitable[List[Dict[str, Any]]]],
+        validate: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+        identity: Callable[[Dict[str, Any]], str],
+        low_water: int = 20,
+        high_water: int = 60,
+        max_size: int = 300,
+        refill_concurrency: int = 2,
+        min_demand: int = 0
+    ):
+        """generate returns candidate items for a key; validate returns a cleaned
+        item or None to drop it; identity is the text that makes two items duplicates"""
+        self.name = name
+        self.generate = generate
+        self.validate = validate
+        self.identity = identity
+        self.low_water = low_water
+        self.high_water = high_water
+        self.max_size = max_size
+        self.min_demand = min_demand
+        self._refill_limiter = asyncio.Semaphore(refill_concurrency)
+        self._refilling: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _key_id(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def count(self, key: str) -> int:
+        return await pool_items_collection.count_documents({"pool": self.name, "key": key})
+
+    async def take(self, key: str, user_id: str, count: int = 1) -> Optional[List[Dict[str, Any]]]:
+        """count items this user has not been served yet, or None if the pool can't supply them.
+
+        Served items are remembered for the user. A refill is scheduled when
+        the pool is low, whether or not this call could be served.
+        """
+        key = normalise_key(key)
+        key_doc = await pool_keys_collection.find_one_and_update(
+            {"_id": self._key_id(key)},
+            {
+                "$inc": {"requests": 1},
+                "$set": {"last_requested_at": datetime.utcnow()},
+                "$setOnInsert": {"pool": self.name, "key": key}
+            },
+            upsert=True,
+            return_document=True
+        )
+        seen_id = f"{self._key_id(key)}:{user_id}"
+        seen_doc = await pool_seen_collection.find_one({"_id": seen_id}, {"item_ids": 1})
+        seen = seen_doc.get("item_ids", []) if seen_doc else []
+
+        docs = await pool_items_collection.aggregate([
+            {"$match": {"pool": self.name, "key": key, "_id": {"$nin": seen}}},
+            {"$sample": {"size": count}}
+        ]).to_list(length=count)
+
+        total = await self.count(key)
+        unseen_after = total - len(seen) - len(docs)
+        if key_doc.get("requests", 0) >= self.min_demand and (total < self.low_water or unseen_after < self.low_water):
+            target = self.high_water if total < self.high_water else min(self.max_size, total + self.high_water - self.low_water)
+            if target > total:
+                self.schedule_refill(key, target)
+
+        if len(docs) < count:
+            return None
+        await pool_seen_collection.update_one(
+            {"_id": seen_id},
+            {"$push": {"item_ids": {"$each": [doc["_id"] for doc in docs], "$slice": -MAX_SEEN_PER_USER}}},
+            upsert=True
+        )
+        return [{**doc["item"], "id": str(doc["_id"])} for doc in docs]
+
+    def schedule_refill(self, key: str, target: Optional[int] = None):
+        """Start a background refill of key unless one is already running here"""
+        if key in self._refilling:
+            return
+        task = asyncio.create_task(self.refill(key, target))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _claim(self, key: str) -> bool:
+        now = datetime.utcnow()
+        try:
+            # With the lease held the filter misses and the upsert collides on _id
+            await pool_keys_collection.find_one_and_update(
+                {"_id": self._key_id(key), "$or": [
+                    {"refill_lease_until": {"$exists": False}},
+                    {"refill_lease_until": {"$lt": now}}
+                ]},
+                {
+                    "$set": {"refill_lease_until": now + timedelta(seconds=REFILL_LEASE_SECONDS)},
+                    "$setOnInsert": {"pool": self.name, "key": key, "requests": 0}
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False  # another worker holds the lease
+        return True
+
+    async def _release(self, key: str):
+        await pool_keys_collection.update_one(
+            {"_id": self._key_id(key)},
+            {"$unset": {"refill_lease_until": ""}, "$set": {"last_refilled_at": datetime.utcnow()}}
+        )
+
+    async def _store(self, key: str, candidates: Iterable[Dict[str, Any]]) -> int:
+        docs = []
+        for candidate in candidates:
+            try:
+                item = self.validate(candidate)
+            except Exception:
+                item = None
+            if item:
+                docs.append({
+                    "pool": self.name,
+                    "key": key,
+                    "fingerprint": fingerprint(self.identity(item)),
+                    "item": item,
+                    "created_at": datetime.utcnow()
+                })
+        if not docs:
+            return 0
+        try:
+            result = await pool_items_collection.insert_many(docs, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Duplicates of items already in the pool are skipped
+            return e.details.get("nInserted", 0)
+
+    async def refill(self, key: str, target: Optional[int] = None) -> int:
+        """Generate items for key until it holds target (default high_water); returns how many were added"""
+        target = min(target or self.high_water, self.max_size)
+        self._refilling.add(key)
+        try:
+            async with self._refill_limiter:
+                if not await self._claim(key):
+                    return 0
+                added = 0
+                failures = 0
+                try:
+                    while failures < MAX_FAILED_GENERATIONS and await self.count(key) < target:
+                        try:
+                            stored = await self._store(key, await self.generate(key))
+                        except Exception as e:
+                            print(f"Pool {self.name} generation failed for {key}: {e}")
+                            stored = 0
+                        added += stored
+                        failures = 0 if stored else failures + 1
+                finally:
+                    await self._release(key)
+                return added
+        finally:
+            self._refilling.discard(key)
+
+    async def keys_to_refill(self) -> List[str]:
+        """Keys with enough demand whose pool is below low_water"""
+        keys = []
+        async for doc in pool_keys_collection.find({"pool": self.name, "requests": {"$gte": self.min_demand}}, {"key": 1}):
+            if await self.count(doc["key"]) < self.low_water:
+                keys.append(doc["key"])
+        return keys
+
+
+async def ensure_pool_indexes():
+    await pool_items_collection.create_index([("pool", 1), ("key", 1), ("fingerprint", 1)], unique=True)
+    await pool_keys_collection.create_index([("pool", 1), ("requests", -1)])
+
+
+async def run_pool_refiller(pools: List[Pool], interval: float = POOL_REFILL_INTERVAL, static_keys: Optional[Dict[str, List[str]]] = None):
+    """Top up every pool below its low-water mark, then check again every interval seconds.
+
+    static_keys lists keys (by pool name) kept filled whether or not they have been requested.
+    """
+    static_keys = static_keys or {}
+    while True:
+        for pool in pools:
+            try:
+                keys = set(await pool.keys_to_refill())
+                for key in static_keys.get(pool.name, []):
+                    if await pool.count(key) < pool.low_water:
+                        keys.add(key)
+                for key in keys:
+                    pool.schedule_refill(key)
+            except Exception as e:
+                print(f"Pool refill check failed for {pool.name}: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,110 @@
+"""
+Certification profiles (the auto-fill data behind /certifications/user-profile)
+
+Profiles live in their own collection, one document per user under a unique
+user_id index, instead of as {"type": "profile"} rows mixed into the
+certification recommendation history. Reads go through a small in-process
+cache; saves update it directly, so a user always reads their own writes on
+the worker that handled the save. Other workers are not told about a save
+and may serve the previous profile for up to PROFILE_CACHE_TTL seconds, so
+the TTL is kept short: the profile only pre-fills a form.
+
+Move profiles saved before this collection existed with:
+    python -m backend.profiles --migrate
+"""
+
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from pymongo.errors import DuplicateKeyError
+
+from backend.db import certification_profiles_collection, certifications_collection
+from backend.metrics import record_cache
+
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "10"))
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+
+LEGACY_PROFILE_FILTER = {"type": "profile"}
+
+# user_id -> (expires_at, profile or None)
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _remember(user_id: str, profile: Optional[Dict[str, Any]]):
+    _cache[user_id] = (time.monotonic() + PROFILE_CACHE_TTL, profile)
+    _cache.move_to_end(user_id)
+    while len(_cache) > PROFILE_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+async def ensure_profile_indexes():
+    await certification_profiles_collection.create_index("user_id", unique=True)
+
+
+async def get_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """The user's saved profile, or None"""
+    cached = _cache.get(user_id)
+    if cached and cached[0] > time.monotonic():
+        record_cache("certification_profile", hit=True)
+        _cache.move_to_end(user_id)
+        return cached[1]
+    record_cache("certification_profile", hit=False)
+
+    doc = await certification_profiles_collection.find_one({"user_id": user_id}, {"profile": 1})
+    if doc is None:
+        # Not migrated yet: fall back to the old location
+        doc = await certifications_collection.find_one({"user_id": user_id, **LEGACY_PROFILE_FILTER}, {"profile": 1})
+    profile = doc.get("profile") if doc else None
+    _remember(user_id, profile)
+    return profile
+
+
+async def save_profile(user_id: str, email: str, profile: Dict[str, Any]):
+    await certification_profiles_collection.update_one(
+        {"user_id": user_id},
+        {
+            "$set": {"user_email": email, "profile": profile, "updated_at": datetime.utcnow()},
+            "$setOnInsert": {"user_id": user_id, "created_at": datetime.utcnow()}
+        },
+        upsert=True
+    )
+    _remember(user_id, profile)
+
+
+async def migrate_profiles() -> int:
+    """Move {"type": "profile"} documents out of certifications; returns how many moved"""
+    await ensure_profile_indexes()
+    moved = 0
+    async for doc in certifications_collection.find(LEGACY_PROFILE_FILTER):
+        if doc.get("user_id") and doc.get("profile"):
+            try:
+                # A profile saved since the deploy is newer than the legacy one and wins
+                await certification_profiles_collection.update_one(
+                    {"user_id": doc["user_id"]},
+                    {"$setOnInsert": {
+                        "user_id": doc["user_id"],
+                        "user_email": doc.get("user_email", ""),
+                        "profile": doc["profile"],
+                        "created_at": doc.get("updated_at") or datetime.utcnow(),
+                        "updated_at": doc.get("updated_at") or datetime.utcnow()
+                    }},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                pass  # inserted concurrently by a save
+            moved += 1
+        await certifications_collection.delete_one({"_id": doc["_id"]})
+    return moved
+
+
+if __name__ == "__main__":
+    import sys
+    if "--migrate" in sys.argv:
+        count = asyncio.run(migrate_profiles())
+        print(f"Moved {count} certification profiles")
+    else:
+        print(__doc__)
@@ -6,6 +6,8 @@ CONCEPT_PROMPT = (
     "For each concept, provide a title and a concise explanation. Use a professional, inspiring tone."
 )
 
+MICRO_LESSON_TOPIC_PROMPT = "Write a concise, practical micro-lesson for the following workplace topic: {topic}"
+
 MICROLESSON_PROMPT = (
     "Act as an expert corporate learning instructor with 15+ years of experience in adult education and workplace training. "
     "Your task is to create a concise, practical micro-lesson on the following topic: {topic}. "
@@ -41,6 +43,23 @@ RECOMMENDATION_PROMPT = (
     "- Keep your response under 100 words."
 )
 
+TEAM_ANALYTICS_NARRATIVE_PROMPT = """
+You are an experienced people analytics advisor. The numbers below were computed from the team's member records; treat them as accurate and do not recalculate them.
+
+Team: {team_name}
+Description: {team_description}
+Requested focus: {metrics}
+
+Team statistics:
+{summary}
+
+Please provide:
+1. Overall team assessment
+2. Risks, including skills that depend on a single person
+3. Recommendations for improvement (training, hiring or cross-skilling)
+4. Collaboration insights
+"""
+
 career_coach_prompt = """
 Act as an experienced career development coach specializing in leadership, soft skills, and professional growth. Guide the user through their career challenges by:
 - Asking thoughtful, open-ended questions
@@ -78,6 +97,21 @@ Please provide:
 Format your response in a clear, structured way that's easy to read.
 """
 
+CERTIFICATION_EXPLAIN_PROMPT = """
+You are an expert certification advisor for IT professionals. The certifications below were selected from our catalog for this user. Put them in the order you would recommend them and explain each one briefly.
+
+User Profile:
+- Role: {role}
+- Current Skills: {skills}
+- Career Goals: {goals}
+- Experience Level: {experience_level}
+
+Candidate certifications:
+{candidates}
+
+For each certification give why it fits the profile, the expected time commitment and difficulty, and the main skills to develop. Only discuss the certifications listed.
+"""
+
 CERTIFICATION_STUDY_PLAN_PROMPT = """
 You are an expert certification trainer. Create a personalized study plan for the {certification_name} certification.
 
@@ -114,6 +148,16 @@ Provide:
 Make this feel like a real certification interview.
 """
 
+CERTIFICATION_QUESTION_POOL_PROMPT = """
+You are writing interview questions for a {certification_name} certification simulation.
+
+Write {count} distinct, challenging questions covering technical concepts, real-world
+scenarios, problem-solving approaches and best practices.
+
+Respond with only a JSON array, where each element is:
+{{"question": "...", "answer": "expected answer and explanation", "follow_up": "a follow-up question based on the answer", "tip": "a tip for improvement"}}
+"""
+
 CERTIFICATION_CAREER_COACH_PROMPT = """
 You are an AI career coach helping a professional plan their certification journey.
 
@@ -143,7 +187,7 @@ You are an AI learning assistant. A user just watched this video. Based on the f
 Summary:
 {summary}
 
-Create 3 multiple-choice questions. For each:
+Create {num_questions} multiple-choice questions. For each:
 - Provide a clear question
 - List 4 options (A, B, C, D)
 - Indicate the correct answer
@@ -165,6 +209,25 @@ Summarize this video transcript into 5 key points for learning purposes:
 {transcript}
 """ 
 
+# Map step for long transcripts: one call per transcript section
+video_chunk_summary_prompt = """
+This is section {index} of {total} of a training video transcript.
+Summarize the key learning points of this section in at most 6 concise bullet points.
+Only use information from this section.
+
+Transcript section:
+{chunk}
+"""
+
+# Reduce step: merge section summaries into the final learning summary
+video_reduce_summary_prompt = """
+Below are summaries of consecutive sections of one training video transcript.
+Combine them into 5 key points for learning purposes, removing repetition and keeping the order of ideas.
+
+Section summaries:
+{summaries}
+"""
+
 CLASSIFY_UNKNOWN_INTENT = """
 You are an assistant helping classify user input in a workplace learning platform.
 
@@ -0,0 +1,99 @@
+"""
+Concurrent independent reads
+
+Routes that read several collections build one query per collection with
+find_many, find_one, count or aggregate and run them together with
+gather_queries, so the route waits for the slowest query instead of their
+sum. Every query has a timeout, enforced by MongoDB through maxTimeMS, and
+raises QueryTimeout when it expires; the app answers that with 504. The
+timeout is deliberately not also enforced with asyncio.wait_for: that
+wraps each query in a task, costing a loop iteration even for one query.
+
+    results = await gather_queries(
+        plans=find_many(study_plans_collection, {"user_id": uid}, sort=NEWEST_FIRST),
+        team=find_one(teams_collection, {"_id": team_oid}),
+    )
+"""
+
+import os
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional
+
+from pymongo.errors import ExecutionTimeout
+
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "5"))
+
+NEWEST_FIRST = [("created_at", -1)]
+
+
+class QueryTimeout(Exception):
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"Query {name} did not finish within {timeout:g}s")
+        self.name = name
+        self.timeout = timeout
+
+
+class Query:
+    """A read waiting to be run, with its timeout"""
+
+    def __init__(self, run, timeout: Optional[float]):
+        self.run = run
+        self.timeout = timeout or QUERY_TIMEOUT_SECONDS
+
+    @property
+    def max_time_ms(self) -> int:
+        return int(self.timeout * 1000)
+
+    async def result(self, name: str = "query") -> Any:
+        try:
+            return await self.run(self)
+        except ExecutionTimeout:
+            raise QueryTimeout(name, self.timeout)
+
+    def __await__(self):
+        return self.result().__await__()
+
+
+def find_many(
+    collection,
+    filter: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None,
+    sort: Optional[List] = None,
+    limit: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> Query:
+    def run(query: Query) -> Awaitable[List[Dict[str, Any]]]:
+        cursor = collection.find(filter, projection).max_time_ms(query.max_time_ms)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor.to_list(length=limit or None)
+    return Query(run, timeout)
+
+
+def find_one(collection, filter: Dict[str, Any], projection: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Query:
+    return Query(lambda query: collection.find_one(filter, projection, max_time_ms=query.max_time_ms), timeout)
+
+
+def count(collection, filter: Dict[str, Any], timeout: Optional[float] = None) -> Query:
+    return Query(lambda query: collection.count_documents(filter, maxTimeMS=query.max_time_ms), timeout)
+
+
+def aggregate(collection, pipeline: List[Dict[str, Any]], timeout: Optional[float] = None) -> Query:
+    return Query(lambda query: collection.aggregate(pipeline, maxTimeMS=query.max_time_ms).to_list(length=None), timeout)
+
+
+async def gather_queries(**queries: Query) -> Dict[str, Any]:
+    """Run named queries concurrently and return their results by name.
+
+    If one fails the others are cancelled and its exception is raised.
+    """
+    tasks = {name: asyncio.ensure_future(query.result(name)) for name, query in queries.items()}
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,144 @@
+"""
+Per-user daily activity rollups for the dashboard
+
+Every write path bumps a small counter document per (user, day), so the
+dashboard is one indexed query over at most a few hundred small documents
+no matter how many lessons a user has.
+
+Backfill rollups for data written before rollups existed with:
+    python -m backend.rollups --backfill
+"""
+
+import asyncio
+from datetime import datetime, date, timedelta
+from typing import Optional, Dict, Any, List
+
+from backend.db import (
+    user_daily_rollups_collection, lessons_collection, career_coach_sessions, skills_forecasts,
+    certifications_collection, study_plans_collection, certification_simulations_collection
+)
+
+# Activity kinds tracked per day
+LESSONS = "lessons"
+COACH_TURNS = "coach_turns"
+FORECASTS = "forecasts"
+CERTIFICATIONS = "certifications"
+ROLLUP_KINDS = (LESSONS, COACH_TURNS, FORECASTS, CERTIFICATIONS)
+
+MAX_TOPIC_LENGTH = 80
+
+
+def _day(when: Optional[datetime] = None) -> str:
+    return (when or datetime.utcnow()).strftime("%Y-%m-%d")
+
+
+def _topic_key(topic: str) -> str:
+    """Make a topic usable as a MongoDB field name"""
+    key = topic.strip()[:MAX_TOPIC_LENGTH].replace(".", "．")
+    return key.lstrip("$") or "untitled"
+
+
+async def record_activity(
+    user_id: str,
+    kind: str,
+    topic: Optional[str] = None,
+    amount: int = 1,
+    when: Optional[datetime] = None
+):
+    """Increment (or with a negative amount, decrement) a user's daily counters"""
+    day = _day(when)
+    increments = {f"counts.{kind}": amount}
+    if topic:
+        increments[f"topics.{kind}.{_topic_key(topic)}"] = amount
+    try:
+        await user_daily_rollups_collection.update_one(
+            {"_id": f"{user_id}:{day}"},
+            {
+                "$inc": increments,
+                "$set": {"updated_at": datetime.utcnow()},
+                "$setOnInsert": {"user_id": user_id, "day": day}
+            },
+            upsert=True
+        )
+    except Exception as e:
+        print(f"Failed to update dashboard rollup: {e}")
+
+
+def _current_streak(active_days: List[str], today: date) -> int:
+    """Consecutive active days ending today (or yesterday, if today is still empty)"""
+    active = set(active_days)
+    cursor = today if today.isoformat() in active else today - timedelta(days=1)
+    streak = 0
+    while cursor.isoformat() in active:
+        streak += 1
+        cursor -= timedelta(days=1)
+    return streak
+
+
+async def get_dashboard(user_id: str) -> Dict[str, Any]:
+    """Totals, weekly trends, topic breakdown and streak from a user's rollups"""
+    totals = {kind: 0 for kind in ROLLUP_KINDS}
+    weeks: Dict[str, Dict[str, int]] = {}
+    topics: Dict[str, int] = {}
+    active_days = []
+
+    async for rollup in user_daily_rollups_collection.find({"user_id": user_id}).sort("day", 1):
+        counts = rollup.get("counts", {})
+        if not any(counts.get(kind, 0) > 0 for kind in ROLLUP_KINDS):
+            continue
+        active_days.append(rollup["day"])
+        year, week, _ = date.fromisoformat(rollup["day"]).isocalendar()
+        week_counts = weeks.setdefault(f"{year}-W{week:02d}", {kind: 0 for kind in ROLLUP_KINDS})
+        for kind in ROLLUP_KINDS:
+            totals[kind] += counts.get(kind, 0)
+            week_counts[kind] += counts.get(kind, 0)
+        for topic, count in rollup.get("topics", {}).get(LESSONS, {}).items():
+            topics[topic] = topics.get(topic, 0) + count
+
+    return {
+        "totals": totals,
+        "streak": _current_streak(active_days, datetime.utcnow().date()),
+        "last_activity": active_days[-1] if active_days else None,
+        "trends": [{"week": week, **counts} for week, counts in weeks.items()],
+        "topics": [
+            {"name": topic.replace("．", "."), "value": count}
+            for topic, count in sorted(topics.items(), key=lambda item: -item[1]) if count > 0
+        ]
+    }
+
+
+async def ensure_rollup_indexes():
+    await user_daily_rollups_collection.create_index([("user_id", 1), ("day", 1)])
+
+
+async def backfill_rollups():
+    """Rebuild all rollups from the source collections"""
+    await user_daily_rollups_collection.delete_many({})
+    sources = [
+        (lessons_collection, LESSONS, "topic"),
+        (career_coach_sessions, COACH_TURNS, None),
+        (skills_forecasts, FORECASTS, None),
+        (certifications_collection, CERTIFICATIONS, None),
+        (study_plans_collection, CERTIFICATIONS, "certification_name"),
+        (certification_simulations_collection, CERTIFICATIONS, "certification_name"),
+    ]
+    for collection, kind, topic_field in sources:
+        query = {"user_id": {"$exists": True}, "created_at": {"$exists": True}}
+        if collection is certifications_collection:
+            query["type"] = {"$ne": "profile"}
+        projection = {"user_id": 1, "created_at": 1}
+        if topic_field:
+            projection[topic_field] = 1
+        async for doc in collection.find(query, projection):
+            topic = doc.get(topic_field) if topic_field else None
+            await record_activity(doc["user_id"], kind, topic=topic, when=doc["created_at"])
+    await ensure_rollup_indexes()
+
+
+if __name__ == "__main__":
+    import sys
+    if "--backfill" in sys.argv:
+        asyncio.run(backfill_rollups())
+        print("Dashboard rollups rebuilt")
+    else:
+        print(__doc__)
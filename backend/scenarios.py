@@ -0,0 +1,94 @@
+"""
+Opening scenarios for the customer conversation simulator
+
+GET /simulation used to call GPT-4 with the fixed SIMULATION_PROMPT for every
+new session. Scenarios are now generated in the background into a pool
+(backend/pools.py) that the refiller keeps between its low- and high-water
+marks, and a session starts from one the user has not played before. Live
+generation is only used while the pool is empty, e.g. right after the first
+deploy, or when a user has played every scenario in it.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from backend.json_stream import parse_json, JSONParseError
+from backend.llm import ask_openai_async, JSON_OBJECT_FORMAT
+from backend.metrics import record_cache
+from backend.pools import Pool
+from backend.prompts import SIMULATION_PROMPT
+
+# All sessions share one pool; the prompt has no parameters
+SCENARIO_KEY = "default"
+# Scenarios generated concurrently per refill round, on top of the refill cap
+GENERATION_BATCH_SIZE = 4
+
+CHOICES_PER_SCENARIO = 3
+MAX_TEXT_LENGTH = 2000
+
+
+def validate_scenario(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The scenario trimmed to customerText and three choices, or None if it isn't playable"""
+    customer_text = item.get("customerText")
+    choices = item.get("choices")
+    if not isinstance(customer_text, str) or not customer_text.strip() or len(customer_text) > MAX_TEXT_LENGTH:
+        return None
+    if not isinstance(choices, list) or len(choices) != CHOICES_PER_SCENARIO:
+        return None
+    cleaned = []
+    for choice in choices:
+        if not isinstance(choice, dict):
+            return None
+        text, feedback = choice.get("text"), choice.get("feedback")
+        if not all(isinstance(value, str) and value.strip() and len(value) <= MAX_TEXT_LENGTH for value in (text, feedback)):
+            return None
+        cleaned.append({"text": text.strip(), "feedback": feedback.strip()})
+    if len({choice["text"].casefold() for choice in cleaned}) < CHOICES_PER_SCENARIO:
+        return None
+    return {"customerText": customer_text.strip(), "choices": cleaned}
+
+
+def validate_step(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Like validate_scenario, but a step may also end the conversation with no choices"""
+    if item.get("choices") == []:
+        customer_text = item.get("customerText")
+        if isinstance(customer_text, str) and customer_text.strip() and len(customer_text) <= MAX_TEXT_LENGTH:
+            return {"customerText": customer_text.strip(), "choices": []}
+        return None
+    return validate_scenario(item)
+
+
+async def _generate_one() -> Optional[Dict[str, Any]]:
+    result = await ask_openai_async(SIMULATION_PROMPT, response_format=JSON_OBJECT_FORMAT)
+    if result.startswith("[MOCKED RESPONSE"):
+        return None
+    try:
+        # Scenarios are kept in the pool, so a reply cut off by max_tokens is not closed and stored
+        parsed = parse_json(result, template="simulation_scenario", expect="{", allow_truncated=False)
+    except JSONParseError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+async def generate_scenarios(key: str) -> List[Dict[str, Any]]:
+    results = await asyncio.gather(*(_generate_one() for _ in range(GENERATION_BATCH_SIZE)), return_exceptions=True)
+    return [result for result in results if isinstance(result, dict)]
+
+
+scenario_pool = Pool(
+    "simulation_scenarios",
+    generate=generate_scenarios,
+    validate=validate_scenario,
+    identity=lambda scenario: scenario["customerText"],
+    low_water=30,
+    high_water=100,
+    max_size=1000,
+    refill_concurrency=1
+)
+
+
+async def take_scenario(user_id: str) -> Optional[Dict[str, Any]]:
+    """A scenario the user has not played, or None to generate live"""
+    scenarios = await scenario_pool.take(SCENARIO_KEY, user_id)
+    record_cache("simulation_scenarios", hit=scenarios is not None)
+    return scenarios[0] if scenarios else None
@@ -0,0 +1,203 @@
+"""
+Full-text search over a user's learning artifacts
+
+Each searchable collection has one MongoDB text index compounded with a
+user_id prefix, so every search query must (and does) filter on the user
+inside the index rather than after the fact. Text scores depend on each
+index's field weights, so they are only comparable within a collection:
+each collection's scores are divided by its top score before the results
+are merged and paginated, with snippets and highlight offsets.
+"""
+
+import re
+import asyncio
+from typing import Dict, Any, List, Optional
+
+from backend.db import (
+    lessons_collection, study_plans_collection, career_coach_sessions,
+    skills_forecasts, certifications_collection
+)
+
+MAX_PAGE_SIZE = 50
+# Page N reads the top N * page_size hits of every collection, so deep pages are refused
+MAX_PAGE = 20
+SNIPPET_LENGTH = 160
+
+# kind -> collection, indexed fields with weights, title field and frontend section
+SEARCH_SOURCES = {
+    "lesson": {
+        "collection": lessons_collection,
+        "fields": {"topic": 5, "lesson": 1},
+        "title": "topic",
+        "section": "saved-lessons",
+    },
+    "study_plan": {
+        "collection": study_plans_collection,
+        "fields": {"certification_name": 5, "study_plan": 1},
+        "title": "certification_name",
+        "section": "certifications",
+    },
+    "coach_session": {
+        "collection": career_coach_sessions,
+        "fields": {"response": 2, "history.content": 1},
+        "title": None,
+        "section": "coach",
+    },
+    "skills_forecast": {
+        "collection": skills_forecasts,
+        "fields": {"keywords": 3, "forecast": 1, "history": 1},
+        "title": None,
+        "section": "skills-forecast",
+    },
+    "certification": {
+        "collection": certifications_collection,
+        "fields": {"profile.role": 3, "profile.goals": 2, "recommendation": 1},
+        "title": "profile.role",
+        "section": "certifications",
+        # saved auto-fill profiles live in the same collection
+        "filter": {"type": {"$ne": "profile"}},
+    },
+}
+
+DEFAULT_TITLES = {
+    "lesson": "Micro-lesson",
+    "study_plan": "Study plan",
+    "coach_session": "Career coach session",
+    "skills_forecast": "Skills forecast",
+    "certification": "Certification recommendation",
+}
+
+
+async def ensure_search_indexes():
+    for source in SEARCH_SOURCES.values():
+        await source["collection"].create_index(
+            [("user_id", 1)] + [(field, "text") for field in source["fields"]],
+            weights=source["fields"],
+            name="user_text_search"
+        )
+
+
+class PageOutOfRange(ValueError):
+    pass
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, list):
+            value = " ".join(str(item.get(part, "")) for item in value if isinstance(item, dict))
+        elif isinstance(value, dict):
+            value = value.get(part)
+        else:
+            return None
+    return value
+
+
+def _query_terms(query: str) -> List[str]:
+    """Positive search terms (phrases unwrapped, negations dropped)"""
+    return [term for term in re.findall(r"-?[\w']+|\"[^\"]+\"", query)
+            if not term.startswith("-")]
+
+
+def _term_pattern(terms: List[str]) -> Optional[re.Pattern]:
+    """Match terms the way the text index stems them: on a shared word prefix"""
+    if not terms:
+        return None
+    parts = []
+    for term in terms:
+        term = term.strip('"')
+        stem = term if len(term) <= 5 else term[:max(5, len(term) - 3)]
+        parts.append(re.escape(stem) + r"\w*")
+    return re.compile(r"\b(?:" + "|".join(parts) + r")", re.IGNORECASE)
+
+
+def build_snippet(text: str, pattern: Optional[re.Pattern]) -> Dict[str, Any]:
+    """A window of text around the first match, with [start, end] highlight offsets"""
+    text = " ".join(str(text).split())
+    first = pattern.search(text) if pattern else None
+    start = 0
+    if first:
+        start = max(0, first.start() - SNIPPET_LENGTH // 3)
+    snippet = text[start:start + SNIPPET_LENGTH]
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + SNIPPET_LENGTH < len(text) else ""
+    highlights = []
+    if pattern:
+        highlights = [[m.start() + len(prefix), m.end() + len(prefix)] for m in pattern.finditer(snippet)]
+    return {"text": prefix + snippet + suffix, "highlights": highlights}
+
+
+async def _search_source(kind: str, user_id: str, query: str, limit: int, pattern) -> Dict[str, Any]:
+    source = SEARCH_SOURCES[kind]
+    collection = source["collection"]
+    text_filter = {"user_id": user_id, "$text": {"$search": query}, **source.get("filter", {})}
+    projection = {"score": {"$meta": "textScore"}, "created_at": 1}
+    projection.update({field.split(".")[0]: 1 for field in source["fields"]})
+
+    cursor = collection.find(text_filter, projection).sort([("score", {"$meta": "textScore"})]).limit(limit)
+    hits, total = await asyncio.gather(cursor.to_list(length=limit), collection.count_documents(text_filter))
+
+    results = []
+    for doc in hits:
+        body = next(
+            (value for value in (_get_path(doc, field) for field in source["fields"])
+             if value and pattern and pattern.search(str(value))),
+            _get_path(doc, list(source["fields"])[-1]) or ""
+        )
+        title = _get_path(doc, source["title"]) if source["title"] else None
+        results.append({
+            "id": str(doc["_id"]),
+            "kind": kind,
+            "section": source["section"],
+            "title": title or DEFAULT_TITLES[kind],
+            "score": doc["score"],
+            "created_at": doc.get("created_at"),
+            "snippet": build_snippet(body, pattern)
+        })
+    return {"results": results, "total": total}
+
+
+def _normalise_scores(results: List[Dict[str, Any]]):
+    """Scale one collection's text scores so its best hit scores 1"""
+    top = max((result["score"] for result in results), default=0)
+    if top > 0:
+        for result in results:
+            result["score"] = result["score"] / top
+
+
+async def search_user_artifacts(
+    user_id: str,
+    query: str,
+    page: int = 1,
+    page_size: int = 10,
+    kinds: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Ranked, paginated search across all of a user's learning artifacts"""
+    page = max(1, page)
+    if page > MAX_PAGE:
+        raise PageOutOfRange(f"page must be at most {MAX_PAGE}; refine the query instead")
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    kinds = [kind for kind in (kinds or SEARCH_SOURCES) if kind in SEARCH_SOURCES]
+    pattern = _term_pattern(_query_terms(query))
+
+    # Any page N result must be within the top N * page_size of its own collection
+    per_source_limit = page * page_size
+    per_source = await asyncio.gather(*[
+        _search_source(kind, user_id, query, per_source_limit, pattern) for kind in kinds
+    ])
+
+    for source in per_source:
+        _normalise_scores(source["results"])
+    merged = sorted(
+        (result for source in per_source for result in source["results"]),
+        key=lambda result: result["score"],
+        reverse=True
+    )
+    offset = (page - 1) * page_size
+    return {
+        "query": query,
+        "page": page,
+        "page_size": page_size,
+        "total": sum(source["total"] for source in per_source),
+        "results": merged[offset:offset + page_size]
+    }
@@ -0,0 +1,207 @@
+"""
+Speculative generation of the next simulation step
+
+The learner always answers a /simulation-step with one of the three choices
+it returned, so in speculative mode (the request carries a session_id) the
+continuation for every choice starts generating as soon as the step is
+returned, and each choice in the response carries an id. When the next
+request for the session picks one of them (by choice_id, or by sending its
+text as user_input), its continuation is served as soon as it is ready -
+usually at once - and the other branches are cancelled. A continuation is
+generated from the conversation so far with the customer's reply appended,
+in the turn shape documented on SimulationRequest.
+
+Speculative completions are low priority: at most SPECULATION_LLM_CONCURRENCY
+run at once, nested inside the global LLM limiter, and a branch is dropped
+instead of queued when interactive calls hold every LLM slot. Branches are
+streamed so cancelling one stops its generation; a cancelled branch that had
+started generating is counted as wasted, along with the tokens it produced.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.llm import ask_openai_stream, llm_limiter, JSON_OBJECT_FORMAT
+from backend.metrics import speculation_requests, speculation_branches, speculation_wasted_tokens
+from backend.prompts import SIMULATION_PROMPT
+
+SPECULATION_ENABLED = os.getenv("SIMULATION_SPECULATION_ENABLED", "1") == "1"
+# Speculative completions in flight at once, out of the LLM_MAX_CONCURRENCY total
+SPECULATION_LLM_CONCURRENCY = int(os.getenv("SPECULATION_LLM_CONCURRENCY", "2"))
+# Branches not picked within this many seconds are cancelled
+SPECULATION_TTL = float(os.getenv("SPECULATION_TTL", "300"))
+MAX_SPECULATIVE_SESSIONS = 1000
+
+speculation_limiter = asyncio.Semaphore(SPECULATION_LLM_CONCURRENCY)
+
+
+def build_step_prompt(history: List[Any], user_input: str) -> str:
+    history_text = ""
+    for turn in history:
+        if not isinstance(turn, dict) or 'speaker' not in turn or 'text' not in turn:
+            print("Malformed turn in history:", turn)
+            continue
+        history_text += f"{turn['speaker']}: {turn['text']}\n"
+        if 'user_choice' in turn:
+            history_text += f"Employee: {turn['user_choice']}\n"
+    return (
+        f"{SIMULATION_PROMPT}\n"
+        f"Conversation so far:\n{history_text}\n"
+        f"Employee's next response: {user_input}\n"
+        "Continue the scenario."
+    )
+
+
+def _choice_key(text: str) -> str:
+    return " ".join(str(text).casefold().split())
+
+
+def next_history(history: List[Any], user_input: str, customer_text: str) -> List[Any]:
+    """The history after user_input was answered with customer_text: the response
+    becomes the user_choice of the customer turn it answered"""
+    turns = list(history)
+    last = turns[-1] if turns else None
+    if isinstance(last, dict) and last.get("speaker") == "Customer" and "user_choice" not in last:
+        turns[-1] = {**last, "user_choice": user_input}
+    else:
+        turns.append({"speaker": "Employee", "text": user_input})
+    turns.append({"speaker": "Customer", "text": customer_text})
+    return turns
+
+
+class _Branch:
+    """One speculative continuation, generated in a worker thread"""
+
+    def __init__(self, choice: str, prompt: str):
+        self.choice = _choice_key(choice)
+        self.cancelled = threading.Event()
+        self.tokens = 0
+        self.started = False
+        # How the branch ended, once it has; each branch is counted under one outcome
+        self.outcome: Optional[str] = None
+        self._outcome_lock = threading.Lock()
+        self.task = asyncio.create_task(self._run(prompt))
+
+    def end(self, outcome: str) -> bool:
+        """Record the outcome unless the branch already ended; True if this call ended it"""
+        with self._outcome_lock:
+            if self.outcome is not None:
+                return False
+            self.outcome = outcome
+        speculation_branches.inc(outcome=outcome)
+        return True
+
+    async def _run(self, prompt: str) -> Optional[str]:
+        async with speculation_limiter:
+            if llm_limiter.locked():
+                self.end("skipped")
+                return None
+            async with llm_limiter:
+                self.started = True
+                return await asyncio.to_thread(self._generate, prompt)
+
+    def _generate(self, prompt: str) -> Optional[str]:
+        parts = []
+        stream = ask_openai_stream(prompt, template="simulation_step_speculative", response_format=JSON_OBJECT_FORMAT)
+        try:
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    return None
+                parts.append(chunk)
+                self.tokens += 1
+        finally:
+            stream.close()
+        text = "".join(parts).strip()
+        if not text or text.startswith("[MOCKED") or "[MOCKED STREAMING ERROR" in text:
+            self.end("failed")
+            return None
+        return text
+
+    def cancel(self):
+        self.cancelled.set()
+        self.task.cancel()
+        # Only a branch that got to generate cost anything; one still queued is just dropped
+        if self.end("wasted" if self.started else "cancelled") and self.started:
+            speculation_wasted_tokens.inc(self.tokens)
+
+
+# (user_id, session_id) -> (expires_at, {choice id: branch}), oldest first
+_sessions: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, _Branch]]]" = OrderedDict()
+
+
+def _drop(key: Tuple[str, str]):
+    entry = _sessions.pop(key, None)
+    if entry:
+        for branch in entry[1].values():
+            branch.cancel()
+
+
+def _expire():
+    now = time.monotonic()
+    while _sessions:
+        key, (expires_at, _) = next(iter(_sessions.items()))
+        if expires_at > now and len(_sessions) <= MAX_SPECULATIVE_SESSIONS:
+            break
+        _drop(key)
+
+
+def speculate(user_id: str, session_id: str, history: List[Any], user_input: str, step: Dict[str, Any]) -> Dict[str, Any]:
+    """Start generating the continuation of every choice in step, replacing the
+    session's previous branches; returns step with an id on each choice"""
+    key = (user_id, session_id)
+    _drop(key)
+    turns = next_history(history, user_input, step.get("customerText", ""))
+    branches = {}
+    choices = []
+    for choice_id, choice in enumerate(step.get("choices") or []):
+        text = choice.get("text") if isinstance(choice, dict) else None
+        if not text:
+            choices.append(choice)
+            continue
+        branches[choice_id] = _Branch(text, build_step_prompt(turns, text))
+        choices.append({**choice, "id": choice_id})
+    if branches:
+        _sessions[key] = (time.monotonic() + SPECULATION_TTL, branches)
+    _expire()
+    return {**step, "choices": choices}
+
+
+async def take_speculation(user_id: str, session_id: str, user_input: str, choice_id: Optional[int] = None) -> Optional[str]:
+    """The speculated reply for the chosen response, or None to generate it now.
+
+    The branch is picked by choice_id when the client sends one, otherwise by
+    user_input; either way user_input must be that choice's text, so a
+    free-text response never gets the continuation of a choice.
+    """
+    entry = _sessions.pop((user_id, session_id), None)
+    branch = None
+    if entry and entry[0] > time.monotonic():
+        branches = entry[1]
+        if choice_id is None:
+            choice_id = next((cid for cid, candidate in branches.items() if candidate.choice == _choice_key(user_input)), None)
+        if choice_id in branches and branches[choice_id].choice == _choice_key(user_input):
+            branch = branches.pop(choice_id)
+    if entry:
+        for other in entry[1].values():
+            other.cancel()
+    if branch is None:
+        speculation_requests.inc(result="miss")
+        return None
+
+    ready = branch.task.done()
+    try:
+        result = await branch.task
+    except Exception as e:
+        print(f"Speculative branch failed: {e}")
+        branch.end("failed")
+        result = None
+    if result is None:
+        speculation_requests.inc(result="miss")
+        return None
+    branch.end("used")
+    speculation_requests.inc(result="hit" if ready else "pending")
+    return result
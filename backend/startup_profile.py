@@ -0,0 +1,83 @@
+"""
+Startup profiler
+Imports a module in a fresh interpreter with `python -X importtime` and
+reports where the import time goes, grouped by top-level package.
+
+    python -m backend.startup_profile              # profile backend.app
+    python -m backend.startup_profile --top 30
+    VOICE_CLONING_ENABLED=0 python -m backend.startup_profile
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(module: str = "backend.app", env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Import `module` in a subprocess and return its import-time breakdown.
+
+    Returns total wall time of the import, the self time summed per
+    top-level package, and the set of every module that got imported.
+    """
+    run_env = dict(os.environ)
+    run_env.update(env or {})
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(REPO_ROOT),
+        env=run_env,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    packages: Dict[str, int] = {}
+    modules = set()
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.add(name)
+        top_level = name.split(".")[0]
+        packages[top_level] = packages.get(top_level, 0) + int(self_us)
+        if name == module:
+            total_us = int(cumulative_us)
+
+    breakdown = sorted(
+        ({"package": name, "self_ms": us / 1000} for name, us in packages.items()),
+        key=lambda row: row["self_ms"],
+        reverse=True
+    )
+    return {
+        "module": module,
+        "total_ms": total_us / 1000,
+        "packages": breakdown,
+        "modules": modules
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time breakdown for the backend")
+    parser.add_argument("module", nargs="?", default="backend.app")
+    parser.add_argument("--top", type=int, default=20, help="number of packages to show")
+    args = parser.parse_args()
+
+    profile = profile_imports(args.module)
+    print(f"import {profile['module']}: {profile['total_ms']:.1f} ms")
+    print(f"{'package':<32}{'self ms':>10}")
+    for row in profile["packages"][:args.top]:
+        print(f"{row['package']:<32}{row['self_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
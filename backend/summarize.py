@@ -0,0 +1,165 @@
+"""
+Map-reduce summarisation for long video transcripts
+
+Short transcripts are summarised in a single call. Long ones are split into
+sections on content-defined sentence boundaries, each section is summarised
+concurrently under the global LLM limiter, and the section summaries are
+merged in a reduce step. Section summaries are cached by content hash, so
+re-summarising an edited transcript only recomputes the sections that changed.
+"""
+
+import re
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import List, Dict, Any
+
+from backend.db import transcript_chunk_summaries_collection
+from backend.llm import ask_openai_async
+from backend.metrics import record_cache
+from backend.prompts import video_summary_prompt, video_chunk_summary_prompt, video_reduce_summary_prompt
+
+SUMMARY_MODEL = "gpt-4"
+# Bump when the section prompt changes so stale cached summaries are not reused
+CHUNK_PROMPT_VERSION = 1
+
+# Token budgets (estimated, see estimate_tokens)
+SINGLE_CALL_MAX_TOKENS = 3000
+CHUNK_TARGET_TOKENS = 1200
+CHUNK_MAX_TOKENS = 2000
+CHUNK_OVERLAP_TOKENS = 100
+REDUCE_MAX_TOKENS = 3000
+
+# Once a section reaches the target size it ends at the next sentence whose hash
+# is divisible by this, so boundaries move with the text rather than with
+# absolute positions and an edit only changes the sections around it
+BOUNDARY_MODULUS = 4
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English)"""
+    return max(1, len(text) // 4)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+
+
+def _is_boundary(sentence: str) -> bool:
+    digest = hashlib.sha1(sentence.encode("utf-8")).digest()
+    return digest[0] % BOUNDARY_MODULUS == 0
+
+
+def chunk_transcript(
+    transcript: str,
+    target_tokens: int = CHUNK_TARGET_TOKENS,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS
+) -> List[str]:
+    """Split a transcript into sections of roughly target_tokens with overlap.
+
+    Each section after the first starts with the last sentences of the
+    previous one (up to overlap_tokens) so ideas spanning a boundary keep
+    their context.
+    """
+    sections: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for sentence in split_sentences(transcript):
+        current.append(sentence)
+        current_tokens += estimate_tokens(sentence)
+        if current_tokens >= max_tokens or (current_tokens >= target_tokens and _is_boundary(sentence)):
+            sections.append(current)
+            current, current_tokens = [], 0
+    if current:
+        sections.append(current)
+
+    chunks = []
+    for i, section in enumerate(sections):
+        overlap: List[str] = []
+        if i > 0:
+            budget = overlap_tokens
+            for sentence in reversed(sections[i - 1]):
+                budget -= estimate_tokens(sentence)
+                if budget < 0:
+                    break
+                overlap.insert(0, sentence)
+        chunks.append(" ".join(overlap + section))
+    return chunks
+
+
+def chunk_cache_key(chunk: str) -> str:
+    payload = f"{CHUNK_PROMPT_VERSION}|{SUMMARY_MODEL}|{chunk}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _summarize_chunks(chunks: List[str]) -> Dict[str, Any]:
+    keys = [chunk_cache_key(chunk) for chunk in chunks]
+    cached = {}
+    async for doc in transcript_chunk_summaries_collection.find({"_id": {"$in": keys}}, {"summary": 1}):
+        cached[doc["_id"]] = doc["summary"]
+
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    record_cache("transcript_chunk_summary", hit=True, count=len(keys) - len(missing))
+    record_cache("transcript_chunk_summary", hit=False, count=len(missing))
+    results = await asyncio.gather(*[
+        ask_openai_async(
+            video_chunk_summary_prompt.format(index=i + 1, total=len(chunks), chunk=chunks[i]),
+            model=SUMMARY_MODEL
+        )
+        for i in missing
+    ])
+
+    for i, summary in zip(missing, results):
+        cached[keys[i]] = summary
+        if summary.startswith("[MOCKED"):
+            continue  # never cache placeholder or error output
+        await transcript_chunk_summaries_collection.update_one(
+            {"_id": keys[i]},
+            {"$set": {"summary": summary, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    return {
+        "summaries": [cached[key] for key in keys],
+        "cached": len(chunks) - len(missing)
+    }
+
+
+async def _reduce(summaries: List[str]) -> str:
+    """Merge section summaries, in groups if they don't fit one call"""
+    joined = "\n\n".join(summaries)
+    if estimate_tokens(joined) <= REDUCE_MAX_TOKENS or len(summaries) == 1:
+        return await ask_openai_async(
+            video_reduce_summary_prompt.format(summaries=joined), model=SUMMARY_MODEL
+        )
+
+    groups: List[List[str]] = [[]]
+    group_tokens = 0
+    for summary in summaries:
+        tokens = estimate_tokens(summary)
+        if groups[-1] and group_tokens + tokens > REDUCE_MAX_TOKENS:
+            groups.append([])
+            group_tokens = 0
+        groups[-1].append(summary)
+        group_tokens += tokens
+    if len(groups) == 1:
+        # Every summary fits alone but not together; halve to guarantee progress
+        middle = len(summaries) // 2
+        groups = [summaries[:middle], summaries[middle:]]
+    merged = await asyncio.gather(*[_reduce(group) for group in groups])
+    return await _reduce(list(merged))
+
+
+async def summarize_transcript(transcript: str) -> Dict[str, Any]:
+    """Summarise a transcript of any length into learning key points"""
+    if estimate_tokens(transcript) <= SINGLE_CALL_MAX_TOKENS:
+        summary = await ask_openai_async(video_summary_prompt.format(transcript=transcript), model=SUMMARY_MODEL)
+        return {"summary": summary, "chunks": 1, "cached_chunks": 0}
+
+    chunks = chunk_transcript(transcript)
+    mapped = await _summarize_chunks(chunks)
+    summary = await _reduce(mapped["summaries"])
+    return {"summary": summary, "chunks": len(chunks), "cached_chunks": mapped["cached"]}
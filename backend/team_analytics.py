@@ -0,0 +1,157 @@
+"""
+Team skill analytics computed locally
+
+Members become rows of a boolean member-by-skill matrix, so coverage,
+redundancy, single points of failure and performance distributions are a
+few NumPy reductions, fast enough for teams of thousands. The LLM is only
+given the compact summary from summarize_for_prompt to write the narrative.
+"""
+
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Tuple
+
+import numpy as np
+
+# Skills held by at least this many members are considered well covered
+WELL_COVERED_HOLDERS = 3
+HISTOGRAM_BINS = 5
+# How many skills the LLM summary lists in each section
+SUMMARY_SKILLS = 10
+
+
+def _normalise(skill: str) -> str:
+    return " ".join(str(skill).split())
+
+
+def build_skill_matrix(members: List[Dict[str, Any]]) -> Tuple[List[str], np.ndarray]:
+    """Skill names (first spelling seen, case-insensitive) and the members x skills matrix"""
+    index: Dict[str, int] = {}
+    names: List[str] = []
+    rows: List[int] = []
+    cols: List[int] = []
+    for row, member in enumerate(members):
+        for skill in member.get("skills") or []:
+            name = _normalise(skill)
+            if not name:
+                continue
+            key = name.casefold()
+            if key not in index:
+                index[key] = len(names)
+                names.append(name)
+            rows.append(row)
+            cols.append(index[key])
+    matrix = np.zeros((len(members), len(names)), dtype=bool)
+    matrix[rows, cols] = True
+    return names, matrix
+
+
+def _performance_scores(members: List[Dict[str, Any]]) -> np.ndarray:
+    return np.array(
+        [m["performance_score"] if m.get("performance_score") is not None else np.nan for m in members],
+        dtype=float
+    )
+
+
+def _distribution(scores: np.ndarray) -> Dict[str, Any]:
+    scored = scores[~np.isnan(scores)]
+    if scored.size == 0:
+        return {"scored_members": 0}
+    counts, edges = np.histogram(scored, bins=HISTOGRAM_BINS)
+    p25, median, p75 = np.percentile(scored, [25, 50, 75])
+    return {
+        "scored_members": int(scored.size),
+        "mean": round(float(scored.mean()), 2),
+        "median": round(float(median), 2),
+        "std": round(float(scored.std()), 2),
+        "min": round(float(scored.min()), 2),
+        "max": round(float(scored.max()), 2),
+        "p25": round(float(p25), 2),
+        "p75": round(float(p75), 2),
+        "histogram": [
+            {"from": round(float(low), 2), "to": round(float(high), 2), "count": int(count)}
+            for low, high, count in zip(edges[:-1], edges[1:], counts)
+        ],
+    }
+
+
+def compute_team_metrics(members: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Coverage, redundancy, single points of failure and performance for a team"""
+    skills, matrix = build_skill_matrix(members)
+    member_count = len(members)
+    holders = matrix.sum(axis=0)
+    skills_per_member = matrix.sum(axis=1)
+    order = np.argsort(-holders, kind="stable")
+
+    coverage = [
+        {"skill": skills[i], "members": int(holders[i]), "share": round(float(holders[i]) / member_count, 3)}
+        for i in order
+    ]
+
+    single_holders = np.flatnonzero(holders == 1)
+    holder_rows = matrix[:, single_holders].argmax(axis=0) if single_holders.size else []
+    single_points_of_failure = [
+        {"skill": skills[col], "member": members[row].get("name")}
+        for col, row in zip(single_holders, holder_rows)
+    ]
+
+    scores = _performance_scores(members)
+    scored = ~np.isnan(scores)
+    # Mean score of the scored holders of each skill
+    scored_holders = matrix[scored].sum(axis=0)
+    score_sums = matrix[scored].T.astype(float) @ scores[scored]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        skill_means = score_sums / scored_holders
+    skill_performance = [
+        {"skill": skills[i], "mean_score": round(float(skill_means[i]), 2), "scored_members": int(scored_holders[i])}
+        for i in order if scored_holders[i] > 0
+    ]
+
+    return {
+        "member_count": member_count,
+        "skill_count": len(skills),
+        "roles": dict(Counter(m.get("role") or "Unspecified" for m in members).most_common()),
+        "coverage": coverage,
+        "redundancy": {
+            "mean_holders_per_skill": round(float(holders.mean()), 2) if len(skills) else 0.0,
+            "median_holders_per_skill": float(np.median(holders)) if len(skills) else 0.0,
+            "well_covered_skills": int((holders >= WELL_COVERED_HOLDERS).sum()),
+            "mean_skills_per_member": round(float(skills_per_member.mean()), 2) if member_count else 0.0,
+            "members_without_skills": int((skills_per_member == 0).sum()),
+        },
+        "single_points_of_failure": single_points_of_failure,
+        "performance": _distribution(scores),
+        "skill_performance": skill_performance,
+    }
+
+
+def _skill_list(entries: Iterable[Dict[str, Any]], field: str) -> str:
+    return ", ".join(f"{e['skill']} ({e[field]})" for e in entries) or "none"
+
+
+def summarize_for_prompt(stats: Dict[str, Any]) -> str:
+    """A few lines of numbers for the narrative prompt, independent of team size"""
+    redundancy = stats["redundancy"]
+    performance = stats["performance"]
+    spof = stats["single_points_of_failure"]
+    lines = [
+        f"Members: {stats['member_count']}; distinct skills: {stats['skill_count']}",
+        "Roles: " + (", ".join(f"{role} ({count})" for role, count in list(stats["roles"].items())[:SUMMARY_SKILLS]) or "none"),
+        "Most covered skills (members): " + _skill_list(stats["coverage"][:SUMMARY_SKILLS], "members"),
+        "Least covered skills (members): " + _skill_list(stats["coverage"][-SUMMARY_SKILLS:][::-1], "members"),
+        f"Holders per skill: mean {redundancy['mean_holders_per_skill']}, median {redundancy['median_holders_per_skill']}; "
+        f"{redundancy['well_covered_skills']} skills held by {WELL_COVERED_HOLDERS}+ members; "
+        f"{redundancy['members_without_skills']} members list no skills",
+        f"Single points of failure: {len(spof)} skills held by one member"
+        + (": " + ", ".join(f"{s['skill']} ({s['member']})" for s in spof[:SUMMARY_SKILLS]) if spof else ""),
+    ]
+    if performance["scored_members"]:
+        lines.append(
+            f"Performance scores ({performance['scored_members']} scored): mean {performance['mean']}, "
+            f"median {performance['median']}, std {performance['std']}, range {performance['min']}-{performance['max']}"
+        )
+        by_score = sorted(stats["skill_performance"], key=lambda e: e["mean_score"])
+        lines.append("Lowest scoring skills (mean score): " + _skill_list(by_score[:5], "mean_score"))
+        lines.append("Highest scoring skills (mean score): " + _skill_list(by_score[-5:][::-1], "mean_score"))
+    else:
+        lines.append("Performance scores: none recorded")
+    return "\n".join(lines)
@@ -0,0 +1,112 @@
+"""
+Content fingerprints for team analytics
+
+Each team document carries members_hash, the XOR of a hash of every
+member's analytics-relevant fields. XOR is order independent and its own
+inverse, so member writes update it from just the documents they touched,
+without rereading the team. The analytics fingerprint combines it with the
+team's own fields and the requested metrics; a stored analysis with the
+same fingerprint was computed from identical inputs and can be served as is.
+
+members_hash is updated with compare-and-set on the value the caller read
+during its ownership check, which needs no extra round trip in the common
+case and works on every MongoDB backend we run against (including
+mongomock). Teams created before fingerprints existed have no members_hash;
+it is computed from the members the first time analytics runs.
+"""
+
+import json
+import hashlib
+from typing import Any, Dict, Iterable, List
+
+from bson.int64 import Int64
+
+from backend.db import teams_collection, team_analytics_collection
+
+MEMBER_FIELDS = ("name", "role", "email", "skills", "performance_score")
+TEAM_FIELDS = ("name", "description")
+# Compare-and-set attempts before giving up and dropping the hash for a recompute
+MAX_HASH_RETRIES = 5
+
+
+def _digest(value: Any) -> bytes:
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).digest()
+
+
+def member_hash(member: Dict[str, Any]) -> int:
+    """Signed 64-bit hash of one member; the _id keeps identical members from cancelling out"""
+    fields = {field: member.get(field) for field in MEMBER_FIELDS}
+    fields["_id"] = str(member["_id"])
+    return int.from_bytes(_digest(fields)[:8], "big", signed=True)
+
+
+def combine_hashes(hashes: Iterable[int]) -> int:
+    combined = 0
+    for value in hashes:
+        combined ^= value
+    return combined
+
+
+def members_hash(members: Iterable[Dict[str, Any]]) -> int:
+    return combine_hashes(member_hash(member) for member in members)
+
+
+def analytics_fingerprint(team: Dict[str, Any], team_members_hash: int, metrics: List[str]) -> str:
+    return _digest({
+        "team": {field: team.get(field) for field in TEAM_FIELDS},
+        "members": int(team_members_hash),
+        "metrics": sorted(set(metrics)),
+    }).hex()
+
+
+async def ensure_team_indexes():
+    await team_analytics_collection.create_index([("team_id", 1), ("fingerprint", 1), ("created_at", -1)])
+
+
+async def apply_member_changes(
+    team: Dict[str, Any],
+    added: Iterable[Dict[str, Any]] = (),
+    removed: Iterable[Dict[str, Any]] = ()
+):
+    """Fold member writes into the team's members_hash; call after the write.
+
+    team is the document read by the route's ownership check; its
+    members_hash is kept current so it can be passed again for further
+    writes. An update is a removal of the old member document plus an
+    addition of the new one.
+    """
+    delta = combine_hashes(member_hash(member) for member in (*added, *removed))
+    current = team.get("members_hash")
+    if delta == 0 or current is None:
+        return
+    for _ in range(MAX_HASH_RETRIES):
+        result = await teams_collection.update_one(
+            {"_id": team["_id"], "members_hash": current},
+            {"$set": {"members_hash": Int64(current ^ delta)}}
+        )
+        if result.matched_count:
+            team["members_hash"] = current ^ delta
+            return
+        latest = await teams_collection.find_one({"_id": team["_id"]}, {"members_hash": 1})
+        if not latest or latest.get("members_hash") is None:
+            return
+        current = latest["members_hash"]
+    print(f"Too much contention on members_hash of team {team['_id']}, dropping it for a recompute")
+    await drop_members_hash(team)
+
+
+async def drop_members_hash(team: Dict[str, Any]):
+    """Forget a hash that can no longer be kept exact; analytics recomputes it"""
+    team.pop("members_hash", None)
+    await teams_collection.update_one({"_id": team["_id"]}, {"$unset": {"members_hash": ""}})
+
+
+async def store_members_hash(team: Dict[str, Any], members: List[Dict[str, Any]]) -> int:
+    """Compute members_hash for a team that lacks one and save it"""
+    value = members_hash(members)
+    await teams_collection.update_one(
+        {"_id": team["_id"], "members_hash": {"$exists": False}},
+        {"$set": {"members_hash": Int64(value)}}
+    )
+    return value
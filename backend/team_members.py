@@ -0,0 +1,223 @@
+"""
+Bulk team member writes and streaming member import
+
+Each bulk call checks team ownership once (in the route) and writes all its
+members in a single round trip. members_hash (see backend.team_fingerprint)
+is folded forward from the documents written; when a concurrent writer gets
+in the way and the exact delta is unknown, the hash is dropped so the next
+analytics run recomputes it.
+
+Imports read the request body as it arrives, CSV or NDJSON, validate each
+row and write in batches, reporting the rows that failed instead of
+rejecting the whole file.
+"""
+
+import csv
+import json
+import codecs
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Tuple, Type
+
+from bson import ObjectId
+from pydantic import BaseModel, ValidationError
+from pymongo import InsertOne, UpdateOne
+
+from backend.db import team_members_collection
+from backend.team_fingerprint import MEMBER_FIELDS, apply_member_changes, drop_members_hash
+
+MAX_BULK_MEMBERS = 5000
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+# Separators accepted inside the CSV skills column
+SKILL_SEPARATORS = (";", "|")
+
+CSV_FORMAT = "csv"
+NDJSON_FORMAT = "ndjson"
+
+
+class BulkTooLarge(ValueError):
+    pass
+
+
+def _check_size(items: List[Any]):
+    if len(items) > MAX_BULK_MEMBERS:
+        raise BulkTooLarge(f"At most {MAX_BULK_MEMBERS} members can be changed in one request")
+
+
+def _member_doc(team_id: str, member: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "team_id": team_id,
+        "name": member["name"],
+        "role": member["role"],
+        "email": member["email"],
+        "skills": member["skills"],
+        "performance_score": member.get("performance_score"),
+        "created_at": now
+    }
+
+
+async def add_members(team: Dict[str, Any], members: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Insert validated members (TeamMember dicts) and return the stored documents"""
+    _check_size(members)
+    if not members:
+        return []
+    now = datetime.utcnow()
+    team_id = str(team["_id"])
+    docs = [_member_doc(team_id, member, now) for member in members]
+    await team_members_collection.bulk_write([InsertOne(doc) for doc in docs], ordered=False)
+    await apply_member_changes(team, added=docs)
+    return docs
+
+
+def _parse_ids(member_ids: List[str]) -> Tuple[List[ObjectId], List[str]]:
+    valid, invalid = [], []
+    for member_id in member_ids:
+        if ObjectId.is_valid(member_id):
+            valid.append(ObjectId(member_id))
+        else:
+            invalid.append(member_id)
+    return valid, invalid
+
+
+async def update_members(team: Dict[str, Any], updates: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply {member_id: fields} updates; returns counts and the ids not found"""
+    _check_size(list(updates))
+    team_id = str(team["_id"])
+    ids, not_found = _parse_ids(list(updates))
+    current = {
+        str(doc["_id"]): doc
+        async for doc in team_members_collection.find({"_id": {"$in": ids}, "team_id": team_id})
+    }
+    not_found += [str(member_id) for member_id in ids if str(member_id) not in current]
+
+    operations, before, after = [], [], []
+    for member_id, doc in current.items():
+        fields = updates[member_id]
+        # Only match the document as it was read, so the hash delta below stays exact
+        expected = {field: doc.get(field) for field in MEMBER_FIELDS}
+        operations.append(UpdateOne({"_id": doc["_id"], "team_id": team_id, **expected}, {"$set": fields}))
+        before.append(doc)
+        after.append({**doc, **fields})
+
+    matched = 0
+    if operations:
+        result = await team_members_collection.bulk_write(operations, ordered=False)
+        matched = result.matched_count
+        if matched == len(operations):
+            await apply_member_changes(team, added=after, removed=before)
+        else:
+            await drop_members_hash(team)
+    return {"updated": matched, "conflicts": len(operations) - matched, "not_found": not_found}
+
+
+async def remove_members(team: Dict[str, Any], member_ids: List[str]) -> Dict[str, Any]:
+    """Delete members by id; returns the count and the ids not found"""
+    _check_size(member_ids)
+    team_id = str(team["_id"])
+    ids, not_found = _parse_ids(member_ids)
+    docs = await team_members_collection.find({"_id": {"$in": ids}, "team_id": team_id}).to_list(length=None)
+    found = {doc["_id"] for doc in docs}
+    not_found += [str(member_id) for member_id in ids if member_id not in found]
+    if not docs:
+        return {"removed": 0, "not_found": not_found}
+
+    result = await team_members_collection.delete_many({"_id": {"$in": list(found)}, "team_id": team_id})
+    if result.deleted_count == len(docs):
+        await apply_member_changes(team, removed=docs)
+    else:
+        # Someone else removed some of them first and already folded those out
+        await drop_members_hash(team)
+    return {"removed": result.deleted_count, "not_found": not_found}
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+async def _csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    header = None
+    record = ""
+    row_number = 0
+    async for line in _lines(chunks):
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue  # a quoted field continues on the next line
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        row_number += 1
+        row = {name: value.strip() for name, value in zip(header, values)}
+        if row.get("skills") is not None:
+            skills = row["skills"]
+            for separator in SKILL_SEPARATORS:
+                skills = skills.replace(separator, ",")
+            row["skills"] = [skill.strip() for skill in skills.split(",") if skill.strip()]
+        if not row.get("performance_score"):
+            row.pop("performance_score", None)
+        yield row_number, row
+    if record:
+        row_number += 1
+        yield row_number, ValueError("Unterminated quoted field")
+
+
+async def _ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    row_number = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, e
+            continue
+        yield row_number, row if isinstance(row, dict) else ValueError("Row is not a JSON object")
+
+
+def _validation_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+async def import_members(
+    team: Dict[str, Any],
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    model: Type[BaseModel]
+) -> Dict[str, Any]:
+    """Validate rows against model as they stream in and insert them in batches"""
+    rows = _csv_rows(chunks) if fmt == CSV_FORMAT else _ndjson_rows(chunks)
+    imported, failed = 0, 0
+    errors: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+    async for row_number, row in rows:
+        try:
+            if isinstance(row, Exception):
+                raise row
+            batch.append(model(**row).dict())
+        except (ValidationError, ValueError, TypeError) as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": row_number, "error": _validation_message(e)})
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            imported += len(await add_members(team, batch))
+            batch = []
+    if batch:
+        imported += len(await add_members(team, batch))
+    return {"imported": imported, "failed": failed, "errors": errors}
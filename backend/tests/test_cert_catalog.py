@@ -0,0 +1,45 @@
+import json
+
+from backend.cert_catalog import CATALOG_PATH, Catalog, get_catalog, recommend_certifications
+
+def test_catalog_is_consistent():
+    data = json.loads(CATALOG_PATH.read_text())
+    ids = [cert["id"] for cert in data["certifications"]]
+    assert len(ids) == len(set(ids))
+    for cert in data["certifications"]:
+        assert cert["level"] in data["levels"]
+        assert cert["skills"]
+        assert all(prerequisite in ids for prerequisite in cert["prerequisites"])
+
+def test_aliases_and_mentions_reach_the_index():
+    catalog = get_catalog()
+    assert catalog.skill_key("K8s") == "kubernetes"
+    assert "kubernetes" in catalog.mentioned("Goal: run K8s clusters")
+    assert "java" not in catalog.mentioned("javascript developer")
+
+def test_skills_and_level_rank_candidates():
+    candidates = recommend_certifications({
+        "role": "Cloud engineer",
+        "skills": ["AWS", "networking", "cloud security"],
+        "goals": "Design highly available systems",
+        "experience_level": "intermediate",
+    })
+    assert candidates[0]["id"] == "aws-saa"
+    assert "networking" in candidates[0]["matched_skills"]
+    assert candidates == sorted(candidates, key=lambda c: -c["score"])
+
+def test_unrelated_profile_has_no_candidates():
+    assert recommend_certifications({"role": "Chef", "skills": ["cooking"], "goals": "", "experience_level": "beginner"}) == []
+
+def test_prerequisites_are_named():
+    catalog = Catalog({
+        "version": "test", "levels": ["beginner", "intermediate", "advanced"],
+        "certifications": [
+            {"id": "a", "name": "A", "vendor": "V", "level": "beginner", "skills": ["x"], "prerequisites": []},
+            {"id": "b", "name": "B", "vendor": "V", "level": "advanced", "skills": ["x", "y"], "prerequisites": ["a"]},
+        ],
+    })
+    candidates = catalog.candidates(["x"], "beginner")
+    assert [c["id"] for c in candidates] == ["a", "b"]
+    assert candidates[1]["prerequisites"] == ["A"]
+    assert candidates[1]["missing_skills"] == ["y"]
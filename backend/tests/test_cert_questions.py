@@ -0,0 +1,26 @@
+import json
+
+from backend.cert_questions import parse_questions, validate_question, format_simulation
+from backend.pools import fingerprint
+
+QUESTION = {"question": "How would you design a multi-region failover?", "answer": "Route 53 health checks", "follow_up": "What is the RTO?", "tip": "Mention costs"}
+
+def test_parse_questions_accepts_fenced_and_wrapped_replies():
+    reply = json.dumps([QUESTION, "stray"])
+    assert parse_questions(reply) == [QUESTION]
+    assert parse_questions(f"```json\n{reply}\n```") == [QUESTION]
+    assert parse_questions(json.dumps({"questions": [QUESTION]})) == [QUESTION]
+    assert parse_questions("Sorry, I can't help with that") == []
+
+def test_validate_question_requires_every_field():
+    assert validate_question({**QUESTION, "tip": "  Mention costs "})["tip"] == "Mention costs"
+    assert validate_question({**QUESTION, "tip": ""}) is None
+    assert validate_question({key: value for key, value in QUESTION.items() if key != "answer"}) is None
+
+def test_duplicates_share_a_fingerprint():
+    assert fingerprint("How would you  design a multi-region failover?") == fingerprint(QUESTION["question"].upper())
+
+def test_format_simulation_numbers_questions():
+    text = format_simulation("AWS Solutions Architect", [QUESTION, QUESTION])
+    assert "Question 2: How would you design" in text
+    assert text.startswith("Certification interview simulation: AWS Solutions Architect")
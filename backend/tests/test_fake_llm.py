@@ -0,0 +1,48 @@
+import json
+import openai
+from fastapi.testclient import TestClient
+from backend.fake_llm_server import create_app, FakeLLMSettings
+from backend.prompts import SIMULATION_PROMPT, CLASSIFY_UNKNOWN_INTENT, video_quiz_prompt
+
+def _client(**overrides):
+    settings = dict(seed=7, ttft_ms=0, token_delay_ms=0, rate_limit_rate=0)
+    settings.update(overrides)
+    return TestClient(create_app(FakeLLMSettings(**settings)))
+
+def _complete(client, prompt, **extra):
+    return client.post("/v1/chat/completions", json={
+        "model": "gpt-4", "messages": [{"role": "user", "content": prompt}], **extra
+    })
+
+def _content(response):
+    return response.json()["choices"][0]["message"]["content"]
+
+def test_replies_match_prompt_formats():
+    client = _client()
+    simulation = json.loads(_content(_complete(client, SIMULATION_PROMPT)))
+    assert simulation["customerText"] and len(simulation["choices"]) == 3
+
+    intent = json.loads(_content(_complete(client, CLASSIFY_UNKNOWN_INTENT.format(user_input="book a room"))))
+    assert set(intent) == {"intent", "module_match", "new_feature", "confidence", "follow_up_question"}
+
+    quiz = json.loads(_content(_complete(client, video_quiz_prompt.format(summary="Teamwork", num_questions=5))))
+    assert len(quiz) == 5 and all(q["answer"] in "ABCD" for q in quiz)
+
+def test_same_seed_is_reproducible():
+    first = [_content(_complete(_client(), f"Tell me about topic {i}")) for i in range(3)]
+    second = [_content(_complete(_client(), f"Tell me about topic {i}")) for i in range(3)]
+    assert first == second
+    assert _content(_complete(_client(seed=8), "Tell me about topic 0")) != first[0]
+
+def test_rate_limits_with_429():
+    response = _complete(_client(rate_limit_rate=1.0), "Hello")
+    assert response.status_code == 429
+    assert response.json()["error"]["code"] == "rate_limit_exceeded"
+
+def test_openai_client_streams_from_fake_server():
+    client = openai.OpenAI(api_key="test", base_url="http://testserver/v1", http_client=_client())
+    stream = client.chat.completions.create(
+        model="gpt-4", messages=[{"role": "user", "content": SIMULATION_PROMPT}], stream=True
+    )
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+    assert json.loads(text)["choices"]
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from backend.json_stream import JSONParseError, JSONStreamParser, parse_json, repair_json
+from backend.metrics import llm_json_parse
+
+STEP = {
+    "customerText": "I was charged twice, {again}, and \"nobody\" called back.",
+    "choices": [{"text": "Refund, now]", "feedback": "Good"}, {"text": "Escalate", "feedback": "Fine"}],
+    "score": 3,
+    "final": False,
+}
+
+def test_repair_handles_fences_prose_and_trailing_commas():
+    assert json.loads(repair_json('```json\n{"a": [1, 2,],}\n```')) == {"a": [1, 2]}
+    assert json.loads(repair_json('Here is the quiz:\n[{"q": "x, ]"}]\nLet me know!')) == [{"q": "x, ]"}]
+
+def test_repair_closes_truncated_replies():
+    assert json.loads(repair_json('{"customerText": "Hello", "choices": [{"text": "A"}, {"text": "B')) == {
+        "customerText": "Hello", "choices": [{"text": "A"}, {"text": "B"}]
+    }
+    assert json.loads(repair_json('{"a": 1, "b":')) == {"a": 1, "b": None}
+
+def test_repair_skips_bracketed_prose_and_prefers_the_expected_value():
+    assert json.loads(repair_json('[see below]\n{"a": 1,}')) == {"a": 1}
+    assert json.loads(repair_json('text [1] then {"a": 1}', expect="{")) == {"a": 1}
+    assert json.loads(repair_json('text [1] then {"a": 1}')) == [1]
+    with pytest.raises(JSONParseError):
+        repair_json("[MOCKED RESPONSE] [no JSON] here")
+
+def test_parse_json_can_refuse_truncated_replies():
+    before = llm_json_parse.value(template="test", result="truncated")
+    assert parse_json('Sure: {"a": 1,} ok', template="test", allow_truncated=False) == {"a": 1}
+    with pytest.raises(JSONParseError):
+        parse_json('[{"question": "Wh', template="test", allow_truncated=False)
+    assert llm_json_parse.value(template="test", result="truncated") == before + 1
+
+def test_parse_json_counts_results():
+    before = {result: llm_json_parse.value(template="test", result=result) for result in ("ok", "repaired", "failed")}
+    assert parse_json('{"a": 1}', template="test") == {"a": 1}
+    assert parse_json('Sure! {"a": 1}', template="test") == {"a": 1}
+    with pytest.raises(JSONParseError):
+        parse_json("[MOCKED RESPONSE] no JSON here", template="test")
+    for result in before:
+        assert llm_json_parse.value(template="test", result=result) == before[result] + 1
+
+def test_stream_parser_emits_members_as_they_complete():
+    text = "```json\n" + json.dumps(STEP) + "\n```"
+    parser = JSONStreamParser()
+    emitted = []
+    for i in range(0, len(text), 5):
+        emitted.extend((i, name, value) for name, value in parser.feed(text[i:i + 5]))
+    assert [(name, value) for _, name, value in emitted] == list(STEP.items())
+    # customerText is available long before the reply ends
+    assert emitted[0][0] < len(text) / 2
+    assert parser.done and parser.close() == STEP
+
+def test_stream_parser_emits_array_elements():
+    parser = JSONStreamParser()
+    assert parser.feed('[{"q": 1}, "two", ') == [(0, {"q": 1}), (1, "two")]
+    assert parser.feed('3, null]') == [(2, 3), (3, None)]
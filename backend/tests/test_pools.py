@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import backend.pools as pools
+from backend.pools import Pool
+
+@pytest.fixture
+def db(monkeypatch):
+    database = AsyncMongoMockClient()["test"]
+    for name in ("pool_items_collection", "pool_seen_collection", "pool_keys_collection"):
+        monkeypatch.setattr(pools, name, database[name])
+    return database
+
+def _pool(**kwargs):
+    async def generate(key):
+        return []
+    pool = Pool("test", generate=generate, validate=lambda item: item, identity=lambda item: item["text"], **kwargs)
+    pool.refills = []
+    pool.schedule_refill = lambda key, target=None: pool.refills.append((key, target))
+    return pool
+
+def test_take_serves_each_user_unseen_items_until_exhausted(db):
+    pool = _pool(low_water=0)
+
+    async def run():
+        await pool._store("k", [{"text": "a"}, {"text": "b"}, {"text": "c"}])
+        first = await pool.take("K", "u1", 2)
+        second = await pool.take("k", "u1", 2)
+        last = await pool.take("k", "u1")
+        exhausted = await pool.take("k", "u1")
+        other_user = await pool.take("k", "u2", 3)
+        return first, second, last, exhausted, other_user
+
+    first, second, last, exhausted, other_user = asyncio.run(run())
+    assert len(first) == 2
+    assert second is None  # only one unseen item left
+    assert {item["text"] for item in first + last} == {"a", "b", "c"}
+    assert exhausted is None
+    assert {item["text"] for item in other_user} == {"a", "b", "c"}
+
+def test_refill_waits_for_min_demand(db):
+    pool = _pool(low_water=5, high_water=10, min_demand=3)
+
+    async def run():
+        results = []
+        for _ in range(3):
+            results.append((await pool.take("k", "u1"), list(pool.refills)))
+        return results
+
+    results = asyncio.run(run())
+    assert [served for served, _ in results] == [None, None, None]
+    assert [refills for _, refills in results] == [[], [], [("k", 10)]]
+
+def test_claim_fails_while_another_lease_is_live(db):
+    pool = _pool()
+
+    async def run():
+        first = await pool._claim("k")
+        second = await pool._claim("k")
+        await db.pool_keys_collection.update_one(
+            {"_id": "test:k"}, {"$set": {"refill_lease_until": datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        expired = await pool._claim("k")
+        await pool._release("k")
+        released = await pool._claim("k")
+        return first, second, expired, released
+
+    assert asyncio.run(run()) == (True, False, True, True)
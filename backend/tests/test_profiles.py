@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import backend.profiles as profiles
+from backend.profiles import get_profile, save_profile, migrate_profiles
+
+PROFILE = {"role": "Engineer", "experience_level": "Senior", "skills": ["Python"], "goals": "Cloud"}
+
+@pytest.fixture
+def db(monkeypatch):
+    database = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(profiles, "certification_profiles_collection", database.certification_profiles)
+    monkeypatch.setattr(profiles, "certifications_collection", database.certifications)
+    monkeypatch.setattr(profiles, "_cache", profiles.OrderedDict())
+    return database
+
+def test_saved_profile_is_read_back(db):
+    async def run():
+        missing = await get_profile("u1")
+        await save_profile("u1", "a@x", PROFILE)
+        return missing, await get_profile("u1")
+
+    missing, profile = asyncio.run(run())
+    assert missing is None
+    assert profile == PROFILE
+
+def test_cached_profile_expires(db):
+    async def run():
+        await save_profile("u1", "a@x", PROFILE)
+        # A save on another worker
+        await db.certification_profiles.update_one({"user_id": "u1"}, {"$set": {"profile": {**PROFILE, "goals": "AI"}}})
+        cached = await get_profile("u1")
+        profiles._cache["u1"] = (0, cached)  # past PROFILE_CACHE_TTL
+        return cached, await get_profile("u1")
+
+    cached, fresh = asyncio.run(run())
+    assert cached["goals"] == "Cloud"
+    assert fresh["goals"] == "AI"
+
+def test_legacy_profile_is_read_until_migrated(db):
+    async def run():
+        await db.certifications.insert_one({"user_id": "u1", "type": "profile", "profile": PROFILE})
+        return await get_profile("u1")
+
+    assert asyncio.run(run()) == PROFILE
+
+def test_migration_moves_legacy_profiles_without_overwriting_newer_ones(db):
+    newer = {**PROFILE, "goals": "AI"}
+
+    async def run():
+        await db.certifications.insert_many([
+            {"user_id": "u1", "user_email": "a@x", "type": "profile", "profile": PROFILE},
+            {"user_id": "u2", "type": "profile", "profile": PROFILE},
+            {"user_id": "u3", "type": "profile"},
+            {"user_id": "u1", "recommendation": "Take AWS SAA"},
+        ])
+        await save_profile("u2", "b@x", newer)
+        moved = await migrate_profiles()
+        docs = await db.certification_profiles.find({}, {"_id": 0, "user_id": 1, "profile": 1}).to_list(length=None)
+        remaining = await db.certifications.find({}, {"_id": 0}).to_list(length=None)
+        return moved, docs, remaining
+
+    moved, docs, remaining = asyncio.run(run())
+    assert moved == 2
+    assert sorted(docs, key=lambda doc: doc["user_id"]) == [
+        {"user_id": "u1", "profile": PROFILE},
+        {"user_id": "u2", "profile": newer},
+    ]
+    assert remaining == [{"user_id": "u1", "recommendation": "Take AWS SAA"}]
@@ -0,0 +1,33 @@
+import random
+
+from backend.fake_llm_server import FakeLLMSettings, generate_reply
+from backend.json_stream import parse_json
+from backend.prompts import SIMULATION_PROMPT
+from backend.scenarios import validate_scenario, validate_step
+
+SCENARIO = {
+    "customerText": "My order arrived damaged and I need it today.",
+    "choices": [
+        {"text": "Apologise and offer a replacement", "feedback": "Good"},
+        {"text": "Ask for the order number", "feedback": "Fine"},
+        {"text": "Explain the returns policy", "feedback": "Weak"},
+    ],
+}
+
+def test_generated_scenarios_validate():
+    reply = generate_reply(SIMULATION_PROMPT, random.Random(3), 512, FakeLLMSettings())
+    assert validate_scenario(parse_json(f"```json\n{reply}\n```")) is not None
+
+def test_validate_scenario_rejects_unplayable_replies():
+    assert validate_scenario(SCENARIO) == SCENARIO
+    assert validate_scenario({**SCENARIO, "customerText": " "}) is None
+    assert validate_scenario({**SCENARIO, "choices": SCENARIO["choices"][:2]}) is None
+    assert validate_scenario({**SCENARIO, "choices": [SCENARIO["choices"][0]] * 3}) is None
+    assert validate_scenario({**SCENARIO, "choices": [{"text": "Only text"}] * 3}) is None
+
+def test_validate_step_allows_a_final_step_without_choices():
+    assert validate_step(SCENARIO) == SCENARIO
+    assert validate_step({"customerText": " Thanks, that fixed it! ", "choices": []}) == {"customerText": "Thanks, that fixed it!", "choices": []}
+    assert validate_step({"customerText": "", "choices": []}) is None
+    assert validate_step({"customerText": "Hi"}) is None
+    assert validate_step({**SCENARIO, "choices": SCENARIO["choices"][:1]}) is None
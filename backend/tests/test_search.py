@@ -0,0 +1,23 @@
+import asyncio
+
+import backend.search as search
+from backend.search import search_user_artifacts
+
+def _hit(kind, name, score):
+    return {"id": name, "kind": kind, "score": score}
+
+def test_scores_are_normalised_per_collection_before_merging(monkeypatch):
+    # Lessons weight their title 5x, so their raw scores run far higher than coach sessions'
+    raw = {
+        "lesson": [_hit("lesson", "l1", 12.0), _hit("lesson", "l2", 6.0), _hit("lesson", "l3", 5.5)],
+        "coach_session": [_hit("coach_session", "c1", 1.2), _hit("coach_session", "c2", 1.1)],
+    }
+
+    async def fake_source(kind, user_id, query, limit, pattern):
+        return {"results": [dict(hit) for hit in raw[kind][:limit]], "total": len(raw[kind])}
+
+    monkeypatch.setattr(search, "_search_source", fake_source)
+    page = asyncio.run(search_user_artifacts("u1", "negotiation", page_size=3, kinds=["lesson", "coach_session"]))
+    assert page["total"] == 5
+    assert [result["id"] for result in page["results"]] == ["l1", "c1", "c2"]
+    assert page["results"][0]["score"] == page["results"][1]["score"] == 1.0
@@ -0,0 +1,107 @@
+import json
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import backend.llm as llm
+from backend.fake_llm_server import create_app, FakeLLMSettings
+from backend.metrics import speculation_requests, speculation_branches
+from backend.json_stream import parse_json
+from backend.scenarios import validate_step
+from backend.speculation import build_step_prompt, next_history, speculate, take_speculation
+import backend.speculation as speculation
+
+STEP = {
+    "customerText": "My order is late again.",
+    "choices": [{"text": "Apologise"}, {"text": "Offer a refund"}, {"text": "Escalate"}],
+}
+def test_step_prompt_includes_history_and_choice():
+    prompt = build_step_prompt([{"speaker": "Customer", "text": "Hi", "user_choice": "Hello"}, "bad turn"], "Apologise")
+    assert "Customer: Hi\nEmployee: Hello\n" in prompt
+    assert prompt.endswith("Employee's next response: Apologise\nContinue the scenario.")
+
+def test_chosen_branch_is_served_and_others_cancelled():
+    settings = FakeLLMSettings(seed=3, ttft_ms=0, token_delay_ms=0, rate_limit_rate=0)
+    backend, base_url, http_client = llm.LLM_BACKEND, llm.LLM_BASE_URL, llm._llm_http_client
+    llm.set_llm_backend("fake", base_url="http://testserver/v1", http_client=TestClient(create_app(settings)))
+    hits = speculation_requests.value(result="hit") + speculation_requests.value(result="pending")
+
+    async def run():
+        speculate("u1", "s1", [], "Hello", STEP)
+        reply = await take_speculation("u1", "s1", "  offer a REFUND ")
+        missing = await take_speculation("u1", "s1", "Escalate")
+        return reply, missing
+
+    try:
+        reply, missing = asyncio.run(run())
+    finally:
+        llm.set_llm_backend(backend, base_url=base_url, http_client=http_client)
+    assert json.loads(reply)["customerText"]
+    assert missing is None
+    assert speculation_requests.value(result="hit") + speculation_requests.value(result="pending") == hits + 1
+
+def _with_fake_llm(run):
+    settings = FakeLLMSettings(seed=3, ttft_ms=0, token_delay_ms=0, rate_limit_rate=0)
+    backend, base_url, http_client = llm.LLM_BACKEND, llm.LLM_BASE_URL, llm._llm_http_client
+    llm.set_llm_backend("fake", base_url="http://testserver/v1", http_client=TestClient(create_app(settings)))
+    try:
+        return asyncio.run(run())
+    finally:
+        llm.set_llm_backend(backend, base_url=base_url, http_client=http_client)
+
+def test_documented_history_hits_across_two_steps():
+    opening = {"speaker": "Customer", "text": "Where is my parcel?"}
+    hits = speculation_requests.value(result="hit") + speculation_requests.value(result="pending")
+
+    async def run():
+        # Step 1 answered "Hello"; the client picks the second choice by id
+        step = speculate("u1", "s2", [opening], "Hello", STEP)
+        history = [{**opening, "user_choice": "Hello"}, {"speaker": "Customer", "text": step["customerText"]}]
+        assert history == next_history([opening], "Hello", step["customerText"])
+        choice = step["choices"][1]
+        first = await take_speculation("u1", "s2", choice["text"], choice["id"])
+
+        # Step 2 is the speculated reply; this time the client only sends the choice text
+        step = speculate("u1", "s2", history, choice["text"], validate_step(parse_json(first)))
+        documented = [*history[:-1], {**history[-1], "user_choice": choice["text"]}, {"speaker": "Customer", "text": step["customerText"]}]
+        assert documented == next_history(history, choice["text"], step["customerText"])
+        second = await take_speculation("u1", "s2", step["choices"][0]["text"])
+        return first, second
+
+    first, second = _with_fake_llm(run)
+    assert json.loads(first)["customerText"] and json.loads(second)["customerText"]
+    assert speculation_requests.value(result="hit") + speculation_requests.value(result="pending") == hits + 2
+
+def test_branch_is_only_served_for_its_own_choice():
+    async def run():
+        step = speculate("u1", "s3", [], "Hello", STEP)
+        free_text = await take_speculation("u1", "s3", "Let me check that for you")
+        speculate("u1", "s3", [], "Hello", STEP)
+        wrong_id = await take_speculation("u1", "s3", "Apologise", step["choices"][2]["id"])
+        speculate("u1", "s3", [], "Hello", STEP)
+        right_id = await take_speculation("u1", "s3", "Apologise", step["choices"][0]["id"])
+        return free_text, wrong_id, right_id
+
+    free_text, wrong_id, right_id = _with_fake_llm(run)
+    assert free_text is None and wrong_id is None
+    assert json.loads(right_id)["customerText"]
+
+def test_skipped_branches_are_not_counted_as_wasted():
+    outcomes = {outcome: speculation_branches.value(outcome=outcome) for outcome in ("skipped", "wasted", "cancelled")}
+    limiter = speculation.llm_limiter
+
+    async def run():
+        # Every LLM slot taken by interactive calls: branches are dropped, not queued
+        speculation.llm_limiter = asyncio.Semaphore(0)
+        speculate("u1", "s4", [], "Hello", STEP)
+        await asyncio.sleep(0)
+        return await take_speculation("u1", "s4", "Apologise")
+
+    try:
+        reply = asyncio.run(run())
+    finally:
+        speculation.llm_limiter = limiter
+    assert reply is None
+    assert speculation_branches.value(outcome="skipped") == outcomes["skipped"] + 3
+    assert speculation_branches.value(outcome="cancelled") == outcomes["cancelled"]
+    assert speculation_branches.value(outcome="wasted") == outcomes["wasted"]
@@ -0,0 +1,15 @@
+import os
+
+from backend.startup_profile import profile_imports
+
+# Generous enough for a cold CI runner; the point is to catch heavy imports creeping back
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+def test_app_import_stays_under_budget_without_voice():
+    profile = profile_imports("backend.app", env={"VOICE_CLONING_ENABLED": "0"})
+    assert profile["total_ms"] < STARTUP_BUDGET_MS, profile["packages"][:10]
+
+def test_heavy_subsystems_are_not_imported_at_startup():
+    profile = profile_imports("backend.app", env={"VOICE_CLONING_ENABLED": "0"})
+    for heavy in ("torch", "TTS", "soundfile", "backend.voice_cloning", "firebase_admin", "openai"):
+        assert heavy not in profile["modules"], f"{heavy} imported while loading backend.app"
@@ -0,0 +1,18 @@
+from backend.summarize import chunk_transcript, chunk_cache_key, estimate_tokens, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+def _transcript(n=600):
+    return " ".join(f"Sentence number {i} explains step {i} of the onboarding process." for i in range(n))
+
+def test_chunks_respect_token_budget():
+    chunks = chunk_transcript(_transcript())
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert estimate_tokens(chunk) <= CHUNK_MAX_TOKENS + CHUNK_OVERLAP_TOKENS + 20
+
+def test_edit_only_changes_nearby_chunks():
+    original = _transcript()
+    edited = original.replace("Sentence number 300 explains", "Sentence number 300 clearly explains")
+    before = [chunk_cache_key(c) for c in chunk_transcript(original)]
+    after = [chunk_cache_key(c) for c in chunk_transcript(edited)]
+    changed = set(after) - set(before)
+    assert 1 <= len(changed) <= 2
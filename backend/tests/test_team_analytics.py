@@ -0,0 +1,62 @@
+import random
+import time
+
+from backend.team_analytics import build_skill_matrix, compute_team_metrics, summarize_for_prompt
+
+MEMBERS = [
+    {"name": "Ana", "role": "Engineer", "skills": ["Python", "SQL"], "performance_score": 4.0},
+    {"name": "Ben", "role": "Engineer", "skills": ["python", " Kubernetes "], "performance_score": 3.0},
+    {"name": "Cy", "role": "Designer", "skills": ["Figma"], "performance_score": None},
+    {"name": "Di", "role": "Engineer", "skills": [], "performance_score": 5.0},
+]
+
+def test_skill_matrix_merges_spellings():
+    skills, matrix = build_skill_matrix(MEMBERS)
+    assert skills == ["Python", "SQL", "Kubernetes", "Figma"]
+    assert matrix.shape == (4, 4)
+    assert matrix[:, 0].sum() == 2
+
+def test_metrics():
+    stats = compute_team_metrics(MEMBERS)
+    assert stats["coverage"][0] == {"skill": "Python", "members": 2, "share": 0.5}
+    assert {s["skill"]: s["member"] for s in stats["single_points_of_failure"]} == {"SQL": "Ana", "Kubernetes": "Ben", "Figma": "Cy"}
+    assert stats["redundancy"]["members_without_skills"] == 1
+    assert stats["performance"]["scored_members"] == 3
+    assert stats["performance"]["mean"] == 4.0
+    python = next(s for s in stats["skill_performance"] if s["skill"] == "Python")
+    assert python["mean_score"] == 3.5
+    assert all(s["skill"] != "Figma" for s in stats["skill_performance"])
+
+def test_empty_team():
+    stats = compute_team_metrics([])
+    assert stats["skill_count"] == 0
+    assert stats["performance"] == {"scored_members": 0}
+    assert "none recorded" in summarize_for_prompt(stats)
+
+def test_large_team_summary_stays_compact():
+    rng = random.Random(1)
+    skills = [f"skill-{i}" for i in range(300)]
+    members = [
+        {"name": f"m{i}", "role": rng.choice(["Engineer", "Analyst"]), "skills": rng.sample(skills, 8), "performance_score": rng.uniform(1, 5)}
+        for i in range(5000)
+    ]
+    start = time.perf_counter()
+    stats = compute_team_metrics(members)
+    assert time.perf_counter() - start < 2
+    assert stats["member_count"] == 5000
+    assert len(summarize_for_prompt(stats)) < 3000
+
+def test_members_hash_is_order_independent_and_reversible():
+    from bson import ObjectId
+    from backend.team_fingerprint import members_hash, member_hash, analytics_fingerprint
+    members = [{**m, "_id": ObjectId()} for m in MEMBERS]
+    total = members_hash(members)
+    assert total == members_hash(reversed(members))
+    # Removing a member is XOR-ing its hash back out
+    assert total ^ member_hash(members[0]) == members_hash(members[1:])
+    # Identical members do not cancel each other out
+    twins = [{**MEMBERS[0], "_id": ObjectId()}, {**MEMBERS[0], "_id": ObjectId()}]
+    assert members_hash(twins) != 0
+    team = {"name": "T", "description": "d"}
+    assert analytics_fingerprint(team, total, ["b", "a"]) == analytics_fingerprint(team, total, ["a", "b", "a"])
+    assert analytics_fingerprint(team, total, ["a"]) != analytics_fingerprint({**team, "name": "U"}, total, ["a"])
@@ -0,0 +1,31 @@
+import asyncio
+
+from backend.team_members import _csv_rows, _ndjson_rows
+
+async def _chunks(body: bytes, size: int):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+def _rows(parser, body: str, size: int = 5):
+    async def collect():
+        return [row async for row in parser(_chunks(body.encode("utf-8"), size))]
+    return asyncio.run(collect())
+
+def test_csv_rows_across_chunk_boundaries():
+    body = '﻿Name,Role,Email,Skills,Performance_Score\r\nAnn,Eng,a@x,"Python; SQL|Go",4.5\r\n"Lee, Jr",Ops,l@x,"on\ncall",\r\n'
+    for size in (1, 3, 64):
+        rows = _rows(_csv_rows, body, size)
+        assert rows == [
+            (1, {"name": "Ann", "role": "Eng", "email": "a@x", "skills": ["Python", "SQL", "Go"], "performance_score": "4.5"}),
+            (2, {"name": "Lee, Jr", "role": "Ops", "email": "l@x", "skills": ["on\ncall"]}),
+        ]
+
+def test_csv_unterminated_quote_is_reported():
+    rows = _rows(_csv_rows, 'name,role\n"Ann,Eng\n')
+    assert len(rows) == 1 and isinstance(rows[0][1], ValueError)
+
+def test_ndjson_rows_report_bad_lines():
+    rows = _rows(_ndjson_rows, '{"name": "Ann"}\n\n[1]\n{oops\n{"name": "Bo"}')
+    assert rows[0] == (1, {"name": "Ann"})
+    assert isinstance(rows[1][1], ValueError) and isinstance(rows[2][1], ValueError)
+    assert rows[3] == (4, {"name": "Bo"})
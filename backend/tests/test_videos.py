@@ -0,0 +1,20 @@
+import json
+
+from backend.videos import parse_quiz
+
+QUESTION = {"question": "What is caching?", "options": ["A", "B", "C", "D"], "answer": "B", "explanation": "..."}
+
+def test_parse_quiz_accepts_well_formed_quizzes():
+    assert parse_quiz(json.dumps([QUESTION, QUESTION])) == [QUESTION, QUESTION]
+    assert parse_quiz(f"Here is your quiz:\n```json\n{json.dumps([QUESTION])}\n```") == [QUESTION]
+
+def test_parse_quiz_rejects_malformed_questions():
+    assert parse_quiz(json.dumps([])) is None
+    assert parse_quiz(json.dumps({"quiz": [QUESTION]})) is None
+    assert parse_quiz(json.dumps([QUESTION, {**QUESTION, "options": ["A", "B"]}])) is None
+    assert parse_quiz(json.dumps([{**QUESTION, "question": None}])) is None
+    assert parse_quiz(json.dumps([{k: v for k, v in QUESTION.items() if k != "answer"}])) is None
+
+def test_parse_quiz_rejects_truncated_replies():
+    reply = json.dumps([QUESTION, QUESTION])
+    assert parse_quiz(reply[:-30]) is None
@@ -0,0 +1,83 @@
+import io
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import backend.voice_cloning as voice_cloning
+import backend.voice_routes as voice_routes
+
+def _wav(seconds: float = 1.0, sample_rate: int = 22050) -> bytes:
+    t = np.linspace(0, seconds, int(seconds * sample_rate), endpoint=False)
+    buffer = io.BytesIO()
+    sf.write(buffer, 0.3 * np.sin(2 * np.pi * 440 * t), sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+@pytest.fixture
+def upload(tmp_path, monkeypatch):
+    manager = voice_cloning.VoiceCloningManager(models_dir=str(tmp_path / "models"), audio_dir=str(tmp_path / "audio"))
+    monkeypatch.setattr(voice_routes, "voice_cloning_manager", manager)
+    app = FastAPI()
+    app.include_router(voice_routes.router)
+    client = TestClient(app)
+
+    def post(body: bytes, filename: str = "sample.wav", user_id: str = "u1"):
+        return client.post(
+            "/voice-cloning/upload-sample",
+            data={"user_id": user_id},
+            files={"file": (filename, body, "application/octet-stream")},
+        )
+    post.manager = manager
+    post.app = app
+    post.audio_dir = tmp_path / "audio"
+    return post
+
+def test_valid_wav_is_stored_and_normalised(upload):
+    response = upload(_wav())
+    assert response.status_code == 200, response.text
+    stored = upload.audio_dir / "u1" / "sample.wav"
+    assert response.json()["audio_path"] == str(stored) and stored.exists()
+
+    normalised = stored.with_name("sample.normalised.wav")
+    deadline = time.monotonic() + 10
+    while not normalised.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    info = sf.info(str(normalised))
+    assert info.samplerate == voice_cloning.MODEL_SAMPLE_RATE and info.channels == 1
+    assert not any((upload.audio_dir / ".incoming").iterdir())
+
+def test_non_audio_body_is_rejected(upload):
+    response = upload(b"this is not audio, just some text" * 10, filename="notes.wav")
+    assert response.status_code == 400
+    assert response.json()["error"] == "Invalid audio file format"
+    assert not (upload.audio_dir / "u1").exists()
+    assert not any((upload.audio_dir / ".incoming").iterdir())
+
+def test_user_id_cannot_leave_the_audio_dir(upload):
+    for user_id in ("..", "a/b", "../u1", ""):
+        response = upload(_wav(), user_id=user_id)
+        assert response.status_code == 400, user_id
+    assert not any(path.is_file() for path in upload.audio_dir.parent.rglob("*.wav"))
+
+def test_oversized_body_is_rejected_while_streaming(upload, monkeypatch):
+    monkeypatch.setattr(voice_cloning, "MAX_SAMPLE_BYTES", 4096)
+    # Small enough to pass the Content-Length check, so the stream parser enforces the limit
+    response = upload(_wav(seconds=0.5))
+    assert response.status_code == 413
+    assert not any((upload.audio_dir / ".incoming").iterdir())
+
+def test_oversized_content_length_is_rejected_up_front(upload, monkeypatch):
+    monkeypatch.setattr(voice_cloning, "MAX_SAMPLE_BYTES", 4096)
+    response = upload(_wav(seconds=5))
+    assert response.status_code == 413
+
+def test_train_does_not_wait_for_the_voice_model(upload, tmp_path):
+    # Training is queued without the TTS model, so it must not answer 503 while the model is missing
+    response = TestClient(upload.app).post(
+        "/voice-cloning/train", data={"user_id": "u1", "audio_path": str(tmp_path / "missing.wav")}
+    )
+    assert response.status_code == 400
+    assert response.json()["error"] == "Voice sample not found"
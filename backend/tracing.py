@@ -0,0 +1,322 @@
+"""
+Lightweight per-request tracing
+
+Each sampled request gets a trace whose spans cover its stages (auth,
+MongoDB commands, LLM calls, TTS). The current span lives in a contextvar, so
+spans nest across awaits, asyncio.to_thread and Motor's executor threads
+without passing anything around. Finished traces are written by a background
+thread as OTLP/JSON lines (one ExportTraceServiceRequest per trace) to
+TRACE_EXPORT_PATH, which a collector's file receiver can ingest. Tracing is
+off unless TRACE_EXPORT_PATH is set.
+
+TRACE_SAMPLE_RATE (0..1) decides which requests are traced; unsampled
+requests only pay for a contextvar lookup per span. Every request, sampled or
+not, gets an X-Request-ID that is echoed in the response and added to log
+records.
+"""
+
+import os
+import time
+import uuid
+import json
+import queue
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List
+
+from pymongo import monitoring
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH") or None
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "ai-workplace-learning")
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_span_id", "kind", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, trace: "_Trace", name: str, parent: Optional["Span"], kind: int, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent.span_id if parent else trace.parent_span_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = STATUS_OK
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.attributes["exception.type"] = type(error).__name__
+        self.attributes["exception.message"] = str(error)[:500]
+
+    def end(self, end_ns: Optional[int] = None):
+        self.end_ns = end_ns or time.time_ns()
+        self.trace.spans.append(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class _Trace:
+    def __init__(self, trace_id: Optional[str] = None, parent_span_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.parent_span_id = parent_span_id
+        self.spans: List[Span] = []
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Time a stage as a child of the current span; a no-op outside a sampled trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+# Export
+
+_export_queue: "queue.SimpleQueue[Optional[_Trace]]" = queue.SimpleQueue()
+_exporter_thread: Optional[threading.Thread] = None
+_exporter_lock = threading.Lock()
+
+
+def _export_loop(path: str):
+    resource = {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]}
+    while True:
+        trace = _export_queue.get()
+        if trace is None:
+            return
+        batch = [trace]
+        while not _export_queue.empty() and len(batch) < 100:
+            item = _export_queue.get()
+            if item is None:
+                break
+            batch.append(item)
+        lines = [
+            json.dumps({"resourceSpans": [{
+                "resource": resource,
+                "scopeSpans": [{
+                    "scope": {"name": "backend.tracing"},
+                    "spans": [s.to_otlp() for s in item.spans]
+                }]
+            }]})
+            for item in batch
+        ]
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"Failed to export traces: {e}")
+
+
+def _export(trace: _Trace, path: str):
+    global _exporter_thread
+    if _exporter_thread is None:
+        with _exporter_lock:
+            if _exporter_thread is None:
+                _exporter_thread = threading.Thread(
+                    target=_export_loop, args=(path,), name="trace-exporter", daemon=True
+                )
+                _exporter_thread.start()
+    _export_queue.put(trace)
+
+
+# Requests
+
+def _parse_traceparent(header: str):
+    """W3C traceparent: version-traceid-parentid-flags"""
+    parts = header.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2], parts[3] == "01"
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware assigning request ids and root spans"""
+
+    def __init__(self, app, sample_rate: float = TRACE_SAMPLE_RATE, export_path: Optional[str] = TRACE_EXPORT_PATH):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.export_path = export_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(REQUEST_ID_HEADER, b"").decode("latin-1")[:128] or uuid.uuid4().hex
+        id_token = request_id_var.set(request_id)
+
+        trace = None
+        incoming = _parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        if not self.export_path:
+            pass  # nowhere to write traces to
+        elif incoming:
+            if incoming[2]:
+                trace = _Trace(incoming[0], incoming[1])
+        elif random.random() < self.sample_rate:
+            trace = _Trace()
+
+        root = None
+        span_token = None
+        if trace:
+            root = Span(trace, f"{scope['method']} {scope['path']}", None, SPAN_KIND_SERVER, {
+                "http.method": scope["method"],
+                "http.target": scope["path"],
+                "request.id": request_id,
+            })
+            span_token = _current_span.set(root)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+                ]
+                if root:
+                    root.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        root.status = STATUS_ERROR
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            if root:
+                root.record_error(e)
+            raise
+        finally:
+            if root:
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"{scope['method']} {route.path}"
+                    root.set_attribute("http.route", route.path)
+                _current_span.reset(span_token)
+                root.end()
+                _export(trace, self.export_path)
+            request_id_var.reset(id_token)
+
+
+# MongoDB
+
+class MongoCommandSpans(monitoring.CommandListener):
+    """Record each MongoDB command as a client span of the current trace.
+
+    Motor runs commands on its executor with a copy of the caller's context,
+    so the span active when the query was awaited is visible here.
+    """
+
+    def __init__(self):
+        self._pending: Dict[tuple, Span] = {}
+
+    def started(self, event):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        collection = event.command.get(event.command_name)
+        attributes = {"db.system": "mongodb", "db.name": event.database_name, "db.operation": event.command_name}
+        if isinstance(collection, str):
+            attributes["db.mongodb.collection"] = collection
+        self._pending[(event.connection_id, event.request_id)] = Span(
+            parent.trace, f"mongo.{event.command_name}", parent, SPAN_KIND_CLIENT, attributes
+        )
+
+    def _finish(self, event, error: Optional[str] = None):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        if error:
+            pending.status = STATUS_ERROR
+            pending.set_attribute("exception.message", error)
+        pending.end(pending.start_ns + event.duration_micros * 1000)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, str(event.failure)[:500])
+
+
+# Logging
+
+class RequestIdFilter(logging.Filter):
+    """Adds request_id and trace_id to every log record"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        active = _current_span.get()
+        record.trace_id = active.trace.trace_id if active else "-"
+        return True
+
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+
+
+def install_log_filter():
+    """Attach RequestIdFilter to the root handlers so all loggers carry request ids.
+
+    Handlers someone else configured keep their formatter; LOG_FORMAT is only
+    used for the handler installed here when there is none.
+    """
+    root = logging.getLogger()
+    if not root.handlers:
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    for handler in root.handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(RequestIdFilter())
@@ -0,0 +1,111 @@
+"""
+Version stamps for conditional GETs
+
+Every write path bumps a small counter document for what it changed (a
+user's lessons, a team, ...). Read routes look the counter up first and
+answer If-None-Match with 304 Not Modified when it has not moved, skipping
+the real query and serialisation. Last-Modified is sent too, but
+If-Modified-Since alone is not honoured: HTTP dates have one-second
+resolution, so two writes within the same second would be indistinguishable.
+
+Ordering keeps this safe without transactions: writers bump after their
+write, readers take the version before reading the data. A reader that
+races a writer can only label new data with an old version, which costs
+the client one extra full response, never a stale 304.
+"""
+
+import os
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from pymongo import ReturnDocument
+
+from backend.db import collection_versions_collection
+from backend.metrics import record_cache
+
+# Change to invalidate every ETag, e.g. when a response format changes
+ETAG_SALT = os.getenv("ETAG_SALT", "1")
+CACHE_CONTROL = "private, no-cache"
+
+
+def version_key(scope: str, name: str) -> str:
+    """scope is a user id (or "global"); name identifies the data, e.g. "lessons" or "team:<id>" """
+    return f"{scope}:{name}"
+
+
+class Version:
+    def __init__(self, key: str, version: int, updated_at: Optional[datetime]):
+        self.key = key
+        self.version = version
+        self.updated_at = updated_at
+
+    @property
+    def etag(self) -> str:
+        resource = hashlib.sha1(self.key.encode("utf-8")).hexdigest()[:12]
+        return f'"{resource}-{self.version}-{ETAG_SALT}"'
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        if not self.updated_at:
+            return None
+        return format_datetime(self.updated_at.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+    def matches(self, request: Request) -> bool:
+        """True when the client's cached copy (by If-None-Match) is current"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is None:
+            return False
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        fresh = "*" in tags or self.etag in tags
+        record_cache("conditional_get", hit=fresh)
+        return fresh
+
+    def headers(self):
+        headers = {"ETag": self.etag, "Cache-Control": CACHE_CONTROL}
+        if self.last_modified:
+            headers["Last-Modified"] = self.last_modified
+        return headers
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers())
+
+    def attach(self, response: Response) -> Response:
+        response.headers.update(self.headers())
+        return response
+
+
+def _from_doc(doc) -> Version:
+    return Version(doc["_id"], doc.get("version", 0), doc.get("updated_at"))
+
+
+async def get_version(key: str, create: bool = True) -> Optional[Version]:
+    """Current version of key; created on first read unless create is False"""
+    doc = await collection_versions_collection.find_one({"_id": key})
+    if doc:
+        return _from_doc(doc)
+    if not create:
+        return None
+    doc = await collection_versions_collection.find_one_and_update(
+        {"_id": key},
+        {"$setOnInsert": {"version": 0, "updated_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return _from_doc(doc)
+
+
+async def bump_version(*keys: str):
+    """Mark data as changed; call after the write has completed"""
+    now = datetime.utcnow()
+    for key in keys:
+        try:
+            await collection_versions_collection.update_one(
+                {"_id": key},
+                {"$inc": {"version": 1}, "$set": {"updated_at": now}},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Failed to bump version {key}: {e}")
@@ -0,0 +1,166 @@
+"""
+Video lesson pipeline: persisted quizzes and pre-generated video content
+
+Quizzes are stored in video_quizzes keyed by a hash of the summary and the
+quiz parameters, so every learner watching the same video is served the
+same stored quiz instead of triggering a new GPT-4 call. When a video is
+added, its summary and quiz are built once in the background.
+"""
+
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from backend.db import video_quizzes_collection, videos_collection
+from backend.llm import ask_openai_async
+from backend.json_stream import parse_json, JSONParseError
+from backend.metrics import record_cache
+from backend.prompts import video_quiz_prompt
+from backend.summarize import summarize_transcript
+
+QUIZ_MODEL = "gpt-4"
+# Bump when video_quiz_prompt changes so stored quizzes are regenerated
+QUIZ_PROMPT_VERSION = 1
+DEFAULT_NUM_QUESTIONS = 3
+MAX_NUM_QUESTIONS = 10
+
+# ask_openai returns this placeholder instead of raising when a call fails
+LLM_ERROR_PREFIX = "[MOCKED RESPONSE - Error"
+
+OPTIONS_PER_QUESTION = 4
+
+FAILED_QUIZ = [{"question": "Failed to parse quiz", "options": [], "answer": "", "explanation": ""}]
+
+# Quiz generations in flight in this process, so concurrent viewers share one call
+_pending_quizzes: Dict[str, asyncio.Future] = {}
+
+
+def quiz_cache_key(summary: str, num_questions: int = DEFAULT_NUM_QUESTIONS) -> str:
+    normalised = " ".join(summary.split())
+    payload = f"{QUIZ_PROMPT_VERSION}|{QUIZ_MODEL}|{num_questions}|{normalised}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _valid_question(item: Any) -> bool:
+    if not isinstance(item, dict):
+        return False
+    options = item.get("options")
+    return (
+        isinstance(item.get("question"), str) and bool(item["question"].strip())
+        and isinstance(options, list) and len(options) == OPTIONS_PER_QUESTION
+        and all(isinstance(option, str) and option.strip() for option in options)
+        and isinstance(item.get("answer"), str) and bool(item["answer"].strip())
+    )
+
+
+def parse_quiz(result: str) -> Optional[List[Dict[str, Any]]]:
+    """The quiz in a reply, or None unless it is complete and every question is well formed.
+
+    Quizzes are stored for good, so a reply cut off by max_tokens is refused
+    rather than closed by the JSON repair.
+    """
+    try:
+        questions = parse_json(result, template="video_quiz", expect="[", allow_truncated=False)
+    except JSONParseError:
+        return None
+    if not isinstance(questions, list) or not questions or not all(_valid_question(item) for item in questions):
+        return None
+    return questions
+
+
+async def _generate_quiz(key: str, summary: str, num_questions: int) -> List[Dict[str, Any]]:
+    prompt = video_quiz_prompt.format(summary=summary, num_questions=num_questions)
+    questions = parse_quiz(await ask_openai_async(prompt, model=QUIZ_MODEL))
+    if questions is None:
+        return FAILED_QUIZ
+    await video_quizzes_collection.update_one(
+        {"_id": key},
+        {"$set": {
+            "quiz": questions,
+            "num_questions": num_questions,
+            "prompt_version": QUIZ_PROMPT_VERSION,
+            "created_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+    return questions
+
+
+async def get_or_create_quiz(summary: str, num_questions: int = DEFAULT_NUM_QUESTIONS) -> Dict[str, Any]:
+    """Serve the stored quiz for this summary, generating it on first request"""
+    key = quiz_cache_key(summary, num_questions)
+    stored = await video_quizzes_collection.find_one({"_id": key}, {"quiz": 1})
+    record_cache("video_quiz", hit=stored is not None)
+    if stored:
+        return {"quiz": stored["quiz"], "quiz_id": key, "cached": True}
+
+    pending = _pending_quizzes.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(_generate_quiz(key, summary, num_questions))
+        _pending_quizzes[key] = pending
+        pending.add_done_callback(lambda _: _pending_quizzes.pop(key, None))
+    questions = await asyncio.shield(pending)
+    return {"quiz": questions, "quiz_id": key, "cached": False}
+
+
+def video_id_for(video_url: str) -> str:
+    return hashlib.sha256(video_url.strip().encode("utf-8")).hexdigest()[:24]
+
+
+async def register_video(video_url: str, transcript: str, user_id: str) -> Dict[str, Any]:
+    """Record a new video; returns whether its content needs to be (re)built"""
+    video_id = video_id_for(video_url)
+    transcript_hash = hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+    existing = await videos_collection.find_one({"_id": video_id}, {"transcript_hash": 1, "status": 1})
+    if existing and existing.get("transcript_hash") == transcript_hash and existing.get("status") != "failed":
+        return {"video_id": video_id, "status": existing["status"], "needs_build": False}
+
+    await videos_collection.update_one(
+        {"_id": video_id},
+        {"$set": {
+            "video_url": video_url,
+            "transcript_hash": transcript_hash,
+            "status": "processing",
+            "added_by": user_id,
+            "updated_at": datetime.utcnow()
+        }, "$setOnInsert": {"created_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return {"video_id": video_id, "status": "processing", "needs_build": True}
+
+
+async def prepare_video(video_id: str, transcript: str, num_questions: int = DEFAULT_NUM_QUESTIONS):
+    """Build and store the summary and quiz for a video once"""
+    try:
+        summary = await summarize_transcript(transcript)
+        if summary["summary"].startswith(LLM_ERROR_PREFIX):
+            raise ValueError(f"Summary generation failed: {summary['summary']}")
+        quiz = await get_or_create_quiz(summary["summary"], num_questions)
+        if quiz["quiz"] == FAILED_QUIZ:
+            raise ValueError("Quiz generation failed")
+        await videos_collection.update_one(
+            {"_id": video_id},
+            {"$set": {
+                "status": "ready",
+                "summary": summary["summary"],
+                "quiz_id": quiz["quiz_id"],
+                "updated_at": datetime.utcnow()
+            }}
+        )
+    except Exception as e:
+        print(f"Failed to prepare video {video_id}: {e}")
+        await videos_collection.update_one(
+            {"_id": video_id},
+            {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}}
+        )
+
+
+async def get_video(video_id: str) -> Optional[Dict[str, Any]]:
+    video = await videos_collection.find_one({"_id": video_id})
+    if not video:
+        return None
+    if video.get("quiz_id"):
+        stored = await video_quizzes_collection.find_one({"_id": video["quiz_id"]}, {"quiz": 1})
+        video["quiz"] = stored["quiz"] if stored else []
+    return video
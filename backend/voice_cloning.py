@@ -4,30 +4,200 @@ Handles voice recording, training, and synthesis
 """
 
 import os
+import re
 import json
 import uuid
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable
 import logging
 from datetime import datetime
 
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # older python-multipart releases
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Sample validation and normalisation only need soundfile and numpy, not the TTS stack
+try:
+    import numpy as np
+    import soundfile as sf
+except ImportError:
+    print("Warning: soundfile not installed. Install with: pip install -r backend/requirements-voice-cloning.txt")
+
 # Voice cloning imports
 try:
     from TTS.api import TTS
     from TTS.utils.manage import ModelManager
     import torch
-    import numpy as np
-    import soundfile as sf
     TTS_AVAILABLE = True
 except ImportError:
     TTS_AVAILABLE = False
     print("Warning: Coqui TTS not installed. Install with: pip install coqui-tts")
 
+from backend.metrics import tts_queue_depth, tts_synthesis_duration
+from backend.tracing import span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upload limits
+MAX_SAMPLE_BYTES = int(os.getenv("VOICE_SAMPLE_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# user_id names the sample's directory, so it may not contain path separators or dots
+USER_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+# YourTTS speaker encoder works on 16kHz mono audio
+MODEL_SAMPLE_RATE = 16000
+
+# Leading bytes of the containers libsndfile can read
+AUDIO_SIGNATURES = (
+    (b"RIFF", 0),   # WAV (checked together with "WAVE" at offset 8)
+    (b"fLaC", 0),   # FLAC
+    (b"OggS", 0),   # Ogg Vorbis / Opus
+    (b"FORM", 0),   # AIFF
+    (b"ID3", 0),    # MP3 with ID3 tag
+    (b"\xff\xfb", 0),  # MP3 frame sync
+    (b"\xff\xf3", 0),
+    (b"\xff\xf2", 0),
+)
+SIGNATURE_SNIFF_BYTES = 12
+
+
+class VoiceSampleRejected(Exception):
+    """Raised while streaming an upload that must not be stored"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _looks_like_audio(header: bytes) -> bool:
+    """Check the first bytes of an upload against known audio containers"""
+    if header.startswith(b"RIFF"):
+        return header[8:12] == b"WAVE"
+    return any(header.startswith(signature) for signature, _ in AUDIO_SIGNATURES)
+
+
+class _VoiceSampleStream:
+    """Incremental multipart/form-data sink for a voice sample upload.
+
+    The file part is sniffed as soon as its first bytes arrive and written
+    straight to a temporary file, so malformed or oversized uploads are
+    rejected without buffering the request body in memory.
+    """
+
+    def __init__(self, temp_path: Path, max_bytes: int):
+        self.temp_path = temp_path
+        self.max_bytes = max_bytes
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.bytes_written = 0
+        self.error: Optional[VoiceSampleRejected] = None
+
+        self._file = None
+        self._header_field = b""
+        self._header_value = b""
+        self._part_headers: Dict[bytes, bytes] = {}
+        self._part_name: Optional[str] = None
+        self._part_is_file = False
+        self._field_value = b""
+        self._sniff_buffer = b""
+        self._sniffed = False
+        self._pending: list = []
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        }
+
+    def _on_part_begin(self):
+        self._part_headers = {}
+        self._part_name = None
+        self._part_is_file = False
+        self._field_value = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._part_headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        disposition = self._part_headers.get(b"content-disposition", b"").decode("latin-1")
+        _, params = parse_options_header(disposition)
+        self._part_name = params.get(b"name", b"").decode("latin-1")
+        if b"filename" in params:
+            if self.filename is not None:
+                raise VoiceSampleRejected("Only one audio file may be uploaded")
+            self._part_is_file = True
+            self.filename = Path(params[b"filename"].decode("latin-1")).name
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        chunk = data[start:end]
+        if not self._part_is_file:
+            self._field_value += chunk
+            if len(self._field_value) > 1024:
+                raise VoiceSampleRejected("Form field too large")
+            return
+
+        self.bytes_written += len(chunk)
+        if self.bytes_written > self.max_bytes:
+            raise VoiceSampleRejected(
+                f"Voice sample exceeds {self.max_bytes // (1024 * 1024)}MB limit", status_code=413
+            )
+
+        if not self._sniffed:
+            self._sniff_buffer += chunk
+            if len(self._sniff_buffer) < SIGNATURE_SNIFF_BYTES:
+                return
+            self._check_signature()
+            chunk, self._sniff_buffer = self._sniff_buffer, b""
+        self._pending.append(chunk)
+
+    def _on_part_end(self):
+        if self._part_is_file:
+            if not self._sniffed:
+                self._check_signature()
+                self._pending.append(self._sniff_buffer)
+                self._sniff_buffer = b""
+        elif self._part_name:
+            self.fields[self._part_name] = self._field_value.decode("utf-8", errors="replace")
+
+    def _check_signature(self):
+        if not _looks_like_audio(self._sniff_buffer):
+            raise VoiceSampleRejected("Invalid audio file format")
+        self._sniffed = True
+
+    def flush(self):
+        """Write buffered file data to disk (called from a worker thread)"""
+        if not self._pending:
+            return
+        if self._file is None:
+            self._file = open(self.temp_path, "wb")
+        self._file.write(b"".join(self._pending))
+        self._pending.clear()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
 class VoiceCloningManager:
     """Manages voice cloning operations using Coqui TTS"""
     
@@ -36,14 +206,72 @@ class VoiceCloningManager:
         self.audio_dir = Path(audio_dir)
         self.models_dir.mkdir(exist_ok=True)
         self.audio_dir.mkdir(exist_ok=True)
+        self.incoming_dir = self.audio_dir / ".incoming"
+        self.incoming_dir.mkdir(exist_ok=True)
         
-        # Initialize TTS model
+        # Background worker for CPU-bound audio preparation
+        self.audio_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("VOICE_AUDIO_WORKERS", "2")),
+            thread_name_prefix="voice-audio"
+        )
+        self.normalisation_jobs: Dict[str, asyncio.Future] = {}
+        
+        # TTS worker pool: model loading, warm-up and synthesis run here so
+        # they never block the event loop
+        self.tts_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("VOICE_TTS_WORKERS", "1")),
+            thread_name_prefix="voice-tts"
+        )
+        tts_queue_depth.set_function(self.tts_executor._work_queue.qsize)
+        
+        # TTS model is loaded in the background after startup (see start_model_loading)
         self.tts = None
         self.model_loaded = False
-        self._load_tts_model()
-        
-        # Training status tracking
-        self.training_status = {}
+        self.model_state = "not_loaded" if TTS_AVAILABLE else "unavailable"
+        self.model_error = None
+        self._loading_task: Optional[asyncio.Task] = None
+    
+    def start_model_loading(self) -> Optional[asyncio.Task]:
+        """Schedule model loading and warm-up without blocking the caller"""
+        if self.model_state == "not_loaded" and self._loading_task is None:
+            self._loading_task = asyncio.create_task(self._load_and_warm_up())
+        return self._loading_task
+    
+    async def _load_and_warm_up(self):
+        loop = asyncio.get_running_loop()
+        self.model_state = "loading"
+        loaded = await loop.run_in_executor(self.tts_executor, self._load_tts_model)
+        if not loaded:
+            self.model_state = "failed"
+            return
+        self.model_state = "warming_up"
+        await loop.run_in_executor(self.tts_executor, self._warm_up)
+        self.model_state = "ready"
+        logger.info("TTS model ready")
+    
+    def _warm_up(self):
+        """Run one short synthesis so the first user request doesn't pay for lazy init"""
+        try:
+            speakers = getattr(self.tts, "speakers", None) or []
+            self.tts.tts(
+                text="Warming up the voice model.",
+                speaker=speakers[0] if speakers else None,
+                language="en"
+            )
+        except Exception as e:
+            logger.warning(f"TTS warm-up failed: {e}")
+    
+    def _timed_synthesis(self, synthesize: Callable[[], Any]):
+        with tts_synthesis_duration.time():
+            return synthesize()
+    
+    def readiness(self) -> Dict[str, Any]:
+        """Report model state for the readiness endpoint"""
+        return {
+            "ready": self.model_state == "ready",
+            "state": self.model_state,
+            "error": self.model_error
+        }
     
     def _load_tts_model(self):
         """Load the TTS model for voice cloning"""
@@ -63,53 +291,113 @@ class VoiceCloningManager:
             return True
         except Exception as e:
             logger.error(f"Failed to load TTS model: {e}")
+            self.model_error = str(e)
             return False
     
-    async def save_voice_sample(self, user_id: str, audio_data: bytes, filename: str) -> Dict[str, Any]:
-        """Save uploaded voice sample"""
+    async def receive_voice_sample(
+        self,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+        content_length: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Stream a multipart voice sample upload straight to disk"""
+        if content_length is not None and content_length > MAX_SAMPLE_BYTES + UPLOAD_CHUNK_SIZE:
+            return {
+                "success": False,
+                "error": f"Voice sample exceeds {MAX_SAMPLE_BYTES // (1024 * 1024)}MB limit",
+                "status_code": 413
+            }
+        
+        _, params = parse_options_header(content_type or "")
+        boundary = params.get(b"boundary")
+        if not boundary:
+            return {"success": False, "error": "Expected multipart/form-data upload"}
+        
+        temp_path = self.incoming_dir / f"{uuid.uuid4().hex}.part"
+        sink = _VoiceSampleStream(temp_path, MAX_SAMPLE_BYTES)
+        parser = MultipartParser(boundary, sink.callbacks())
+        
+        try:
+            async for chunk in chunks:
+                parser.write(chunk)
+                await asyncio.to_thread(sink.flush)
+            parser.finalize()
+            await asyncio.to_thread(sink.flush)
+        except VoiceSampleRejected as e:
+            sink.close()
+            temp_path.unlink(missing_ok=True)
+            return {"success": False, "error": str(e), "status_code": e.status_code}
+        except Exception as e:
+            sink.close()
+            temp_path.unlink(missing_ok=True)
+            logger.error(f"Error receiving voice sample: {e}")
+            return {"success": False, "error": "Malformed upload"}
+        finally:
+            sink.close()
+        
+        user_id = sink.fields.get("user_id")
+        if not user_id or not sink.filename or not temp_path.exists():
+            temp_path.unlink(missing_ok=True)
+            return {"success": False, "error": "Both 'file' and 'user_id' are required"}
+        if not USER_ID_PATTERN.fullmatch(user_id):
+            temp_path.unlink(missing_ok=True)
+            return {"success": False, "error": "Invalid user_id"}
+        
+        return await self.save_voice_sample(user_id, temp_path, sink.filename)
+    
+    async def save_voice_sample(self, user_id: str, temp_path: Path, filename: str) -> Dict[str, Any]:
+        """Move a received voice sample into place and queue its normalisation"""
         try:
             # Create user directory
-            user_dir = self.audio_dir / user_id
+            user_dir = self.audio_dir / Path(user_id).name
             user_dir.mkdir(exist_ok=True)
             
-            # Save audio file
-            audio_path = user_dir / filename
-            with open(audio_path, 'wb') as f:
-                f.write(audio_data)
-            
-            # Validate audio file
-            if not self._validate_audio_file(audio_path):
+            # Validate audio file from its header only
+            info = await asyncio.to_thread(self._validate_audio_file, temp_path)
+            if info is None:
+                temp_path.unlink(missing_ok=True)
                 return {
                     "success": False,
                     "error": "Invalid audio file format"
                 }
             
+            audio_path = user_dir / Path(filename).name
+            os.replace(temp_path, audio_path)
+            
+            self._schedule_normalisation(audio_path)
+            
             return {
                 "success": True,
                 "audio_path": str(audio_path),
                 "user_id": user_id,
-                "filename": filename
+                "filename": audio_path.name,
+                "duration": info["duration"],
+                "sample_rate": info["sample_rate"]
             }
             
         except Exception as e:
             logger.error(f"Error saving voice sample: {e}")
+            temp_path.unlink(missing_ok=True)
             return {
                 "success": False,
                 "error": str(e)
             }
     
-    def _validate_audio_file(self, audio_path: Path) -> bool:
-        """Validate audio file format and quality"""
+    def _validate_audio_file(self, audio_path: Path) -> Optional[Dict[str, Any]]:
+        """Validate audio file format and quality from its header"""
         try:
             # Check if file exists and has content
             if not audio_path.exists() or audio_path.stat().st_size == 0:
-                return False
+                return None
             
-            # Try to read audio file
-            data, sample_rate = sf.read(str(audio_path))
+            # Read container metadata without decoding the samples
+            info = sf.info(str(audio_path))
+            duration = info.duration
+            sample_rate = info.samplerate
+            if info.frames <= 0 or sample_rate <= 0:
+                return None
             
             # Check duration (should be 30-60 seconds)
-            duration = len(data) / sample_rate
             if duration < 10 or duration > 120:
                 logger.warning(f"Audio duration {duration}s is outside recommended range (10-120s)")
             
@@ -117,28 +405,67 @@ class VoiceCloningManager:
             if sample_rate < 16000:
                 logger.warning(f"Sample rate {sample_rate}Hz is below recommended 16kHz")
             
-            return True
+            return {"duration": duration, "sample_rate": sample_rate, "channels": info.channels}
             
         except Exception as e:
             logger.error(f"Audio validation failed: {e}")
-            return False
+            return None
     
-    async def train_voice_model(self, user_id: str, audio_path: str) -> Dict[str, Any]:
-        """Train voice model for user"""
-        training_id = str(uuid.uuid4())
-        
+    def _schedule_normalisation(self, audio_path: Path):
+        """Resample and normalise a voice sample in the audio worker pool"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.audio_executor, self._normalise_audio_file, audio_path)
+        self.normalisation_jobs[str(audio_path)] = future
+        future.add_done_callback(lambda _: self.normalisation_jobs.pop(str(audio_path), None))
+    
+    def _normalise_audio_file(self, audio_path: Path) -> Optional[str]:
+        """Convert a sample to mono at the model rate with peak normalisation"""
         try:
-            # Update training status
-            self.training_status[training_id] = {
-                "status": "training",
-                "progress": 0,
-                "user_id": user_id,
-                "started_at": datetime.now().isoformat(),
-                "error": None
-            }
+            data, sample_rate = sf.read(str(audio_path), dtype="float32", always_2d=True)
+            mono = data.mean(axis=1)
+            if sample_rate != MODEL_SAMPLE_RATE:
+                try:
+                    import librosa
+                    mono = librosa.resample(mono, orig_sr=sample_rate, target_sr=MODEL_SAMPLE_RATE)
+                except ImportError:
+                    target_len = int(round(len(mono) * MODEL_SAMPLE_RATE / sample_rate))
+                    positions = np.linspace(0, len(mono) - 1, num=target_len)
+                    mono = np.interp(positions, np.arange(len(mono)), mono).astype("float32")
+            peak = float(np.max(np.abs(mono))) if len(mono) else 0.0
+            if peak > 0:
+                mono = mono * (0.89 / peak)  # about -1 dBFS
             
+            normalised_path = audio_path.with_name(f"{audio_path.stem}.normalised.wav")
+            sf.write(str(normalised_path), mono, MODEL_SAMPLE_RATE, subtype="PCM_16")
+            return str(normalised_path)
+        except Exception as e:
+            logger.error(f"Audio normalisation failed for {audio_path}: {e}")
+            return None
+    
+    async def _prepared_sample_path(self, audio_path: str) -> str:
+        """Return the normalised sample once ready, falling back to the original"""
+        job = self.normalisation_jobs.get(audio_path)
+        if job is not None:
+            normalised = await job
+            if normalised:
+                return normalised
+        normalised_path = Path(audio_path)
+        normalised_path = normalised_path.with_name(f"{normalised_path.stem}.normalised.wav")
+        if normalised_path.exists():
+            return str(normalised_path)
+        return audio_path
+    
+    async def run_training(
+        self,
+        training_id: str,
+        user_id: str,
+        audio_path: str,
+        on_progress: Callable[[int], Awaitable[None]]
+    ) -> Dict[str, Any]:
+        """Train voice model for user, reporting progress through on_progress"""
+        try:
             # Simulate training process (in real implementation, this would train the model)
-            await self._simulate_training(training_id)
+            await self._simulate_training(on_progress)
             
             # Create voice model metadata
             voice_model = {
@@ -153,10 +480,6 @@ class VoiceCloningManager:
             # Save voice model metadata
             await self._save_voice_model_metadata(user_id, voice_model)
             
-            # Update training status
-            self.training_status[training_id]["status"] = "completed"
-            self.training_status[training_id]["progress"] = 100
-            
             return {
                 "success": True,
                 "training_id": training_id,
@@ -165,19 +488,16 @@ class VoiceCloningManager:
             
         except Exception as e:
             logger.error(f"Voice training failed: {e}")
-            self.training_status[training_id]["status"] = "failed"
-            self.training_status[training_id]["error"] = str(e)
-            
             return {
                 "success": False,
                 "error": str(e),
                 "training_id": training_id
             }
     
-    async def _simulate_training(self, training_id: str):
+    async def _simulate_training(self, on_progress: Callable[[int], Awaitable[None]]):
         """Simulate training process with progress updates"""
         for progress in range(0, 101, 10):
-            self.training_status[training_id]["progress"] = progress
+            await on_progress(progress)
             await asyncio.sleep(1)  # Simulate processing time
     
     async def _save_voice_model_metadata(self, user_id: str, voice_model: Dict[str, Any]):
@@ -220,12 +540,24 @@ class VoiceCloningManager:
             
             # Synthesize speech using TTS
             if self.model_loaded and self.tts:
-                self.tts.tts_to_file(
-                    text=text,
-                    speaker_wav=audio_path,
-                    file_path=str(output_path),
-                    language=language
-                )
+                speaker_wav = await self._prepared_sample_path(audio_path)
+                # The span includes time queued behind other syntheses
+                with span("tts.synthesize", **{
+                    "tts.language": language,
+                    "tts.text_length": len(text),
+                    "tts.queue_depth": self.tts_executor._work_queue.qsize()
+                }):
+                    await asyncio.get_running_loop().run_in_executor(
+                        self.tts_executor,
+                        self._timed_synthesis,
+                        partial(
+                            self.tts.tts_to_file,
+                            text=text,
+                            speaker_wav=speaker_wav,
+                            file_path=str(output_path),
+                            language=language
+                        )
+                    )
                 
                 return {
                     "success": True,
@@ -247,13 +579,6 @@ class VoiceCloningManager:
                 "error": str(e)
             }
     
-    async def get_training_status(self, training_id: str) -> Dict[str, Any]:
-        """Get training status"""
-        return self.training_status.get(training_id, {
-            "status": "not_found",
-            "error": "Training ID not found"
-        })
-    
     async def get_user_voice_models(self, user_id: str) -> Dict[str, Any]:
         """Get all voice models for a user"""
         try:
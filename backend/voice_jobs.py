@@ -0,0 +1,171 @@
+"""
+Background voice training jobs
+Jobs and their progress live in MongoDB so every uvicorn worker (and any
+dedicated worker process) sees the same status.
+
+Run a dedicated worker process with:
+    python -m backend.voice_jobs
+"""
+
+import os
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, AsyncIterator
+
+from pymongo import ReturnDocument
+
+from backend.db import voice_training_jobs_collection
+
+logger = logging.getLogger(__name__)
+
+JOB_POLL_INTERVAL = float(os.getenv("VOICE_JOB_POLL_INTERVAL", "1.0"))
+JOB_EVENTS_INTERVAL = float(os.getenv("VOICE_JOB_EVENTS_INTERVAL", "0.5"))
+# A job whose worker stops renewing its lease is picked up again by another worker
+JOB_LEASE_SECONDS = int(os.getenv("VOICE_JOB_LEASE_SECONDS", "120"))
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def _public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a job document the way the training-status API reports it"""
+    return {
+        "training_id": job["_id"],
+        "status": job["status"],
+        "progress": job.get("progress", 0),
+        "user_id": job.get("user_id"),
+        "started_at": job["started_at"].isoformat() if job.get("started_at") else None,
+        "updated_at": job["updated_at"].isoformat() if job.get("updated_at") else None,
+        "error": job.get("error"),
+        "voice_model": job.get("voice_model"),
+    }
+
+
+async def ensure_job_indexes():
+    await voice_training_jobs_collection.create_index([("status", 1), ("created_at", 1)])
+
+
+async def enqueue_training_job(user_id: str, audio_path: str) -> str:
+    """Queue a training job and return its id without waiting for it"""
+    training_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    await voice_training_jobs_collection.insert_one({
+        "_id": training_id,
+        "user_id": user_id,
+        "audio_path": audio_path,
+        "status": "queued",
+        "progress": 0,
+        "error": None,
+        "created_at": now,
+        "updated_at": now
+    })
+    return training_id
+
+
+async def get_training_job(training_id: str) -> Dict[str, Any]:
+    job = await voice_training_jobs_collection.find_one({"_id": training_id})
+    if not job:
+        return {
+            "status": "not_found",
+            "error": "Training ID not found"
+        }
+    return _public_job(job)
+
+
+async def watch_training_job(training_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the job state each time it changes until it finishes"""
+    last_seen = None
+    while True:
+        job = await get_training_job(training_id)
+        state = (job["status"], job.get("progress"), job.get("updated_at"))
+        if state != last_seen:
+            last_seen = state
+            yield job
+        if job["status"] in TERMINAL_STATUSES or job["status"] == "not_found":
+            return
+        await asyncio.sleep(JOB_EVENTS_INTERVAL)
+
+
+async def _claim_next_job(worker_id: str) -> Optional[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return await voice_training_jobs_collection.find_one_and_update(
+        {"$or": [
+            {"status": "queued"},
+            {"status": "training", "lease_expires_at": {"$lt": now}}
+        ]},
+        {"$set": {
+            "status": "training",
+            "worker_id": worker_id,
+            "started_at": now,
+            "updated_at": now,
+            "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS)
+        }},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def _run_job(job: Dict[str, Any], worker_id: str):
+    from backend.voice_cloning import voice_cloning_manager
+
+    training_id = job["_id"]
+
+    async def report_progress(progress: int):
+        now = datetime.utcnow()
+        await voice_training_jobs_collection.update_one(
+            {"_id": training_id, "worker_id": worker_id},
+            {"$set": {
+                "progress": progress,
+                "updated_at": now,
+                "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS)
+            }}
+        )
+
+    result = await voice_cloning_manager.run_training(
+        training_id=training_id,
+        user_id=job["user_id"],
+        audio_path=job["audio_path"],
+        on_progress=report_progress
+    )
+
+    update = {"updated_at": datetime.utcnow()}
+    if result["success"]:
+        update.update({"status": "completed", "progress": 100, "voice_model": result["voice_model"]})
+    else:
+        update.update({"status": "failed", "error": result["error"]})
+    await voice_training_jobs_collection.update_one(
+        {"_id": training_id, "worker_id": worker_id},
+        {"$set": update, "$unset": {"lease_expires_at": ""}}
+    )
+
+
+async def run_worker(stop_event: Optional[asyncio.Event] = None):
+    """Claim and run queued training jobs until stop_event is set"""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    logger.info(f"Voice training worker {worker_id} started")
+    await ensure_job_indexes()
+    while stop_event is None or not stop_event.is_set():
+        try:
+            job = await _claim_next_job(worker_id)
+        except Exception as e:
+            logger.error(f"Failed to claim training job: {e}")
+            job = None
+        if job is None:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            continue
+        try:
+            await _run_job(job, worker_id)
+        except Exception as e:
+            logger.error(f"Voice training job {job['_id']} crashed: {e}")
+            # Only while this worker still holds the job; an expired lease may have been re-claimed
+            await voice_training_jobs_collection.update_one(
+                {"_id": job["_id"], "worker_id": worker_id},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()},
+                 "$unset": {"lease_expires_at": ""}}
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,182 @@
+"""
+Voice cloning API routes
+Only imported by backend.app when VOICE_CLONING_ENABLED is on, so the TTS
+stack (torch, Coqui TTS, numpy, soundfile) stays out of the default cold start.
+"""
+
+import json
+from pathlib import Path
+
+from fastapi import APIRouter, Request, HTTPException, Depends, status, Form
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+
+from backend.voice_cloning import voice_cloning_manager
+from backend.voice_jobs import enqueue_training_job, get_training_job, watch_training_job
+
+router = APIRouter(prefix="/voice-cloning")
+
+VOICE_RETRY_AFTER_SECONDS = 10
+
+def require_voice_model():
+    """Reject routes that use the TTS model with 503 until it has loaded and warmed up"""
+    readiness = voice_cloning_manager.readiness()
+    if not readiness["ready"]:
+        headers = {"Retry-After": str(VOICE_RETRY_AFTER_SECONDS)} if readiness["state"] in ("not_loaded", "loading", "warming_up") else None
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Voice model not ready ({readiness['state']})",
+            headers=headers
+        )
+
+@router.get("/ready")
+async def voice_model_readiness():
+    """Readiness of the TTS model: not_loaded, loading, warming_up, ready, failed or unavailable"""
+    readiness = voice_cloning_manager.readiness()
+    if readiness["ready"]:
+        return readiness
+    return JSONResponse(
+        status_code=503,
+        content=readiness,
+        headers={"Retry-After": str(VOICE_RETRY_AFTER_SECONDS)}
+    )
+
+@router.post("/upload-sample")
+async def upload_voice_sample(request: Request):
+    """Upload voice sample for training (multipart form with 'file' and 'user_id')"""
+    try:
+        content_length = request.headers.get("content-length")
+        
+        # Stream the body to disk instead of buffering it in memory
+        result = await voice_cloning_manager.receive_voice_sample(
+            chunks=request.stream(),
+            content_type=request.headers.get("content-type", ""),
+            content_length=int(content_length) if content_length and content_length.isdigit() else None
+        )
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "message": "Voice sample uploaded successfully",
+                "audio_path": result["audio_path"]
+            }
+        else:
+            return JSONResponse(
+                status_code=result.get("status_code", 400),
+                content={"success": False, "error": result["error"]}
+            )
+            
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+@router.post("/train")
+async def train_voice_model(
+    user_id: str = Form(...),
+    audio_path: str = Form(...)
+):
+    """Queue voice model training for user and return immediately"""
+    try:
+        if not Path(audio_path).exists():
+            return JSONResponse(
+                status_code=400,
+                content={"success": False, "error": "Voice sample not found"}
+            )
+        
+        training_id = await enqueue_training_job(user_id=user_id, audio_path=audio_path)
+        return {
+            "success": True,
+            "message": "Voice training started",
+            "training_id": training_id
+        }
+            
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+@router.get("/training-status/{training_id}")
+async def get_training_status(training_id: str):
+    """Get voice training status"""
+    try:
+        status = await get_training_job(training_id)
+        return {"success": True, "status": status}
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+@router.get("/training-events/{training_id}")
+async def stream_training_status(training_id: str):
+    """Server-sent events with training progress until the job finishes"""
+    async def event_stream():
+        async for status in watch_training_job(training_id):
+            yield f"data: {json.dumps(status)}\n\n"
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@router.post("/synthesize", dependencies=[Depends(require_voice_model)])
+async def synthesize_speech(
+    user_id: str = Form(...),
+    text: str = Form(...),
+    language: str = Form(default="en")
+):
+    """Synthesize speech using trained voice"""
+    try:
+        result = await voice_cloning_manager.synthesize_speech(
+            user_id=user_id,
+            text=text,
+            language=language
+        )
+        
+        if result["success"]:
+            # Return audio file
+            audio_path = Path(result["audio_path"])
+            if audio_path.exists():
+                return FileResponse(
+                    path=str(audio_path),
+                    media_type="audio/wav",
+                    filename=result["filename"]
+                )
+            else:
+                return JSONResponse(
+                    status_code=404,
+                    content={"success": False, "error": "Generated audio not found"}
+                )
+        else:
+            return JSONResponse(
+                status_code=400,
+                content={"success": False, "error": result["error"]}
+            )
+            
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+@router.get("/user-models/{user_id}")
+async def get_user_voice_models(user_id: str):
+    """Get all voice models for a user"""
+    try:
+        result = await voice_cloning_manager.get_user_voice_models(user_id)
+        return {"success": True, "voice_models": result.get("voice_models", [])}
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+@router.delete("/user-models/{user_id}")
+async def delete_voice_model(user_id: str):
+    """Delete user's voice model"""
+    try:
+        result = await voice_cloning_manager.delete_voice_model(user_id)
+        return {"success": True, "message": result.get("message", "Voice model deleted")}
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
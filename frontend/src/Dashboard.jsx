@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { auth } from "./firebase";
-import { fetchLessons } from "./api";
+import { fetchDashboard } from "./api";
 import ProgressCard from "./ProgressCard";
 import LearningTrendsChart from "./LearningTrendsChart";
 import TopicBreakdownChart from "./TopicBreakdownChart";
@@ -49,14 +49,16 @@ function getRecommendation(progress) {
   return "Great job! Keep learning or try a new scenario.";
 }
 
-// Helper to get ISO week string (YYYY-Www)
+// ISO-8601 week string (YYYY-Www), matching the backend rollups (date.isocalendar())
 function getISOWeek(dateStr) {
   const date = new Date(dateStr);
-  const year = date.getUTCFullYear();
-  // Get week number
-  const firstJan = new Date(Date.UTC(year, 0, 1));
-  const days = Math.floor((date - firstJan) / (24 * 60 * 60 * 1000));
-  const week = Math.ceil((days + firstJan.getUTCDay() + 1) / 7);
+  const day = new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth(), date.getUTCDate()));
+  // The week belongs to the year of its Thursday
+  const weekday = day.getUTCDay() || 7;
+  day.setUTCDate(day.getUTCDate() + 4 - weekday);
+  const year = day.getUTCFullYear();
+  const yearStart = new Date(Date.UTC(year, 0, 1));
+  const week = Math.ceil(((day - yearStart) / (24 * 60 * 60 * 1000) + 1) / 7);
   return `${year}-W${week.toString().padStart(2, '0')}`;
 }
 
@@ -80,32 +82,26 @@ function Dashboard({ user, onSectionSelect }) {
     const userProgress = getInitialProgress(user.uid);
     setProgress(userProgress);
 
-    // Fetch actual lessons count from backend
+    // Fetch aggregated dashboard data (server-side daily rollups)
     const fetchUserData = async () => {
       try {
-        const lessonsData = await fetchLessons();
-        const lessons = lessonsData.lessons || lessonsData || [];
-        const actualLessonsCount = lessons.length;
+        const dashboard = await fetchDashboard();
+        const totals = dashboard.totals || {};
         
         // Update progress with real data
         const updatedProgress = {
           ...userProgress,
-          lessonsCompleted: actualLessonsCount,
-          lastActivity: userProgress.lastActivity || (lessons[0]?.created_at || new Date().toISOString())
+          lessonsCompleted: totals.lessons || 0,
+          lastActivity: dashboard.last_activity || userProgress.lastActivity
         };
         setProgress(updatedProgress);
         localStorage.setItem(getProgressKey(user.uid), JSON.stringify(updatedProgress));
 
-        // Group lessons by week for line chart
+        // Weekly micro-lesson counts for line chart
         const weekMap = {};
         const videoWeekMap = {};
-        
-        // Process micro-lessons
-        lessons.forEach(lesson => {
-          if (lesson.created_at) {
-            const week = getISOWeek(lesson.created_at);
-            weekMap[week] = (weekMap[week] || 0) + 1;
-          }
+        (dashboard.trends || []).forEach(({ week, lessons }) => {
+          weekMap[week] = lessons;
         });
         
         // Mock video lessons data (replace with actual API call when available)
@@ -134,19 +130,8 @@ function Dashboard({ user, onSectionSelect }) {
         }));
         setLessonTrends(trends);
 
-        // Group lessons by topic for pie chart
-        const topicMap = {};
-        lessons.forEach(lesson => {
-          if (lesson.topic) {
-            topicMap[lesson.topic] = (topicMap[lesson.topic] || 0) + 1;
-          }
-        });
-        // Convert to array for pie chart
-        const breakdown = Object.keys(topicMap).map(topic => ({
-          name: topic,
-          value: topicMap[topic]
-        }));
-        setTopicBreakdown(breakdown);
+        // Topic breakdown for pie chart comes pre-aggregated as [{ name, value }]
+        setTopicBreakdown(dashboard.topics || []);
       } catch (error) {
         console.error("Failed to fetch user data:", error);
         setProgress(userProgress);
@@ -1,5 +1,27 @@
 import React, { useState, useEffect, useRef } from "react";
 import { useTheme } from "./ThemeContext";
+import { searchArtifacts } from "./api";
+
+const ARTIFACT_ICONS = {
+  lesson: "📚",
+  study_plan: "🗓️",
+  coach_session: "👨‍💼",
+  skills_forecast: "📈",
+  certification: "🏆"
+};
+
+// Render a server snippet with its [start, end] highlight ranges
+function renderSnippet(snippet) {
+  const parts = [];
+  let cursor = 0;
+  snippet.highlights.forEach(([start, end], index) => {
+    parts.push(snippet.text.slice(cursor, start));
+    parts.push(<mark key={index}>{snippet.text.slice(start, end)}</mark>);
+    cursor = end;
+  });
+  parts.push(snippet.text.slice(cursor));
+  return parts;
+}
 
 const GlobalSearch = ({ onNavigate, isOpen, onClose }) => {
   const [searchQuery, setSearchQuery] = useState("");
@@ -146,6 +168,30 @@ const GlobalSearch = ({ onNavigate, isOpen, onClose }) => {
 
     setFilteredResults(results);
     setSelectedIndex(0);
+
+    // Search the user's own lessons, plans and sessions on the server (debounced)
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const data = await searchArtifacts(searchQuery.trim());
+        if (cancelled || !data.results) return;
+        const artifacts = data.results.map(result => ({
+          key: `${result.kind}-${result.id}`,
+          id: result.section,
+          title: result.title,
+          description: renderSnippet(result.snippet),
+          icon: ARTIFACT_ICONS[result.kind] || "📄"
+        }));
+        setFilteredResults([...results, ...artifacts]);
+      } catch (error) {
+        console.error("Search failed:", error);
+      }
+    }, 250);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
   }, [searchQuery]);
 
   // Handle keyboard navigation
@@ -271,7 +317,7 @@ const GlobalSearch = ({ onNavigate, isOpen, onClose }) => {
             {filteredResults.length > 0 ? (
               filteredResults.map((section, index) => (
                 <div
-                  key={section.id}
+                  key={section.key || section.id}
                   onClick={() => handleSelect(section)}
                   style={{
                     display: "flex",
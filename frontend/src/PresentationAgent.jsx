@@ -150,36 +150,30 @@ function PresentationAgent() {
     }
   };
 
-  const pollTrainingStatus = async (trainingId) => {
-    const pollInterval = setInterval(async () => {
-      try {
-        const response = await fetch(`/api/voice-cloning/training-status/${trainingId}`);
-        const result = await response.json();
-        
-        if (result.success) {
-          const status = result.status;
-          
-          if (status.status === 'completed') {
-            setVoiceTrainingStatus('completed');
-            setHasTrainedVoice(true);
-            clearInterval(pollInterval);
-          } else if (status.status === 'failed') {
-            setVoiceTrainingStatus('error');
-            console.error('Training failed:', status.error);
-            clearInterval(pollInterval);
-          }
-          // Continue polling if status is 'training'
-        } else {
-          setVoiceTrainingStatus('error');
-          clearInterval(pollInterval);
-        }
-        
-      } catch (error) {
-        console.error('Error polling training status:', error);
+  const pollTrainingStatus = (trainingId) => {
+    // Training progress is pushed by the server as it changes
+    const events = new EventSource(`/api/voice-cloning/training-events/${trainingId}`);
+    
+    events.onmessage = (event) => {
+      const status = JSON.parse(event.data);
+      
+      if (status.status === 'completed') {
+        setVoiceTrainingStatus('completed');
+        setHasTrainedVoice(true);
+        events.close();
+      } else if (status.status === 'failed' || status.status === 'not_found') {
         setVoiceTrainingStatus('error');
-        clearInterval(pollInterval);
+        console.error('Training failed:', status.error);
+        events.close();
       }
-    }, 2000); // Poll every 2 seconds
+      // Keep listening while status is 'queued' or 'training'
+    };
+    
+    events.onerror = (error) => {
+      console.error('Error streaming training status:', error);
+      setVoiceTrainingStatus('error');
+      events.close();
+    };
   };
 
   const synthesizeWithTrainedVoice = async (text, language = 'en') => {
@@ -92,6 +92,17 @@ export async function fetchLessons() {
   return res.json();
 }
 
+export async function fetchDashboard() {
+  const res = await fetchWithAuth(`${API_BASE}/user/dashboard`);
+  return res.json();
+}
+
+export async function searchArtifacts(query, page = 1, pageSize = 10) {
+  const params = new URLSearchParams({ q: query, page, page_size: pageSize });
+  const res = await fetchWithAuth(`${API_BASE}/search?${params}`);
+  return res.json();
+}
+
 export async function deleteLesson(id) {
   const res = await fetchWithAuth(`${API_BASE}/lessons/${id}`, {
     method: "DELETE"